@@ -0,0 +1,113 @@
+"""
+Machine-readable alerts emitted by UplinkAnalyzer.
+
+Checks return `Alert(code, params)`; the emoji strings people read are only
+rendered when something is logged or sent back to a client.  Codes are
+`IntFlag` members so all alerts of one uplink fold into a single bitmask.
+"""
+from enum import IntFlag, auto
+from typing import Any, Dict, Iterable, List, NamedTuple, Optional
+
+class AlertCode(IntFlag):
+    # timestamp
+    MISSING_TIMESTAMP   = auto()
+    BAD_TIMESTAMP       = auto()
+    # FCnt
+    INVALID_FCNT        = auto()
+    FCNT_OVERFLOW       = auto()
+    FCNT_ROLLOVER       = auto()
+    DUPLICATE_FCNT      = auto()
+    FCNT_BACKWARDS      = auto()
+    FCNT_GAP            = auto()
+    LARGE_FCNT_GAP      = auto()
+    # timing
+    TOO_FAST            = auto()
+    LONG_DELAY          = auto()
+    OFF_INTERVAL        = auto()
+    # RF
+    VERY_POOR_RF        = auto()
+    LOW_RF              = auto()
+    GOOD_RF             = auto()
+    # payload
+    EMPTY_PAYLOAD       = auto()
+    BAD_BASE64          = auto()
+    ZERO_LENGTH_PAYLOAD = auto()
+    EXACT_DUPLICATE     = auto()
+    PAYLOAD_REPEATED    = auto()
+    COUNTER_UNCHANGED   = auto()
+    COUNTER_DECREASED   = auto()
+    EMPTY_STRING        = auto()
+    SHORT_PAYLOAD       = auto()
+    # cross-gateway
+    GATEWAY_LOST        = auto()
+    GATEWAY_RECOVERED   = auto()
+    GATEWAY_DEGRADED    = auto()
+    GATEWAY_RESTORED    = auto()
+    # streaming detection
+    JAMMING_SUSPECTED   = auto()
+    JAMMING_CLEARED     = auto()
+
+# groups used by the window counters
+POOR_RF = AlertCode.VERY_POOR_RF | AlertCode.LOW_RF
+
+INFO_CODES = (AlertCode.FCNT_ROLLOVER | AlertCode.OFF_INTERVAL | AlertCode.GOOD_RF
+              | AlertCode.GATEWAY_RECOVERED | AlertCode.GATEWAY_RESTORED
+              | AlertCode.JAMMING_CLEARED)
+
+# ── human-readable rendering ──────────────────────────────────────────────────
+_TEMPLATES: Dict[AlertCode, str] = {
+    AlertCode.MISSING_TIMESTAMP:   "⚠️ Missing timestamp",
+    AlertCode.BAD_TIMESTAMP:       "⚠️ Bad timestamp: {raw!r}",
+    AlertCode.INVALID_FCNT:        "⚠️ Invalid or missing FCnt",
+    AlertCode.FCNT_OVERFLOW:       "⚠️ FCnt > 16-bit limit",
+    AlertCode.FCNT_ROLLOVER:       "ℹ️ FCnt rollover detected",
+    AlertCode.DUPLICATE_FCNT:      "⚠️ Duplicate FCnt {fcnt}",
+    AlertCode.FCNT_BACKWARDS:      "⚠️ FCnt went backwards ({last}→{fcnt})",
+    AlertCode.FCNT_GAP:            "⚠️ FCnt gap of {gap}",
+    AlertCode.LARGE_FCNT_GAP:      "⚠️ Large FCnt gap – potential loss",
+    AlertCode.TOO_FAST:            "⚠️ Too fast ({dt:.2f}s) – duplicates?",
+    AlertCode.LONG_DELAY:          "⚠️ Long delay ({dt:.1f}s) – expected {expected}s",
+    AlertCode.OFF_INTERVAL:        "ℹ️ Interval {dt:.1f}s (nominal {expected}s)",
+    AlertCode.VERY_POOR_RF:        "⚠️ Very poor RF (RSSI {rssi} / SNR {snr})",
+    AlertCode.LOW_RF:              "⚠️ Low RF (RSSI {rssi} / SNR {snr})",
+    AlertCode.GOOD_RF:             "ℹ️ Good RF (RSSI {rssi} / SNR {snr})",
+    AlertCode.EMPTY_PAYLOAD:       "⚠️ Empty payload",
+    AlertCode.BAD_BASE64:          "⚠️ Bad base64",
+    AlertCode.ZERO_LENGTH_PAYLOAD: "⚠️ Zero-length payload",
+    AlertCode.EXACT_DUPLICATE:     "⚠️ Exact duplicate payload & FCnt",
+    AlertCode.PAYLOAD_REPEATED:    "⚠️ Payload+count repeated with new FCnt",
+    AlertCode.COUNTER_UNCHANGED:   "⚠️ Payload counter unchanged",
+    AlertCode.COUNTER_DECREASED:   "⚠️ Payload counter decreased",
+    AlertCode.EMPTY_STRING:        "⚠️ Empty decoded string",
+    AlertCode.SHORT_PAYLOAD:       "⚠️ Very short payload",
+    AlertCode.GATEWAY_LOST:        "⚠️ Gateway {gateway} lost the device ({missed} uplinks missed) while others still hear it",
+    AlertCode.GATEWAY_RECOVERED:   "ℹ️ Gateway {gateway} hears the device again",
+    AlertCode.GATEWAY_DEGRADED:    "⚠️ Gateway {gateway} degraded (RSSI -{rssi_drop} dB / SNR -{snr_drop} dB vs. its baseline) while others are stable",
+    AlertCode.GATEWAY_RESTORED:    "ℹ️ Gateway {gateway} back to its usual RF level",
+    AlertCode.JAMMING_SUSPECTED:   "🚨 Jamming suspected since {onset} (CUSUM loss {cusum_loss} / SNR {cusum_snr} / timing {cusum_dt})",
+    AlertCode.JAMMING_CLEARED:     "ℹ️ Jamming cleared at {cleared} (began {onset}, lasted {duration_s}s)",
+}
+
+class Alert(NamedTuple):
+    code:   AlertCode
+    params: Optional[Dict[str, Any]] = None
+
+    def render(self) -> str:
+        return _TEMPLATES[self.code].format(**(self.params or {}))
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "code":     self.code.name,
+            "severity": "info" if self.code & INFO_CODES else "warning",
+            "params":   self.params or {},
+        }
+
+def alert_mask(alerts: Iterable[Alert]) -> int:
+    """OR all codes together so counters can test bits instead of strings."""
+    mask = 0
+    for a in alerts:
+        mask |= a.code.value
+    return mask
+
+def render_all(alerts: Iterable[Alert]) -> List[str]:
+    return [a.render() for a in alerts]
@@ -0,0 +1,190 @@
+"""
+AsyncIngestor: acknowledge web-hooks immediately, analyse them later.
+
+The HTTP handler only has to put the uplink on a bounded queue; an asyncio
+event loop running in a background thread drains it into the analyzer.
+Uplinks are sharded over the worker tasks by DevEUI, so every device is
+always handled by the same task and its messages keep their arrival order.
+"""
+import asyncio
+import logging
+import threading
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional
+
+class IngestorStopped(RuntimeError):
+    """Raised when work is submitted to an ingestor that is not running."""
+
+class AsyncIngestor:
+    # ── defaults ───────────────────────────────────────────────────────────
+    WORKERS   = 4
+    MAX_QUEUE = 10_000          # uplinks waiting across all workers
+    # ───────────────────────────────────────────────────────────────────────
+
+    def __init__(
+        self,
+        analyzer: Any,
+        logger: logging.Logger,
+        workers: int = WORKERS,
+        max_queue: int = MAX_QUEUE,
+        offload: bool = False,
+    ) -> None:
+        """
+        `offload=True` runs each analyzer call on a thread (one per worker)
+        instead of on the loop itself; use it when the analyzer releases the
+        GIL while it waits, e.g. a `ShardedAnalyzer` blocked on its pipes.
+        """
+        self._analyzer  = analyzer
+        self._log       = logger.getChild("ingest")
+        self._n_workers = max(1, workers)
+        self.max_queue  = max_queue
+        self._executor  = ThreadPoolExecutor(self._n_workers, "ingest") if offload else None
+
+        self._loop:   Optional[asyncio.AbstractEventLoop] = None
+        self._thread: Optional[threading.Thread]          = None
+        self._queues: List[asyncio.Queue]                  = []
+        self._tasks:  List[asyncio.Task]                   = []
+        self._ready   = threading.Event()
+
+        # queue depth is tracked here (not via Queue.qsize) so the capacity
+        # check and the reservation happen atomically in the caller thread
+        self._lock    = threading.Lock()
+        self._pending = 0
+        self.rejected = 0
+        self.failed   = 0
+
+    # ------------------------------------------------------------------ API
+    @property
+    def running(self) -> bool:
+        return self._ready.is_set()
+
+    @property
+    def depth(self) -> int:
+        return self._pending
+
+    def start(self) -> None:
+        if self._thread is not None:
+            return
+        self._thread = threading.Thread(target=self._run, name="ingest-loop", daemon=True)
+        self._thread.start()
+        self._ready.wait()
+        self._log.info("Async ingestion started (%d workers, queue %d)",
+                       self._n_workers, self.max_queue)
+
+    def stop(self, timeout: float = 10.0) -> None:
+        """Drain whatever is queued, then stop the loop."""
+        if self._loop is None or not self.running:
+            return
+        self._ready.clear()
+        fut = asyncio.run_coroutine_threadsafe(self._drain(), self._loop)
+        try:
+            fut.result(timeout)
+        except Exception:
+            self._log.warning("Ingest queue not drained within %.1fs (%d left)",
+                              timeout, self._pending)
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        if self._thread is not None:
+            self._thread.join(timeout)
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
+        self._thread = None
+        self._log.info("Async ingestion stopped")
+
+    def submit(self, data: Dict[str, Any]) -> bool:
+        """Queue one uplink. Returns False when the queue is full."""
+        # shard first: nothing may raise between reserving and dispatching
+        shard = self._shard(data)
+        if not self._reserve(1):
+            return False
+        self._dispatch(shard, data)
+        return True
+
+    def submit_batch(self, messages: List[Dict[str, Any]]) -> bool:
+        """
+        Queue a batch as per-device groups, all or nothing.  Each group is
+        handed to `analyze_batch` so it is still replayed in time order.
+        """
+        groups: Dict[int, List[Dict[str, Any]]] = {}
+        for data in messages:
+            groups.setdefault(self._shard(data), []).append(data)
+        if not self._reserve(len(messages)):
+            return False
+        for shard, group in groups.items():
+            self._dispatch(shard, group)
+        return True
+
+    def call(self, fn: Callable[..., Any], *args: Any, timeout: float = 10.0) -> Any:
+        """Run `fn(*args)` on the ingest loop, serialised with the workers."""
+        if self._loop is None or not self.running:
+            raise IngestorStopped("ingestor is not running")
+
+        async def _call() -> Any:
+            return fn(*args)
+        return asyncio.run_coroutine_threadsafe(_call(), self._loop).result(timeout)
+
+    # ---------------------------------------------------------------- helpers
+    def _reserve(self, n: int) -> bool:
+        if not self.running:
+            raise IngestorStopped("ingestor is not running")
+        with self._lock:
+            if self._pending + n > self.max_queue:
+                self.rejected += n
+                return False
+            self._pending += n
+        return True
+
+    def _release(self, n: int) -> None:
+        with self._lock:
+            self._pending -= n
+
+    def _shard(self, data: Any) -> int:
+        # malformed bodies still get a shard; the analyzer reports them
+        dev_eui = "unknown"
+        ids = data.get("end_device_ids") if isinstance(data, dict) else None
+        if isinstance(ids, dict):
+            dev_eui = ids.get("dev_eui", "unknown")
+        return zlib.crc32(str(dev_eui).encode()) % self._n_workers
+
+    def _dispatch(self, shard: int, item: Any) -> None:
+        assert self._loop is not None
+        self._loop.call_soon_threadsafe(self._queues[shard].put_nowait, item)
+
+    def _run(self) -> None:
+        loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(loop)
+        self._loop   = loop
+        self._queues = [asyncio.Queue() for _ in range(self._n_workers)]
+        self._tasks  = [loop.create_task(self._worker(q)) for q in self._queues]
+        loop.call_soon(self._ready.set)
+        try:
+            loop.run_forever()
+        finally:
+            for t in self._tasks:
+                t.cancel()
+            loop.run_until_complete(asyncio.gather(*self._tasks, return_exceptions=True))
+            loop.close()
+
+    async def _worker(self, queue: asyncio.Queue) -> None:
+        while True:
+            item = await queue.get()
+            n = len(item) if isinstance(item, list) else 1
+            fn = (self._analyzer.analyze_batch if isinstance(item, list)
+                  else self._analyzer.analyze_uplink)
+            try:
+                if self._executor is not None:
+                    loop = asyncio.get_running_loop()
+                    await loop.run_in_executor(self._executor, fn, item)
+                else:
+                    fn(item)
+            except Exception:
+                self.failed += n
+                self._log.exception("Uplink analysis failed")
+            finally:
+                self._release(n)
+                queue.task_done()
+            # let the other workers (and call()) in between messages
+            await asyncio.sleep(0)
+
+    async def _drain(self) -> None:
+        await asyncio.gather(*(q.join() for q in self._queues))
@@ -0,0 +1,342 @@
+"""
+Load benchmark: synthetic TTN traffic through the analyzer and the server.
+
+Generates a reproducible uplink stream — N devices on a fixed interval
+with jitter, random loss, repeated FCnts, jamming bursts (heavy loss and an
+SNR drop on one device) and per-gateway RSSI / SNR spread — and replays it
+
+  • in-process, straight into `UplinkAnalyzer.analyze_uplink`, and/or
+  • over HTTP against `monitor_server.py` with concurrent clients (each
+    client owns a slice of the devices, so per-device order is kept).
+
+With `--batch N` both targets are run a second time in chunks of N uplinks
+(`analyze_batch` / `POST /uplinks/batch`) and the speed-up over the
+one-by-one path is printed; latencies are then per chunk.
+
+Reports msgs/s, p50 / p99 latency and RSS growth, and appends one JSON line
+per run to `--out` so results can be compared across commits.
+
+  python bench_load.py                                  # both targets
+  python bench_load.py --target inproc --devices 10000 --uplinks 200000
+  python bench_load.py --target http --clients 8 --server-env INGEST_MODE=async
+  python bench_load.py --batch 100                      # also /uplinks/batch
+  python bench_load.py --target http --url http://localhost:5000
+"""
+import argparse
+import base64
+import json
+import logging
+import os
+import platform
+import random
+import subprocess
+import sys
+import tempfile
+import time
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import asdict, dataclass
+from typing import Any, Dict, List, Optional, Tuple
+
+from ttn_time import NS_PER_S
+from uplink_analyzer import UplinkAnalyzer
+from window_writer import open_window_writer
+
+HERE    = os.path.dirname(os.path.abspath(__file__))
+START_S = 1_735_689_600         # 2025-01-01T00:00:00Z, for stable timestamps
+
+@dataclass
+class Traffic:
+    devices:      int   = 100
+    uplinks:      int   = 20_000     # frames sent in total (before loss)
+    interval:     float = 60.0       # s between a device's frames
+    jitter:       float = 2.0        # ± s
+    loss:         float = 0.02       # background frame loss
+    duplicates:   float = 0.01       # frames delivered twice
+    jam_bursts:   int   = 5
+    jam_length:   int   = 30         # frames per burst
+    jam_loss:     float = 0.7        # frame loss while jammed
+    jam_snr_drop: float = 12.0       # dB
+    rssi_mean:    float = -95.0
+    rssi_std:     float = 8.0
+    snr_mean:     float = 5.0
+    snr_std:      float = 3.0
+    gateways:     int   = 2          # gateways in range of each device
+    seed:         int   = 0
+
+# ── traffic ────────────────────────────────────────────────────────────────────
+def _ttn_time(ns: int) -> str:
+    sec, frac = divmod(ns, NS_PER_S)
+    return time.strftime("%Y-%m-%dT%H:%M:%S", time.gmtime(sec)) + f".{frac:09d}Z"
+
+def generate(t: Traffic) -> List[Dict[str, Any]]:
+    """Web-hook bodies in arrival order; same `Traffic` → same stream."""
+    rnd = random.Random(t.seed)
+    frames = max(1, t.uplinks // t.devices)
+    n_gw = max(t.gateways, t.devices // 50)
+
+    jammed = set()
+    for _ in range(t.jam_bursts):
+        dev, first = rnd.randrange(t.devices), rnd.randrange(frames)
+        jammed.update((dev, f) for f in range(first, min(frames, first + t.jam_length)))
+
+    events: List[Tuple[int, int, Dict[str, Any]]] = []
+    for d in range(t.devices):
+        dev_eui = f"{0x70B3D5_0000000000 + d:016X}"
+        phase = rnd.uniform(0, t.interval)
+        # this device's gateways and its mean level at each
+        gws = [(f"gw-{(d + k) % n_gw:04d}", rnd.gauss(t.rssi_mean, t.rssi_std),
+                rnd.gauss(t.snr_mean, t.snr_std)) for k in range(t.gateways)]
+        for f in range(frames):
+            jam = (d, f) in jammed
+            if rnd.random() < (t.jam_loss if jam else t.loss):
+                continue
+            ts = int((START_S + phase + f * t.interval + rnd.uniform(-t.jitter, t.jitter)) * NS_PER_S)
+            rx = []
+            for k, (gw, rssi, snr) in enumerate(gws):
+                if k and rnd.random() < 0.1:
+                    continue                # farther gateways miss a few
+                rx.append({
+                    "gateway_ids": {"gateway_id": gw},
+                    "rssi": round(rnd.gauss(rssi, 2)),
+                    "snr":  round(rnd.gauss(snr, 1.5) - (t.jam_snr_drop if jam else 0), 2),
+                })
+            body = {
+                "end_device_ids": {"dev_eui": dev_eui},
+                "uplink_message": {
+                    "f_cnt":       f,
+                    "frm_payload": base64.b64encode(b"ping" + bytes([f % 256])).decode(),
+                    "received_at": _ttn_time(ts),
+                    "rx_metadata": rx,
+                },
+            }
+            events.append((ts, d, body))
+            if rnd.random() < t.duplicates:
+                events.append((ts + rnd.randrange(NS_PER_S), d, body))
+    events.sort(key=lambda e: e[0])
+    return [body for _, _, body in events]
+
+# ── measuring ──────────────────────────────────────────────────────────────────
+def rss_bytes(pid: Optional[int] = None) -> Optional[int]:
+    """Resident set size of `pid` (default: this process); None if unknown."""
+    try:
+        with open(f"/proc/{pid or 'self'}/status") as fp:
+            for line in fp:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        pass
+    if pid is None:
+        try:
+            import resource             # peak, not current, but better than nothing
+            scale = 1 if sys.platform == "darwin" else 1024
+            return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * scale
+        except ImportError:
+            pass
+    return None
+
+def _summarise(latencies_ns: List[int], elapsed: float, rss0: Optional[int],
+               rss1: Optional[int], messages: Optional[int] = None) -> Dict[str, Any]:
+    """`messages` defaults to one per latency sample (i.e. no batching)."""
+    lat = sorted(latencies_ns)
+    n = len(lat)
+    msgs = n if messages is None else messages
+
+    def pct(p: float) -> Optional[float]:
+        return round(lat[min(n - 1, int(p * n))] / 1e6, 3) if n else None
+
+    mb = lambda b: round(b / 2**20, 1) if b is not None else None
+    return {
+        "messages":       msgs,
+        "requests":       n,
+        "elapsed_s":      round(elapsed, 3),
+        "msgs_per_s":     round(msgs / elapsed, 1) if elapsed else None,
+        "p50_ms":         pct(0.50),
+        "p99_ms":         pct(0.99),
+        "max_ms":         round(lat[-1] / 1e6, 3) if n else None,
+        "rss_start_mb":   mb(rss0),
+        "rss_end_mb":     mb(rss1),
+        "rss_growth_mb":  mb(rss1 - rss0) if rss0 is not None and rss1 is not None else None,
+    }
+
+def _chunks(items: List[Any], size: int) -> List[List[Any]]:
+    return [items[i:i + size] for i in range(0, len(items), size)]
+
+def bench_inproc(bodies: List[Dict[str, Any]], workdir: str, batch: int = 0) -> Dict[str, Any]:
+    log = logging.getLogger("bench")
+    log.setLevel(logging.WARNING)
+    writer = open_window_writer("csv", os.path.join(workdir, f"stats-{batch}"), log)
+    analyzer = UplinkAnalyzer(log, writer=writer, log_mode="window")
+
+    lat: List[int] = []
+    alerts = 0
+    clock = time.perf_counter_ns
+    rss0 = rss_bytes()
+    t0 = time.perf_counter()
+    if batch:
+        for chunk in _chunks(bodies, batch):
+            start = clock()
+            results = analyzer.analyze_batch(chunk)
+            lat.append(clock() - start)
+            alerts += sum(len(res.get("alert_codes", ())) for res in results)
+    else:
+        for body in bodies:
+            start = clock()
+            res = analyzer.analyze_uplink(body)
+            lat.append(clock() - start)
+            alerts += len(res["alert_codes"])
+    elapsed = time.perf_counter() - t0
+    rss1 = rss_bytes()
+    out = _summarise(lat, elapsed, rss0, rss1, len(bodies))
+    out["batch"] = batch
+    out["alerts"] = alerts
+    out["jamming_suspected"] = len(analyzer.jamming_suspects())
+    analyzer.close()
+    return out
+
+def _start_server(workdir: str, port: int, env: Dict[str, str]) -> subprocess.Popen:
+    import requests
+    proc = subprocess.Popen(
+        [sys.executable, os.path.join(HERE, "monitor_server.py")], cwd=workdir,
+        env={**os.environ, "PORT": str(port), "LOG_DETAIL": "window", **env},
+        stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    deadline = time.monotonic() + 30
+    while time.monotonic() < deadline:
+        if proc.poll() is not None:
+            raise RuntimeError(f"monitor_server.py exited with {proc.returncode}")
+        try:
+            requests.get(f"http://127.0.0.1:{port}/stats", timeout=1)
+            return proc
+        except requests.ConnectionError:
+            time.sleep(0.2)
+    proc.kill()
+    raise RuntimeError("monitor_server.py did not come up within 30 s")
+
+def bench_http(bodies: List[Dict[str, Any]], workdir: str, clients: int,
+               url: Optional[str] = None, port: int = 5055,
+               server_env: Optional[Dict[str, str]] = None, batch: int = 0) -> Dict[str, Any]:
+    import requests
+
+    proc = None
+    if url is None:
+        proc = _start_server(workdir, port, server_env or {})
+        url = f"http://127.0.0.1:{port}"
+    pid = proc.pid if proc else None
+
+    # one slice of devices per client keeps each device's uplinks in order
+    per_client: List[List[Dict[str, Any]]] = [[] for _ in range(clients)]
+    for body in bodies:
+        dev = body["end_device_ids"]["dev_eui"]
+        per_client[zlib.crc32(dev.encode()) % clients].append(body)
+    if batch:
+        endpoint = "/uplinks/batch"
+        slices = [[json.dumps(c).encode() for c in _chunks(part, batch)] for part in per_client]
+    else:
+        endpoint = "/uplink"
+        slices = [[json.dumps(b).encode() for b in part] for part in per_client]
+
+    def run(chunk: List[bytes]) -> Tuple[List[int], int]:
+        lat, errors = [], 0
+        clock = time.perf_counter_ns
+        with requests.Session() as session:
+            headers = {"Content-Type": "application/json"}
+            for data in chunk:
+                start = clock()
+                r = session.post(f"{url}{endpoint}", data=data, headers=headers, timeout=30)
+                lat.append(clock() - start)
+                errors += r.status_code >= 400
+        return lat, errors
+
+    try:
+        rss0 = rss_bytes(pid) if pid else None
+        t0 = time.perf_counter()
+        with ThreadPoolExecutor(clients) as pool:
+            results = list(pool.map(run, slices))
+        elapsed = time.perf_counter() - t0
+        rss1 = rss_bytes(pid) if pid else None
+    finally:
+        if proc is not None:
+            proc.terminate()
+            proc.wait(10)
+
+    out = _summarise([x for lat, _ in results for x in lat], elapsed, rss0, rss1, len(bodies))
+    out["batch"] = batch
+    out["clients"] = clients
+    out["errors"] = sum(e for _, e in results)
+    out["server_env"] = server_env or {}
+    return out
+
+# ── results ────────────────────────────────────────────────────────────────────
+def _git_rev() -> Optional[str]:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=HERE,
+                              capture_output=True, text=True, timeout=5).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+def _print(name: str, r: Dict[str, Any]) -> None:
+    rss = f"{r['rss_growth_mb']:+} MB" if r["rss_growth_mb"] is not None else "n/a"
+    print(f"{name:>12} │ {r['messages']:>8} msgs │ {r['msgs_per_s']:>9} msg/s │ "
+          f"p50 {r['p50_ms']:>7} ms │ p99 {r['p99_ms']:>7} ms │ RSS {rss}")
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--target", choices=("inproc", "http", "both"), default="both")
+    for f, default in asdict(Traffic()).items():
+        ap.add_argument(f"--{f.replace('_', '-')}", type=type(default), default=default, dest=f)
+    ap.add_argument("--clients", type=int, default=4, help="concurrent HTTP clients")
+    ap.add_argument("--batch", type=int, default=0, metavar="N",
+                    help="also run each target in batches of N uplinks (0 = don't)")
+    ap.add_argument("--url", help="benchmark a running server instead of starting one")
+    ap.add_argument("--port", type=int, default=5055, help="port for the server started here")
+    ap.add_argument("--server-env", action="append", default=[], metavar="KEY=VALUE",
+                    help="environment for the server started here (repeatable)")
+    ap.add_argument("--out", default="bench_results.jsonl", help="results are appended here ('' = don't)")
+    args = ap.parse_args()
+
+    traffic = Traffic(**{f: getattr(args, f) for f in asdict(Traffic())})
+    server_env = dict(kv.split("=", 1) for kv in args.server_env)
+
+    t0 = time.perf_counter()
+    bodies = generate(traffic)
+    print(f"generated {len(bodies)} uplinks from {traffic.devices} devices "
+          f"in {time.perf_counter() - t0:.2f} s")
+
+    results: Dict[str, Any] = {}
+    with tempfile.TemporaryDirectory(prefix="bench_load_") as workdir:
+        if args.target in ("inproc", "both"):
+            results["inproc"] = bench_inproc(bodies, workdir)
+            _print("inproc", results["inproc"])
+            if args.batch:
+                results["inproc-batch"] = bench_inproc(bodies, workdir, args.batch)
+                _print("inproc-batch", results["inproc-batch"])
+        if args.target in ("http", "both"):
+            results["http"] = bench_http(bodies, workdir, args.clients, args.url,
+                                         args.port, server_env)
+            _print("http", results["http"])
+            if args.batch:
+                results["http-batch"] = bench_http(bodies, workdir, args.clients, args.url,
+                                                   args.port + 1, server_env, args.batch)
+                _print("http-batch", results["http-batch"])
+        for name in ("inproc", "http"):
+            single, batched = results.get(name), results.get(f"{name}-batch")
+            if single and batched and single["msgs_per_s"]:
+                print(f"{name}: batches of {args.batch} are "
+                      f"{batched['msgs_per_s'] / single['msgs_per_s']:.1f}x the single path")
+
+    if args.out:
+        record = {
+            "time":     time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+            "git":      _git_rev(),
+            "python":   platform.python_version(),
+            "platform": platform.platform(),
+            "cpus":     os.cpu_count(),
+            "traffic":  asdict(traffic),
+            "results":  results,
+        }
+        with open(args.out, "a", encoding="utf-8") as fp:
+            fp.write(json.dumps(record) + "\n")
+        print(f"results appended to {args.out}")
+
+if __name__ == "__main__":
+    main()
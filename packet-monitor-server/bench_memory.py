@@ -0,0 +1,71 @@
+"""
+Memory benchmark: bytes per tracked device.
+
+Builds N `DeviceState`s the way the analyzer does (one per DevEUI, keyed in
+a dict) and feeds each a few uplinks' worth of history, then reports the
+traced allocation per device.
+
+  python bench_memory.py                      # 10k, 100k, 1M devices
+  python bench_memory.py --sizes 10000 --samples 100
+"""
+import argparse
+import gc
+import json
+import random
+import time
+import tracemalloc
+from typing import Dict
+
+from device_state import DeviceState
+
+def measure(n_devices: int, samples: int, seed: int = 0) -> Dict[str, float]:
+    rnd = random.Random(seed)
+    gc.collect()
+    tracemalloc.start()
+    t0 = time.perf_counter()
+
+    devices: Dict[str, DeviceState] = {}
+    for i in range(n_devices):
+        dev_eui = f"{rnd.getrandbits(64):016X}"
+        s = devices[dev_eui] = DeviceState(dev_eui)
+        for f in range(samples):
+            s.fcnt_sequence.append(f)
+            s.rssi_history.append(rnd.randint(-125, -40))
+            s.snr_history.append(rnd.randint(-80, 50) / 4)
+        s.last_fcnt = samples - 1
+        s.window.msgs = samples
+
+    current, _ = tracemalloc.get_traced_memory()
+    elapsed = time.perf_counter() - t0
+    tracemalloc.stop()
+    del devices
+    gc.collect()
+
+    return {
+        "devices":           n_devices,
+        "samples":           samples,
+        "total_mb":          round(current / 2**20, 1),
+        "bytes_per_device":  round(current / n_devices, 1),
+        "build_s":           round(elapsed, 2),
+    }
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--sizes", type=int, nargs="+", default=[10_000, 100_000, 1_000_000])
+    ap.add_argument("--samples", type=int, default=10,
+                    help="uplinks of history per device (default 10)")
+    ap.add_argument("--json", action="store_true", help="print results as JSON")
+    args = ap.parse_args()
+
+    results = [measure(n, args.samples) for n in args.sizes]
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+
+    print(f"{'devices':>10} │ {'samples':>7} │ {'total MB':>9} │ {'B/device':>9} │ {'build s':>7}")
+    for r in results:
+        print(f"{r['devices']:>10} │ {r['samples']:>7} │ {r['total_mb']:>9} │ "
+              f"{r['bytes_per_device']:>9} │ {r['build_s']:>7}")
+
+if __name__ == "__main__":
+    main()
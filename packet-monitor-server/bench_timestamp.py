@@ -0,0 +1,108 @@
+"""
+Micro-benchmark: TTN `received_at` parsing and the per-uplink time maths.
+
+Compares the former analyzer path (strip `Z`, pad the fraction,
+`datetime.fromisoformat`, `timedelta` arithmetic) with `ttn_time.parse_ns`
+and integer-nanosecond arithmetic, over a stream of realistic timestamps
+from many devices.
+
+  python bench_timestamp.py
+  python bench_timestamp.py --uplinks 500000 --devices 1000 --json
+"""
+import argparse
+import json
+import random
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Callable, Dict, List
+
+from ttn_time import NS_PER_S, parse_ns
+
+def legacy_parse(raw: str) -> datetime:
+    """The analyzer's parser before ttn_time (kept here for comparison)."""
+    if raw.endswith("Z"):
+        raw = raw[:-1]
+    if "." in raw:
+        date_part, frac = raw.split(".", 1)
+        frac = (frac + "000000")[:6]
+        return datetime.fromisoformat(f"{date_part}.{frac}").replace(tzinfo=timezone.utc)
+    return datetime.fromisoformat(raw).replace(tzinfo=timezone.utc)
+
+def make_stream(n_uplinks: int, n_devices: int, seed: int = 0) -> List[str]:
+    """Interleaved uplinks, each device every ~10 s, ns-precision like TTN."""
+    rnd = random.Random(seed)
+    t = datetime(2025, 1, 1, tzinfo=timezone.utc)
+    out = []
+    for _ in range(n_uplinks):
+        t += timedelta(seconds=10 / n_devices, microseconds=rnd.randint(0, 999))
+        out.append(t.strftime("%Y-%m-%dT%H:%M:%S.") + f"{t.microsecond:06d}{rnd.randint(0, 999):03d}Z")
+    return out
+
+def _time(fn: Callable[[], None]) -> float:
+    t0 = time.perf_counter()
+    fn()
+    return time.perf_counter() - t0
+
+def measure(n_uplinks: int, n_devices: int, repeat: int = 3) -> Dict[str, float]:
+    stream = make_stream(n_uplinks, n_devices)
+
+    def parse_legacy() -> None:
+        for raw in stream:
+            legacy_parse(raw)
+
+    def parse_fast() -> None:
+        for raw in stream:
+            parse_ns(raw)
+
+    # parse + the deltas the analyzer takes per uplink (Δt, timing, window)
+    def pipeline_legacy() -> None:
+        last: Dict[int, datetime] = {}
+        for i, raw in enumerate(stream):
+            ts = legacy_parse(raw)
+            prev = last.get(i % n_devices)
+            if prev:
+                round((ts - prev).total_seconds(), 1)
+                (ts - prev).total_seconds()
+                (ts - prev).total_seconds()
+            last[i % n_devices] = ts
+
+    def pipeline_fast() -> None:
+        last: Dict[int, int] = {}
+        for i, raw in enumerate(stream):
+            ts = parse_ns(raw)
+            prev = last.get(i % n_devices)
+            if prev is not None:
+                round((ts - prev) / NS_PER_S, 1)
+                (ts - prev) / NS_PER_S
+                (ts - prev) / NS_PER_S
+            last[i % n_devices] = ts
+
+    res: Dict[str, float] = {"uplinks": n_uplinks, "devices": n_devices}
+    for name, fn in (("parse_legacy", parse_legacy), ("parse_fast", parse_fast),
+                     ("pipeline_legacy", pipeline_legacy), ("pipeline_fast", pipeline_fast)):
+        best = min(_time(fn) for _ in range(repeat))
+        res[f"{name}_ns"] = round(best / n_uplinks * 1e9, 1)
+    res["parse_speedup"]    = round(res["parse_legacy_ns"] / res["parse_fast_ns"], 2)
+    res["pipeline_speedup"] = round(res["pipeline_legacy_ns"] / res["pipeline_fast_ns"], 2)
+    return res
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--uplinks", type=int, default=200_000)
+    ap.add_argument("--devices", type=int, default=100)
+    ap.add_argument("--repeat", type=int, default=3, help="best of N runs (default 3)")
+    ap.add_argument("--json", action="store_true", help="print results as JSON")
+    args = ap.parse_args()
+
+    r = measure(args.uplinks, args.devices, args.repeat)
+    if args.json:
+        print(json.dumps(r, indent=2))
+        return
+
+    print(f"{r['uplinks']} uplinks from {r['devices']} devices (ns per uplink, best of {args.repeat})")
+    print(f"{'':>10} │ {'legacy':>8} │ {'ttn_time':>8} │ {'speedup':>7}")
+    print(f"{'parse':>10} │ {r['parse_legacy_ns']:>8} │ {r['parse_fast_ns']:>8} │ {r['parse_speedup']:>6}x")
+    print(f"{'+ deltas':>10} │ {r['pipeline_legacy_ns']:>8} │ {r['pipeline_fast_ns']:>8} │ {r['pipeline_speedup']:>6}x")
+
+if __name__ == "__main__":
+    main()
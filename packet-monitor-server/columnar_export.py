@@ -0,0 +1,174 @@
+"""
+Columnar (Parquet) export of window statistics, plus a reader for it.
+
+Windows are written as a hive-partitioned dataset
+
+    <directory>/date=YYYY-MM-DD/part-….parquet
+
+one file per day per flush, holding every device's rows sorted by
+`dev_eui` and `timestamp`.  Columns are typed: the raw window counters are
+stored next to the derived percentages, and `timestamp` is a UTC
+`timestamp[us]`.  Dashboards can then load a time range for many devices
+through `read_windows` and only touch the days they need; no text is
+parsed.  The per-gateway rows of each window live in their own dataset
+under `<directory>/gateways/`, loaded with `read_gateway_windows`.
+
+Requires `pyarrow` (pip install pyarrow).
+"""
+import logging
+import os
+import uuid
+from datetime import date, datetime, timezone
+from typing import Any, Dict, Iterable, List, Optional, Union
+
+try:
+    import pyarrow as pa
+    import pyarrow.dataset as ds
+    import pyarrow.parquet as pq
+except ImportError as e:                # pragma: no cover
+    raise ImportError("Parquet window export needs pyarrow: pip install pyarrow") from e
+
+from window_writer import GATEWAY_SUBDIR, BufferedWindowWriter
+
+COUNT_FIELDS = (
+    "dup_fcnt", "fcnt_gap", "long_delay", "poor_rf", "good_rf",
+    "same_payload", "counter_decrease",
+)
+PCT_FIELDS = (
+    "dup_fcnt_pct", "fcnt_gap_pct", "long_delay_pct", "poor_rf_pct",
+    "good_rf_pct", "same_payload_pct", "counter_dec_pct",
+)
+
+# columns stored inside each file (date lives in the directory name)
+FILE_SCHEMA = pa.schema(
+    [("dev_eui", pa.string()), ("timestamp", pa.timestamp("us", tz="UTC")),
+     ("window_size", pa.int32())]
+    + [(f, pa.int32()) for f in COUNT_FIELDS]
+    + [("total_delay_s", pa.float64()), ("avg_delay_s", pa.float64())]
+    + [(f, pa.float64()) for f in PCT_FIELDS]
+)
+GATEWAY_FILE_SCHEMA = pa.schema([
+    ("dev_eui", pa.string()), ("gateway_id", pa.string()),
+    ("timestamp", pa.timestamp("us", tz="UTC")),
+    ("heard", pa.int32()), ("missed", pa.int32()),
+    ("avg_rssi", pa.float64()), ("avg_snr", pa.float64()),
+    ("lost", pa.bool_()), ("degraded", pa.bool_()),
+])
+PARTITIONING = ds.partitioning(pa.schema([("date", pa.string())]), flavor="hive")
+
+class ParquetWindowWriter(BufferedWindowWriter):
+    # few, larger files: buffer more than the CSV writer does
+    MAX_PENDING    = 5_000
+    FLUSH_INTERVAL = 60.0
+
+    def __init__(
+        self,
+        directory: str,
+        logger: logging.Logger,
+        max_pending: Optional[int] = None,
+        flush_interval: Optional[float] = None,
+        compression: str = "zstd",
+        schema: "pa.Schema" = FILE_SCHEMA,
+    ) -> None:
+        self.compression = compression
+        self.schema      = schema
+        super().__init__(directory, logger.getChild("parquet"), max_pending, flush_interval)
+
+    def path_for(self, dev_eui: str) -> str:
+        # the dataset root: each row lands in the `date=` partition of its
+        # own timestamp, which for replayed traffic is not today
+        return self.directory
+
+    def _write_rows(self, rows_by_device: Dict[str, List[Dict[str, Any]]]) -> None:
+        # one file per day touched by this flush, not one per device: many
+        # tiny files would make every read_windows scan slow
+        days: Dict[str, List[Dict[str, Any]]] = {}
+        for rows in rows_by_device.values():
+            for row in rows:
+                days.setdefault(_day(row), []).append(row)
+
+        name = f"part-{uuid.uuid4().hex}.parquet"
+        for day, rows in days.items():
+            # device rows stay contiguous, so row-group stats can skip them
+            rows.sort(key=lambda r: (r["dev_eui"], r["timestamp"]))
+            folder = os.path.join(self.directory, f"date={day}")
+            os.makedirs(folder, exist_ok=True)
+            table = pa.Table.from_pydict(
+                {f.name: [r[f.name] for r in rows] for f in self.schema},
+                schema=self.schema,
+            )
+            pq.write_table(table, os.path.join(folder, name), compression=self.compression)
+            # written: a failure on a later day must not write these again
+            for dev_eui in list(rows_by_device):
+                left = [r for r in rows_by_device[dev_eui] if _day(r) != day]
+                if left:
+                    rows_by_device[dev_eui] = left
+                else:
+                    del rows_by_device[dev_eui]
+
+def _day(row: Dict[str, Any]) -> str:
+    """`date=` partition of a window row: its UTC day."""
+    return row["timestamp"].astimezone(timezone.utc).date().isoformat()
+
+DateLike = Union[date, datetime, str]
+
+def read_windows(
+    directory: str,
+    start: Optional[DateLike] = None,
+    end: Optional[DateLike] = None,
+    dev_euis: Optional[Iterable[str]] = None,
+    columns: Optional[List[str]] = None,
+) -> "pa.Table":
+    """
+    Load windows with `start <= timestamp < end` for the given devices.
+
+    Bounds may be dates, datetimes (naive = UTC) or ISO strings.  Only the
+    matching `date=` partitions are opened.  Call
+    `.to_pandas()` on the result for a DataFrame.
+    """
+    return _read(directory, start, end, dev_euis, columns)
+
+def read_gateway_windows(
+    directory: str,
+    start: Optional[DateLike] = None,
+    end: Optional[DateLike] = None,
+    dev_euis: Optional[Iterable[str]] = None,
+    columns: Optional[List[str]] = None,
+) -> "pa.Table":
+    """Per-gateway rows of the windows in `directory`, as `read_windows`."""
+    return _read(os.path.join(directory, GATEWAY_SUBDIR), start, end, dev_euis, columns)
+
+def _read(directory, start, end, dev_euis, columns) -> "pa.Table":
+    # the gateway dataset sits below the device one: keep it out of the scan
+    dataset = ds.dataset(directory, format="parquet", partitioning=PARTITIONING,
+                         ignore_prefixes=[".", "_", GATEWAY_SUBDIR])
+
+    flt = None
+    def _and(expr):
+        nonlocal flt
+        flt = expr if flt is None else flt & expr
+
+    if start is not None:
+        lo = _as_utc(start)
+        _and(ds.field("date") >= lo.date().isoformat())
+        _and(ds.field("timestamp") >= pa.scalar(lo, pa.timestamp("us", tz="UTC")))
+    if end is not None:
+        hi = _as_utc(end)
+        _and(ds.field("date") <= hi.date().isoformat())
+        _and(ds.field("timestamp") < pa.scalar(hi, pa.timestamp("us", tz="UTC")))
+    if dev_euis is not None:
+        _and(ds.field("dev_eui").isin(list(dev_euis)))
+
+    table = dataset.to_table(columns=columns, filter=flt)
+    if columns is None or "timestamp" in columns:
+        table = table.sort_by([("timestamp", "ascending")])
+    return table
+
+def _as_utc(value: DateLike) -> datetime:
+    if isinstance(value, str):
+        value = datetime.fromisoformat(value.replace("Z", "+00:00"))
+    if not isinstance(value, datetime):
+        value = datetime(value.year, value.month, value.day)
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return value.astimezone(timezone.utc)
@@ -1,11 +1,20 @@
 """
 Add statistics later by just adding new fields here and updating the analyzer—no changes needed in the server.
 """
-from dataclasses import dataclass, field
+from dataclasses import astuple, dataclass, field
 from datetime import datetime
-from typing import Optional, List
+from typing import Dict, Optional, Tuple
 
-@dataclass
+from gateway_state import GatewayLink
+from jamming_detector import JamState
+from ring_buffer import RingBuffer
+from ttn_time import datetime_ns
+
+FCNT_HISTORY_SIZE = 10          # last FCnts kept for quick inspection
+RF_HISTORY_SIZE   = 100         # RSSI / SNR samples kept for crude averages
+
+# slots: no per-instance __dict__ — we may track a very large number of DevEUIs
+@dataclass(slots=True)
 class WindowStats:          # ➊ new
     msgs:               int = 0
     dup_fcnt:           int = 0
@@ -17,19 +26,59 @@ class WindowStats:          # ➊ new
     same_payload:       int = 0
     counter_decrease:   int = 0
 
-@dataclass
+@dataclass(slots=True)
 class DeviceState:
     dev_eui: str
 
     last_fcnt:  Optional[int]       = None
     last_string: str                = ""
     last_count:  Optional[int]      = None
-    last_time:   Optional[datetime] = None
+    last_time:   Optional[int]      = None    # ns since the epoch (ttn_time)
     last_rssi:   Optional[float]    = None
     last_snr:    Optional[float]    = None
 
-    fcnt_sequence: List[int]        = field(default_factory=list[int])
-    rssi_history:  List[float]      = field(default_factory=list[float])
-    snr_history:   List[float]      = field(default_factory=list[float])
+    # fixed-size histories; RSSI/SNR fit float32 without losing precision
+    fcnt_sequence: RingBuffer       = field(default_factory=lambda: RingBuffer(FCNT_HISTORY_SIZE, "q"))
+    rssi_history:  RingBuffer       = field(default_factory=lambda: RingBuffer(RF_HISTORY_SIZE, "f"))
+    snr_history:   RingBuffer       = field(default_factory=lambda: RingBuffer(RF_HISTORY_SIZE, "f"))
+
+    window: WindowStats             = field(default_factory=WindowStats)
+
+    # gateway id → reception state of that gateway (see gateway_state.py)
+    gateways: Dict[str, GatewayLink] = field(default_factory=dict)
+    uplink_seq: int                 = 0     # fresh uplinks, numbers gateway misses
+
+    # streaming statistics of the jamming detector (see jamming_detector.py)
+    jam: JamState                   = field(default_factory=JamState)
+
+    # monotonic time of the last uplink, for idle eviction (not persisted)
+    last_seen: float                = 0.0
+
+    # ....................................................... persistence
+    # Flat tuples of primitives: far cheaper to (un)pickle than the objects,
+    # which lets a warm start load every record and rebuild states lazily.
+    def to_record(self) -> Tuple:
+        return (
+            self.dev_eui, self.last_fcnt, self.last_string, self.last_count,
+            self.last_time, self.last_rssi, self.last_snr,
+            self.fcnt_sequence.to_record(), self.rssi_history.to_record(),
+            self.snr_history.to_record(), astuple(self.window),
+            self.uplink_seq, tuple(g.to_record() for g in self.gateways.values()),
+            self.jam.to_record(),
+        )
 
-    window: WindowStats             = field(default_factory=WindowStats)
\ No newline at end of file
+    @classmethod
+    def from_record(cls, rec: Tuple) -> "DeviceState":
+        (dev_eui, last_fcnt, last_string, last_count, last_time, last_rssi,
+         last_snr, fcnt_seq, rssi_hist, snr_hist, window) = rec[:11]
+        # older records stop after the window or after the gateways
+        uplink_seq, links = rec[11:13] or (0, ())
+        jam = JamState.from_record(rec[13]) if len(rec) > 13 else JamState()
+        if isinstance(last_time, datetime):     # records saved before ns times
+            last_time = datetime_ns(last_time)
+        return cls(
+            dev_eui, last_fcnt, last_string, last_count, last_time, last_rssi, last_snr,
+            RingBuffer.from_record(fcnt_seq), RingBuffer.from_record(rssi_hist),
+            RingBuffer.from_record(snr_hist), WindowStats(*window),
+            {l[0]: GatewayLink.from_record(l) for l in links}, uplink_seq, jam,
+        )
@@ -0,0 +1,181 @@
+"""
+Per-(device, gateway) reception state and cross-gateway checks.
+
+TTN lists every gateway that heard an uplink in `rx_metadata`.  Reactive
+jamming is local, so the tell-tale sign is one gateway losing a device, or
+hearing it far worse than usual, while another gateway still hears it fine.
+
+Each `DeviceState.gateways` maps gateway id → `GatewayLink`; together they
+form the sparse device × gateway matrix.  Links are slots objects updated in
+place, so an uplink costs one dict lookup per listed gateway plus one pass
+over the device's links — nothing is allocated unless a gateway is new or
+an alert fires.
+"""
+from dataclasses import astuple, dataclass
+from typing import TYPE_CHECKING, Any, Dict, List, Optional, Tuple
+
+from alerts import Alert, AlertCode
+
+if TYPE_CHECKING:                       # pragma: no cover
+    from device_state import DeviceState
+
+# one shared str per gateway id instead of one per device that hears it
+_GATEWAY_IDS: Dict[str, str] = {}
+
+def _intern(gateway_id: str) -> str:
+    return _GATEWAY_IDS.setdefault(gateway_id, gateway_id)
+
+@dataclass(slots=True)
+class GatewayLink:
+    gateway_id: str
+
+    heard:      int   = 0           # uplinks heard in total
+    last_seq:   int   = 0           # device uplink number last heard
+    missed_run: int   = 0           # device uplinks missed in a row
+    last_rssi:  float = 0.0
+    last_snr:   float = 0.0
+
+    # fast EWMA tracks the current level, slow EWMA the link's normal one
+    rssi_fast: Optional[float] = None
+    rssi_base: Optional[float] = None
+    snr_fast:  Optional[float] = None
+    snr_base:  Optional[float] = None
+
+    lost:     bool = False
+    degraded: bool = False
+
+    # counters of the device's current window
+    w_heard:    int   = 0
+    w_missed:   int   = 0
+    w_rf:       int   = 0           # … of which with RSSI / SNR
+    w_rssi_sum: float = 0.0
+    w_snr_sum:  float = 0.0
+
+    def window_stats(self) -> Dict[str, Any]:
+        n = self.w_rf
+        return {
+            "gateway_id": self.gateway_id,
+            "heard":      self.w_heard,
+            "missed":     self.w_missed,
+            "avg_rssi":   round(self.w_rssi_sum / n, 1) if n else None,
+            "avg_snr":    round(self.w_snr_sum / n, 1) if n else None,
+            "lost":       self.lost,
+            "degraded":   self.degraded,
+        }
+
+    def reset_window(self) -> None:
+        self.w_heard = self.w_missed = self.w_rf = 0
+        self.w_rssi_sum = self.w_snr_sum = 0.0
+
+    def to_record(self) -> Tuple:
+        return astuple(self)
+
+    @classmethod
+    def from_record(cls, rec: Tuple) -> "GatewayLink":
+        link = cls(*rec)
+        link.gateway_id = _intern(link.gateway_id)
+        return link
+
+class GatewayTracker:
+    # ── tune these to taste ────────────────────────────────────────────────
+    LOST_AFTER     = 3          # uplinks missed in a row → gateway lost
+    FORGET_AFTER   = 1_000      # … → link dropped altogether
+    RSSI_DROP_DB   = 10.0       # below the link's baseline → degraded
+    SNR_DROP_DB    = 6.0
+    WARMUP         = 10         # uplinks heard before the baseline counts
+    FAST_ALPHA     = 0.3
+    BASE_ALPHA     = 0.02
+    # ───────────────────────────────────────────────────────────────────────
+
+    def observe(self, s: "DeviceState", rx_metadata: List[Dict[str, Any]],
+                fresh: bool) -> List[Alert]:
+        """
+        Fold one uplink's gateway list into the device's links.  `fresh` is
+        False for a repeated FCnt: RF still counts, but gateways that did
+        not hear the repeat are not charged with a miss.
+        """
+        a: List[Alert] = []
+        links = s.gateways
+        if fresh:
+            s.uplink_seq += 1
+        seq = s.uplink_seq
+
+        fa, ba = self.FAST_ALPHA, self.BASE_ALPHA
+        for meta in rx_metadata:
+            gw = (meta.get("gateway_ids") or {}).get("gateway_id")
+            if gw is None:
+                continue
+            link = links.get(gw)
+            if link is None:
+                link = links[gw] = GatewayLink(_intern(gw))
+
+            link.heard     += 1
+            link.w_heard   += 1
+            link.last_seq   = seq
+            link.missed_run = 0
+            if link.lost:
+                link.lost = False
+                a.append(Alert(AlertCode.GATEWAY_RECOVERED, {"gateway": link.gateway_id}))
+
+            rssi, snr = meta.get("rssi"), meta.get("snr")
+            if rssi is None or snr is None:
+                continue
+            link.last_rssi, link.last_snr = rssi, snr
+            link.w_rf       += 1
+            link.w_rssi_sum += rssi
+            link.w_snr_sum  += snr
+            if link.rssi_fast is None:
+                link.rssi_fast = link.rssi_base = rssi
+                link.snr_fast  = link.snr_base  = snr
+            else:
+                link.rssi_fast += fa * (rssi - link.rssi_fast)
+                link.snr_fast  += fa * (snr - link.snr_fast)
+                if not link.degraded:       # don't learn the jammed level
+                    link.rssi_base += ba * (rssi - link.rssi_base)
+                    link.snr_base  += ba * (snr - link.snr_base)
+
+        if len(links) < 2:
+            return a                        # nothing to compare against
+
+        # gateways that heard this uplink at their usual level
+        healthy = 0
+        for link in links.values():
+            if link.last_seq == seq and not link.degraded:
+                healthy += 1
+
+        forget = None
+        for link in links.values():
+            if link.last_seq != seq:
+                if not fresh:
+                    continue
+                link.missed_run += 1
+                link.w_missed   += 1
+                if not link.lost and link.missed_run >= self.LOST_AFTER and healthy:
+                    link.lost = True
+                    a.append(Alert(AlertCode.GATEWAY_LOST,
+                                   {"gateway": link.gateway_id, "missed": link.missed_run}))
+                if link.missed_run >= self.FORGET_AFTER:
+                    forget = forget or []
+                    forget.append(link.gateway_id)
+                continue
+
+            if link.heard < self.WARMUP or link.rssi_fast is None:
+                continue
+            rssi_drop = link.rssi_base - link.rssi_fast
+            snr_drop  = link.snr_base - link.snr_fast
+            if not link.degraded:
+                others_ok = healthy - 1
+                if others_ok > 0 and (rssi_drop >= self.RSSI_DROP_DB or snr_drop >= self.SNR_DROP_DB):
+                    link.degraded = True
+                    a.append(Alert(AlertCode.GATEWAY_DEGRADED, {
+                        "gateway": link.gateway_id,
+                        "rssi_drop": round(rssi_drop, 1), "snr_drop": round(snr_drop, 1),
+                    }))
+            elif rssi_drop < self.RSSI_DROP_DB / 2 and snr_drop < self.SNR_DROP_DB / 2:
+                link.degraded = False
+                a.append(Alert(AlertCode.GATEWAY_RESTORED, {"gateway": link.gateway_id}))
+
+        if forget:
+            for gw in forget:
+                del links[gw]
+        return a
@@ -0,0 +1,190 @@
+"""
+Streaming jamming detection per device.
+
+Every statistic is an exponentially weighted one, updated in O(1) per
+uplink from the previous value — history is never rescanned:
+
+  • FCnt loss   – frames lost / frames expected (from FCnt gaps)
+  • timing      – mean and variance of the per-frame inter-arrival time
+  • RF drift    – fast vs. baseline RSSI / SNR of the primary gateway
+
+Three one-sided CUSUMs watch for a sustained change: lost frames above the
+baseline loss rate, SNR below its baseline, and inter-arrival times above
+their usual spread.  When one of them crosses its threshold the device
+enters the *jamming suspected* state; the onset is taken from when that
+CUSUM started to rise, not from when it crossed.  The state clears once
+every CUSUM has been calm (near zero) for `CLEAR_AFTER` uplinks; CUSUMs are
+capped a little above their threshold so a long attack does not take
+equally long to clear.
+Baselines are frozen while any CUSUM is elevated, so they do not learn
+the attack as "normal".
+"""
+from dataclasses import asdict, astuple, dataclass
+from math import sqrt
+from typing import TYPE_CHECKING, Any, Dict, List, Optional, Tuple
+
+from alerts import Alert, AlertCode
+from ttn_time import NS_PER_S, format_ns
+
+if TYPE_CHECKING:                       # pragma: no cover
+    from device_state import DeviceState
+
+@dataclass(slots=True)
+class JamState:
+    n: int = 0                      # fresh uplinks folded in
+
+    # exponentially weighted statistics
+    lost_avg:  float = 0.0          # frames lost …
+    sent_avg:  float = 0.0          # … and expected per uplink
+    dt_mean:   Optional[float] = None   # s per frame
+    dt_var:    float = 0.0
+    rssi_fast: Optional[float] = None
+    rssi_base: Optional[float] = None
+    snr_fast:  Optional[float] = None
+    snr_base:  Optional[float] = None
+
+    # one-sided CUSUMs and when the current rise began (ns)
+    cusum_loss: float = 0.0
+    cusum_snr:  float = 0.0
+    cusum_dt:   float = 0.0
+    rise_ns:    Optional[int] = None
+
+    suspected:  bool = False
+    onset_ns:   Optional[int] = None
+    cleared_ns: Optional[int] = None
+    quiet:      int = 0             # calm uplinks in a row
+    episodes:   int = 0
+
+    def to_record(self) -> Tuple:
+        return astuple(self)
+
+    @classmethod
+    def from_record(cls, rec: Tuple) -> "JamState":
+        return cls(*rec)
+
+class JammingDetector:
+    # ── tune these to taste ────────────────────────────────────────────────
+    ALPHA       = 0.05          # weight of the newest sample in the EWMAs
+    FAST_ALPHA  = 0.3           # … of the fast RF average
+    LOSS_ALPHA  = 0.01          # … of the loss baseline (one gap moves it a lot)
+    WARMUP      = 20            # uplinks before baselines are trusted
+    MAX_GAP     = 1_000         # larger FCnt jumps are resets, not loss
+
+    LOSS_K, LOSS_H = 0.1, 5.0   # allowance over baseline loss / threshold (frames)
+    SNR_K,  SNR_H  = 2.0, 20.0  # dB below baseline / threshold (dB · uplinks)
+    DT_K,   DT_H   = 1.0, 8.0   # σ above the mean interval / threshold (σ · uplinks)
+
+    CUSUM_CAP   = 1.5           # × threshold: bounds how long clearing takes
+    CALM        = 0.25          # × threshold: CUSUM counts as calm below this
+    CLEAR_AFTER = 5             # calm uplinks in a row before the state clears
+    # ───────────────────────────────────────────────────────────────────────
+
+    def observe(self, s: "DeviceState", fcnt: Any, ts: int,
+                rssi: float, snr: float) -> List[Alert]:
+        """Update `s.jam` with one uplink (call before `s` moves on to it)."""
+        j = s.jam
+        last_fcnt, last_ts = s.last_fcnt, s.last_time
+        if not isinstance(fcnt, int) or fcnt == last_fcnt:
+            return []                   # invalid or repeated: nothing new
+        j.n += 1
+        warm = j.n > self.WARMUP
+        # baselines only learn from calm traffic, never from a rising CUSUM
+        learn = not j.suspected and (j.quiet > 0 or not warm)
+        alpha = self.ALPHA
+
+        # ----- FCnt loss ------------------------------------------------
+        gap = fcnt - last_fcnt if last_fcnt is not None else 0
+        if 0 < gap <= self.MAX_GAP:
+            lost = gap - 1
+            if warm and j.sent_avg:
+                # per-frame Bernoulli CUSUM: +1 per lost frame, −(p0 + k) per frame
+                p0 = j.lost_avg / j.sent_avg
+                j.cusum_loss = min(self.CUSUM_CAP * self.LOSS_H,
+                                   max(0.0, j.cusum_loss + lost - gap * (p0 + self.LOSS_K)))
+                if j.cusum_loss > 0 and j.rise_ns is None:
+                    j.rise_ns = last_ts     # frames went missing after this one
+            if learn:
+                la = self.LOSS_ALPHA
+                j.lost_avg += la * (lost - j.lost_avg)
+                j.sent_avg += la * (gap - j.sent_avg)
+
+            # ----- inter-arrival time, per expected frame ---------------
+            if last_ts is not None and ts > last_ts:
+                dt = (ts - last_ts) / NS_PER_S / gap
+                if j.dt_mean is None:
+                    j.dt_mean = dt
+                else:
+                    if warm and j.dt_var > 0:
+                        z = (dt - j.dt_mean) / sqrt(j.dt_var)
+                        j.cusum_dt = min(self.CUSUM_CAP * self.DT_H,
+                                         max(0.0, j.cusum_dt + z - self.DT_K))
+                    if learn:
+                        d = dt - j.dt_mean
+                        inc = alpha * d
+                        j.dt_mean += inc
+                        j.dt_var = (1 - alpha) * (j.dt_var + d * inc)
+
+        # ----- RF drift ---------------------------------------------------
+        if rssi != -999 and snr != -999:
+            if j.rssi_fast is None:
+                j.rssi_fast = j.rssi_base = rssi
+                j.snr_fast  = j.snr_base  = snr
+            else:
+                fa = self.FAST_ALPHA
+                j.rssi_fast += fa * (rssi - j.rssi_fast)
+                j.snr_fast  += fa * (snr - j.snr_fast)
+                if warm:
+                    j.cusum_snr = min(self.CUSUM_CAP * self.SNR_H,
+                                      max(0.0, j.cusum_snr + (j.snr_base - snr) - self.SNR_K))
+                if learn:
+                    j.rssi_base += alpha * (rssi - j.rssi_base)
+                    j.snr_base  += alpha * (snr - j.snr_base)
+
+        if j.cusum_loss == 0 and j.cusum_snr == 0 and j.cusum_dt == 0:
+            j.rise_ns = None
+        elif j.rise_ns is None:
+            j.rise_ns = ts
+        c = self.CALM
+        if (j.cusum_loss <= c * self.LOSS_H and j.cusum_snr <= c * self.SNR_H
+                and j.cusum_dt <= c * self.DT_H):
+            j.quiet += 1
+        else:
+            j.quiet = 0
+
+        # ----- state changes ------------------------------------------------
+        if not j.suspected:
+            if not warm:
+                return []
+            if (j.cusum_loss > self.LOSS_H or j.cusum_snr > self.SNR_H
+                    or j.cusum_dt > self.DT_H):
+                j.suspected  = True
+                j.onset_ns   = j.rise_ns if j.rise_ns is not None else ts
+                j.cleared_ns = None
+                j.episodes  += 1
+                return [Alert(AlertCode.JAMMING_SUSPECTED, {
+                    "onset":      format_ns(j.onset_ns),
+                    "cusum_loss": round(j.cusum_loss, 1),
+                    "cusum_snr":  round(j.cusum_snr, 1),
+                    "cusum_dt":   round(j.cusum_dt, 1),
+                })]
+        elif j.quiet >= self.CLEAR_AFTER:
+            j.suspected  = False
+            j.cleared_ns = ts
+            return [Alert(AlertCode.JAMMING_CLEARED, {
+                "onset":      format_ns(j.onset_ns),
+                "cleared":    format_ns(ts),
+                "duration_s": round((ts - j.onset_ns) / NS_PER_S, 1),
+            })]
+        return []
+
+    @staticmethod
+    def summary(j: JamState) -> Dict[str, Any]:
+        """JSON-friendly view of one device's detector state."""
+        out = asdict(j)
+        out["loss_rate"] = round(j.lost_avg / j.sent_avg, 4) if j.sent_avg else 0.0
+        out["onset"]   = format_ns(j.onset_ns) if j.onset_ns is not None else None
+        out["cleared"] = format_ns(j.cleared_ns) if j.cleared_ns is not None else None
+        out["dt_std"]  = round(sqrt(j.dt_var), 3)
+        for k in ("onset_ns", "cleared_ns", "rise_ns", "dt_var", "lost_avg", "sent_avg"):
+            del out[k]
+        return out
@@ -0,0 +1,126 @@
+"""
+Logging set-up for the monitor server.
+
+On top of a plain stream handler this adds, optionally:
+  • queue mode      – loggers only enqueue records; one listener thread
+                      formats and writes them, so slow log I/O no longer
+                      stalls the request / ingest threads
+  • RateLimitFilter – at most `burst` lines per (DevEUI, alert type) every
+                      `interval` seconds; the excess is dropped (or 1-in-N
+                      sampled) and the count is reported on the next line
+                      that gets through
+
+Records are keyed by the `dev_eui` / `alert` attributes the analyzer passes
+in `extra=`; records without them are never limited.
+"""
+import atexit
+import logging
+import os
+import queue
+from logging.handlers import QueueHandler, QueueListener
+from time import monotonic
+from typing import Dict, List, Optional, Tuple
+
+_listener: Optional[QueueListener] = None
+
+class RateLimitFilter(logging.Filter):
+    MAX_KEYS = 100_000          # forget expired keys beyond this many
+
+    def __init__(self, burst: int, interval: float, sample: int = 0) -> None:
+        """`sample=N` lets every N-th record past the budget through anyway."""
+        super().__init__()
+        self.burst    = max(1, burst)
+        self.interval = interval
+        self.sample   = sample
+        # key → [window start, passed, over budget, dropped]; updates are not
+        # locked, so counts are approximate when threads share a device
+        self._keys: Dict[Tuple, List] = {}
+        self.dropped  = 0
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        dev_eui = getattr(record, "dev_eui", None)
+        if dev_eui is None:
+            return True
+        key = (dev_eui, getattr(record, "alert", None))
+        now = monotonic()
+
+        k = self._keys.get(key)
+        if k is None or now - k[0] >= self.interval:
+            if k is None and len(self._keys) >= self.MAX_KEYS:
+                self._expire(now)
+            self._keys[key] = [now, 1, 0, 0]
+            if k is not None and k[3]:
+                record.msg = f"{record.msg} (+{k[3]} suppressed)"
+            return True
+        if k[1] < self.burst:
+            k[1] += 1
+            return True
+
+        k[2] += 1
+        if self.sample and k[2] % self.sample == 0:
+            return True
+        k[3] += 1
+        self.dropped += 1
+        return False
+
+    def _expire(self, now: float) -> None:
+        for key in [key for key, k in self._keys.items() if now - k[0] >= self.interval]:
+            del self._keys[key]
+        if len(self._keys) >= self.MAX_KEYS:
+            self._keys.clear()
+
+def parse_rate(spec: str) -> Tuple[int, float]:
+    """"5/60" → (5, 60.0): five lines per key every 60 s."""
+    burst, _, interval = spec.partition("/")
+    return int(burst), float(interval or 1)
+
+def configure_logging(
+    level: int,
+    fmt: str,
+    use_queue: bool = False,
+    rate_limit: Optional[Tuple[int, float]] = None,
+    sample: int = 0,
+) -> None:
+    """Replace the root handlers with one stream handler (behind a queue if asked)."""
+    global _listener
+    stop()
+
+    stream = logging.StreamHandler()
+    stream.setFormatter(logging.Formatter(fmt))
+    handler: logging.Handler = stream
+    if use_queue:
+        q: "queue.SimpleQueue" = queue.SimpleQueue()
+        handler   = QueueHandler(q)
+        _listener = QueueListener(q, stream, respect_handler_level=True)
+        _listener.start()
+    if rate_limit is not None:
+        # filter before enqueueing so dropped records cost next to nothing
+        handler.addFilter(RateLimitFilter(*rate_limit, sample=sample))
+
+    root = logging.getLogger()
+    root.handlers[:] = [handler]
+    root.setLevel(level)
+
+def stop() -> None:
+    """Drain the queue and stop the listener thread (no-op without queue mode)."""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+
+def _after_fork_in_child() -> None:
+    # the listener thread did not survive fork(): give the child its own
+    # queue and listener so its records are not piled up unread
+    global _listener
+    if _listener is None:
+        return
+    q: "queue.SimpleQueue" = queue.SimpleQueue()
+    for h in logging.getLogger().handlers:
+        if isinstance(h, QueueHandler):
+            h.queue = q
+    _listener = QueueListener(q, *_listener.handlers, respect_handler_level=True)
+    _listener.start()
+
+atexit.register(stop)
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_after_fork_in_child)
@@ -0,0 +1,188 @@
+"""
+Minimal Prometheus-style metrics for the monitor server.
+
+Counters, gauges and histograms live in one process-wide `REGISTRY` and are
+rendered in the Prometheus text format by `/metrics`.  Shard processes keep
+their own registry; the front end merges their `snapshot()`s when rendering.
+
+Instrumentation is meant to stay on the hot path, so it is cheap: one
+uncontended lock per metric around each update (request threads and the
+ingest loop update the same series, and `+=` on a dict entry is not
+atomic), no label objects.  Set `MONITOR_METRICS=0` to switch it off
+entirely — callers check `ENABLED` and skip even the clock reads.
+"""
+import abc
+import math
+import os
+import threading
+from bisect import bisect_left
+from time import perf_counter_ns
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+ENABLED = os.environ.get("MONITOR_METRICS", "1") != "0"
+
+# seconds; spans sub-µs analyzer stages up to slow HTTP requests
+DEFAULT_BUCKETS = (
+    1e-6, 5e-6, 1e-5, 5e-5, 1e-4, 5e-4, 1e-3, 5e-3, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0,
+)
+
+Labels = Tuple[str, ...]
+
+class _Metric(abc.ABC):
+    kind = ""
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = ()) -> None:
+        self.name       = name
+        self.help       = help
+        self.labelnames = tuple(labelnames)
+        self._lock      = threading.Lock()
+
+    @abc.abstractmethod
+    def snapshot(self) -> Dict[Labels, Any]:
+        """Copy of every series, safe to read while updates continue."""
+
+class _Scalar(_Metric):
+    """One number per label set, either updated in place or read from `fn`
+    at scrape time (for values another object already keeps)."""
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = (),
+                 fn: Optional[Callable[[], Any]] = None) -> None:
+        super().__init__(name, help, labelnames)
+        self._values: Dict[Labels, float] = {}
+        self._fn = fn
+
+    def snapshot(self) -> Dict[Labels, Any]:
+        if self._fn is None:
+            with self._lock:
+                return dict(self._values)
+        value = self._fn()
+        if isinstance(value, dict):     # {label value: number}
+            return {(str(k),): v for k, v in value.items()}
+        return {(): value}
+
+class Counter(_Scalar):
+    kind = "counter"
+
+    def inc(self, amount: float = 1, *labels: str) -> None:
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+class Gauge(_Scalar):
+    kind = "gauge"
+
+    def set(self, value: float, *labels: str) -> None:
+        with self._lock:
+            self._values[labels] = value
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = (),
+                 buckets: Sequence[float] = DEFAULT_BUCKETS) -> None:
+        super().__init__(name, help, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # per label set: [count per bucket (+Inf last), sum]
+        self._series: Dict[Labels, List[Any]] = {}
+
+    def observe(self, value: float, *labels: str) -> None:
+        bucket = bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                series = self._series[labels] = [[0] * (len(self.buckets) + 1), 0.0]
+            series[0][bucket] += 1
+            series[1] += value
+
+    def observe_ns(self, start_ns: int, *labels: str) -> int:
+        """Observe the time since `start_ns` (perf_counter_ns); return now."""
+        now = perf_counter_ns()
+        self.observe((now - start_ns) / 1e9, *labels)
+        return now
+
+    def snapshot(self) -> Dict[Labels, Any]:
+        with self._lock:
+            return {k: (list(v[0]), v[1]) for k, v in self._series.items()}
+
+class Registry:
+    def __init__(self) -> None:
+        self._metrics: Dict[str, _Metric] = {}
+
+    def register(self, metric: _Metric) -> Any:
+        self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name: str, help: str, labelnames: Sequence[str] = (),
+                fn: Optional[Callable[[], Any]] = None) -> Counter:
+        return self.register(Counter(name, help, labelnames, fn))
+
+    def gauge(self, name: str, help: str, labelnames: Sequence[str] = (),
+              fn: Optional[Callable[[], Any]] = None) -> Gauge:
+        return self.register(Gauge(name, help, labelnames, fn))
+
+    def histogram(self, name: str, help: str, labelnames: Sequence[str] = (),
+                  buckets: Sequence[float] = DEFAULT_BUCKETS) -> Histogram:
+        return self.register(Histogram(name, help, labelnames, buckets))
+
+    def snapshot(self) -> Dict[str, Dict[Labels, Any]]:
+        """Plain, picklable copy of every series (for shard → front end)."""
+        return {name: m.snapshot() for name, m in list(self._metrics.items())}
+
+    def render(self, extra: Iterable[Dict[str, Dict[Labels, Any]]] = ()) -> str:
+        """Prometheus text exposition, with `extra` snapshots summed in."""
+        merged = merge_snapshots([self.snapshot(), *extra])
+        out: List[str] = []
+        for name, m in list(self._metrics.items()):
+            out.append(f"# HELP {name} {m.help}")
+            out.append(f"# TYPE {name} {m.kind}")
+            for labels, value in sorted(merged.get(name, {}).items()):
+                lbl = _fmt_labels(m.labelnames, labels)
+                if isinstance(m, Histogram):
+                    counts, total = value
+                    cum = 0
+                    for bound, c in zip(m.buckets + (math.inf,), counts):
+                        cum += c
+                        le = "+Inf" if bound == math.inf else repr(bound)
+                        out.append(f"{name}_bucket{_fmt_labels(m.labelnames + ('le',), labels + (le,))} {cum}")
+                    out.append(f"{name}_sum{lbl} {total}")
+                    out.append(f"{name}_count{lbl} {cum}")
+                else:
+                    out.append(f"{name}{lbl} {value}")
+        return "\n".join(out) + "\n"
+
+def merge_snapshots(snapshots: Iterable[Dict[str, Dict[Labels, Any]]]) -> Dict[str, Dict[Labels, Any]]:
+    """Sum several `Registry.snapshot()`s series by series."""
+    merged: Dict[str, Dict[Labels, Any]] = {}
+    for snap in snapshots:
+        for name, series in snap.items():
+            into = merged.setdefault(name, {})
+            for labels, value in series.items():
+                into[labels] = _add(into.get(labels), value)
+    return merged
+
+def _add(a: Any, b: Any) -> Any:
+    if a is None:
+        return b
+    if isinstance(a, tuple):            # histogram (counts, sum)
+        return [x + y for x, y in zip(a[0], b[0])], a[1] + b[1]
+    return a + b
+
+def _fmt_labels(names: Sequence[str], values: Sequence[str]) -> str:
+    if not names:
+        return ""
+    pairs = ",".join(f'{k}="{_escape(v)}"' for k, v in zip(names, values))
+    return "{" + pairs + "}"
+
+def _escape(v: Any) -> str:
+    return str(v).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+# ── process-wide registry and the metrics the analyzer updates ─────────────────
+REGISTRY = Registry()
+
+UPLINKS = REGISTRY.counter(
+    "monitor_uplinks_total", "Uplinks analysed", ("path",))
+ALERTS = REGISTRY.counter(
+    "monitor_alerts_total", "Alerts raised, by alert code", ("code",))
+STAGE_SECONDS = REGISTRY.histogram(
+    "monitor_stage_seconds", "Time spent per analyzer stage", ("stage",))
+WINDOWS = REGISTRY.counter(
+    "monitor_windows_exported_total", "Window statistics rows exported")
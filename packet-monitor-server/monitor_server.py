@@ -1,20 +1,128 @@
 """
 Flask server for monitoring LoRaWAN uplinks.
 """
+import atexit
+import json
 import logging
-from flask import Flask, request, jsonify
+import os
+from time import perf_counter_ns
+from flask import Flask, Response, g, request, jsonify
+import log_setup
+import metrics
+from async_ingest import AsyncIngestor, IngestorStopped
+from sharded_analyzer import ShardedAnalyzer
 from uplink_analyzer import UplinkAnalyzer
 
 # ── basic, consistent logging ──────────────────────────────────────────────────
-logging.basicConfig(
-    level=logging.INFO,
-    format="%(asctime)s │ %(levelname)-8s │ %(name)s │ %(message)s",
-)
+LOG_FORMAT = "%(asctime)s │ %(levelname)-8s │ %(name)s │ %(message)s"
+# LOG_MODE=queue   → write log records from a background thread
+# LOG_DETAIL=window → one summary line per window instead of per uplink
+# LOG_RATE=N/S     → at most N lines per device and alert type every S seconds
+# LOG_SAMPLE=K     → …but still let every K-th suppressed line through
+LOG_MODE   = os.environ.get("LOG_MODE", "sync").lower()
+LOG_DETAIL = os.environ.get("LOG_DETAIL", "message").lower()
+LOG_RATE   = log_setup.parse_rate(os.environ["LOG_RATE"]) if os.environ.get("LOG_RATE") else None
+LOG_SAMPLE = int(os.environ.get("LOG_SAMPLE", "0"))
+log_setup.configure_logging(logging.INFO, LOG_FORMAT, use_queue=LOG_MODE == "queue",
+                            rate_limit=LOG_RATE, sample=LOG_SAMPLE)
 logger = logging.getLogger("monitor_server")
 
+# ── ingestion mode ─────────────────────────────────────────────────────────────
+# INGEST_MODE=sync  → analyse inside the request (default, returns alerts)
+# INGEST_MODE=async → ack with 202 and analyse on a background queue
+INGEST_MODE    = os.environ.get("INGEST_MODE", "sync").lower()
+INGEST_WORKERS = int(os.environ.get("INGEST_WORKERS", AsyncIngestor.WORKERS))
+INGEST_QUEUE   = int(os.environ.get("INGEST_QUEUE", AsyncIngestor.MAX_QUEUE))
+RETRY_AFTER_S  = 1
+
+# WINDOW_EXPORT=csv|parquet → backend for the per-window statistics
+# WINDOW_MAX_PENDING / WINDOW_FLUSH_S → rows / seconds buffered before a
+#   flush, i.e. at most what a crash can lose (backend defaults if unset)
+WINDOW_EXPORT      = os.environ.get("WINDOW_EXPORT", "csv").lower()
+WINDOW_MAX_PENDING = int(os.environ["WINDOW_MAX_PENDING"]) if os.environ.get("WINDOW_MAX_PENDING") else None
+WINDOW_FLUSH_S     = float(os.environ["WINDOW_FLUSH_S"]) if os.environ.get("WINDOW_FLUSH_S") else None
+
+# STATE_DIR=<path> → snapshot device state there and warm-start from it
+STATE_DIR = os.environ.get("STATE_DIR") or None
+
+# MAX_DEVICES / DEVICE_IDLE_TTL (s) → bound the number of tracked devices
+MAX_DEVICES     = int(os.environ["MAX_DEVICES"]) if os.environ.get("MAX_DEVICES") else None
+DEVICE_IDLE_TTL = float(os.environ["DEVICE_IDLE_TTL"]) if os.environ.get("DEVICE_IDLE_TTL") else None
+
+# MONITOR_METRICS=0 → no instrumentation at all (read by metrics.py itself)
+
+# ANALYZER_SHARDS=N (N > 1) → analyse in N processes, partitioned by DevEUI
+ANALYZER_SHARDS = int(os.environ.get("ANALYZER_SHARDS", "1"))
+
+# PORT=<n> → where the HTTP server listens
+PORT = int(os.environ.get("PORT", "5000"))
+
 # ── flask app ------------------------------------------------------------------
 app = Flask(__name__)
-analyzer = UplinkAnalyzer(logger)
+
+if ANALYZER_SHARDS > 1:
+    # start the shard processes before any other thread exists
+    analyzer = ShardedAnalyzer(logger, shards=ANALYZER_SHARDS, log_format=LOG_FORMAT,
+                               export=WINDOW_EXPORT, state_dir=STATE_DIR,
+                               max_devices=MAX_DEVICES, idle_ttl=DEVICE_IDLE_TTL,
+                               log_mode=LOG_DETAIL, window_max_pending=WINDOW_MAX_PENDING,
+                               window_flush_interval=WINDOW_FLUSH_S)
+    atexit.register(analyzer.close)
+else:
+    analyzer = UplinkAnalyzer(logger, export=WINDOW_EXPORT, state_dir=STATE_DIR,
+                              max_devices=MAX_DEVICES, idle_ttl=DEVICE_IDLE_TTL,
+                              log_mode=LOG_DETAIL, window_max_pending=WINDOW_MAX_PENDING,
+                              window_flush_interval=WINDOW_FLUSH_S)
+    atexit.register(analyzer.close)        # final snapshot + buffered rows
+
+ingestor = None
+if INGEST_MODE == "async":
+    ingestor = AsyncIngestor(analyzer, logger, workers=INGEST_WORKERS, max_queue=INGEST_QUEUE,
+                             offload=ANALYZER_SHARDS > 1)
+    ingestor.start()
+    atexit.register(ingestor.stop)
+
+# ── metrics ────────────────────────────────────────────────────────────────────
+HTTP_SECONDS = metrics.REGISTRY.histogram(
+    "monitor_http_request_seconds", "Request handling time per endpoint", ("endpoint",))
+metrics.REGISTRY.gauge(
+    "monitor_devices", "Devices currently tracked", fn=analyzer.device_count)
+metrics.REGISTRY.gauge(
+    "monitor_jamming_suspected", "Devices currently suspected of being jammed",
+    fn=lambda: len(analyzer.jamming_suspects()))
+metrics.REGISTRY.counter(
+    "monitor_evictions_total", "Devices evicted, by reason", ("reason",),
+    fn=lambda: {k: v for k, v in analyzer.eviction_stats().items() if k != "devices"})
+if ingestor is not None:
+    metrics.REGISTRY.gauge(
+        "monitor_ingest_queue_depth", "Uplinks queued for analysis", fn=lambda: ingestor.depth)
+    metrics.REGISTRY.counter(
+        "monitor_ingest_rejected_total", "Uplinks refused with a full queue",
+        fn=lambda: ingestor.rejected)
+    metrics.REGISTRY.counter(
+        "monitor_ingest_failed_total", "Queued uplinks whose analysis raised",
+        fn=lambda: ingestor.failed)
+
+if metrics.ENABLED:
+    @app.before_request
+    def _start_timer():
+        g.started_ns = perf_counter_ns()
+
+    @app.after_request
+    def _observe_request(response):
+        if "started_ns" in g:
+            HTTP_SECONDS.observe_ns(g.started_ns, request.endpoint or "unknown")
+        return response
+
+def _enqueue(submit, payload):
+    """Hand work to the ingestor and map a full queue onto 429 / 503."""
+    try:
+        accepted = submit(payload)
+    except IngestorStopped:
+        return jsonify({"error": "Ingestion is shutting down"}), 503, {"Retry-After": str(RETRY_AFTER_S)}
+    if not accepted:
+        return jsonify({"error": "Ingest queue full"}), 429, {"Retry-After": str(RETRY_AFTER_S)}
+    return jsonify({"status": "queued", "queue_depth": ingestor.depth}), 202
 
 @app.route("/uplink", methods=["POST"])
 def uplink():
@@ -23,6 +131,9 @@ def uplink():
     if not data:
         return jsonify({"error": "No JSON data received"}), 400
 
+    if ingestor is not None:
+        return _enqueue(ingestor.submit, data)
+
     try:
         result = analyzer.analyze_uplink(data)
         return jsonify(result)
@@ -30,12 +141,85 @@ def uplink():
         logger.exception("Unexpected error while processing /uplink")
         return jsonify({"error": "Internal server error"}), 500
 
+@app.route("/uplinks/batch", methods=["POST"])
+def uplinks_batch():
+    """
+    Handle a burst of uplinks in one request.  The body is either a JSON
+    array of web-hook objects or NDJSON (one object per line).
+    """
+    body = request.get_data(as_text=True)
+    try:
+        messages = _parse_batch(body)
+    except ValueError as e:
+        return jsonify({"error": f"Malformed batch: {e}"}), 400
+    if not messages:
+        return jsonify({"error": "No uplinks received"}), 400
+
+    if ingestor is not None:
+        return _enqueue(ingestor.submit_batch, messages)
+
+    try:
+        results = analyzer.analyze_batch(messages)
+        return jsonify({"status": "ok", "count": len(results), "results": results})
+    except Exception:
+        logger.exception("Unexpected error while processing /uplinks/batch")
+        return jsonify({"error": "Internal server error"}), 500
+
+def _parse_batch(body: str) -> list:
+    """Decode a JSON array or an NDJSON stream into a list of uplinks."""
+    body = body.strip()
+    if not body:
+        return []
+    if body.startswith("["):
+        messages = json.loads(body)
+        if not isinstance(messages, list):
+            raise ValueError("expected a JSON array")
+        return messages
+    return [json.loads(line) for line in body.splitlines() if line.strip()]
+
 @app.route("/save", methods=["POST"])
 def save():
     """Save window state to CSV and return its contents as plain text."""
-    analyzer.export_window_state('0004A30B00202875', force=True)
+    if ingestor is not None:
+        # run on the ingest loop so we don't race the queue workers
+        try:
+            ingestor.call(analyzer.export_window_state, '0004A30B00202875', True)
+        except IngestorStopped:
+            return jsonify({"error": "Ingestion is shutting down"}), 503, {"Retry-After": str(RETRY_AFTER_S)}
+    else:
+        analyzer.export_window_state('0004A30B00202875', force=True)
     return {"message": "Window flushed"}
 
+@app.route("/metrics", methods=["GET"])
+def metrics_endpoint():
+    """Counters and latency histograms in the Prometheus text format."""
+    if not metrics.ENABLED:
+        return jsonify({"error": "Metrics are disabled (MONITOR_METRICS=0)"}), 404
+    # shard processes keep their own analyzer metrics; fold them in here
+    extra = [analyzer.metrics_snapshot()] if ANALYZER_SHARDS > 1 else []
+    return Response(metrics.REGISTRY.render(extra), mimetype="text/plain; version=0.0.4")
+
+@app.route("/stats", methods=["GET"])
+def stats_summary():
+    """Tracked-device count and eviction counters."""
+    return jsonify(analyzer.eviction_stats())
+
+@app.route("/stats/<dev_eui>", methods=["GET"])
+def stats(dev_eui):
+    """Counters of the window currently being collected for one device, per gateway too."""
+    window = analyzer.window_stats(dev_eui)
+    if window is None:
+        return jsonify({"error": f"No state found for {dev_eui}"}), 404
+    return jsonify({"device_eui": dev_eui, "window": window,
+                    "gateways": analyzer.gateway_stats(dev_eui),
+                    "jamming": analyzer.jamming_state(dev_eui)})
+
+@app.route("/jamming", methods=["GET"])
+def jamming():
+    """Devices the streaming detector currently suspects of being jammed."""
+    suspects = analyzer.jamming_suspects()
+    return jsonify({"count": len(suspects), "devices": suspects})
+
 if __name__ == "__main__":
     # bind to all interfaces so the test script can reach us
-    app.run(host="0.0.0.0", port=5000, debug=False)
+    app.run(host="0.0.0.0", port=PORT, debug=False)
@@ -0,0 +1,203 @@
+"""
+Replay TTN gateway captures through UplinkAnalyzer, offline and in-process.
+
+Reads exported TTN console logs (a JSON array of events, newest first, as in
+`ttn/data/logs/*/*.json`; NDJSON works too) lazily, with the streaming
+reader of `ttn/data/capture_reader.py`, keeps the `gs.up.receive` events,
+and turns each one into the web-hook shape `/uplink` receives.  The gateway-side log has no
+DevEUI, so the DevAddr stands in for it.  Copies of one uplink heard by
+several gateways are merged into a single uplink with every gateway in
+`rx_metadata`, the way the network server de-duplicates them.
+
+Events from all files are replayed in time order, as fast as possible or
+`--speed` times real time.  Alerts go out as NDJSON, window statistics to
+`--stats-dir`, and a summary is printed at the end.
+
+  python replay.py ../ttn/data/logs/article/*.json
+  python replay.py capture.json --speed 60 --alerts alerts.ndjson
+"""
+import argparse
+import heapq
+import itertools
+import json
+import logging
+import os
+import sys
+import time
+from collections import Counter
+from typing import Any, Dict, IO, Iterable, Iterator, Optional, Tuple
+
+# the capture reader is shared with the offline analysis in ttn/data
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "ttn", "data"))
+from capture_reader import iter_entries, iter_entries_reversed
+from ttn_time import NS_PER_S, format_ns, parse_ns
+from uplink_analyzer import UplinkAnalyzer
+from window_writer import open_gateway_writer, open_window_writer
+
+DEDUP_WINDOW = 0.2              # s, same as TTN's network server default
+
+# (received_at ns, dedup key, web-hook body)
+Uplink = Tuple[int, tuple, Dict[str, Any]]
+
+# ── reading ────────────────────────────────────────────────────────────────────
+def to_uplink(event: Dict[str, Any]) -> Optional[Uplink]:
+    """`gs.up.receive` event → web-hook body; None for every other event."""
+    if event.get("name") != "gs.up.receive":
+        return None
+    data = event.get("data") or {}
+    msg  = data.get("message") or {}
+    mac  = (msg.get("payload") or {}).get("mac_payload")
+    if not mac:                             # join requests etc.
+        return None
+    fhdr = mac.get("f_hdr") or {}
+    dev_addr = fhdr.get("dev_addr", "unknown")
+    received_at = msg.get("received_at") or event.get("time")
+    try:
+        ts = parse_ns(received_at)
+    except (ValueError, TypeError):
+        return None
+
+    rx = [
+        {"gateway_ids": {"gateway_id": (m.get("gateway_ids") or {}).get("gateway_id")},
+         "rssi": m.get("rssi", -999), "snr": m.get("snr", -999)}
+        for m in msg.get("rx_metadata") or ()
+    ]
+    body = {
+        "end_device_ids": {"dev_eui": dev_addr, "dev_addr": dev_addr},
+        "uplink_message": {
+            "f_cnt":       fhdr.get("f_cnt", 0),    # proto3 leaves out zeros
+            "f_port":      mac.get("f_port"),
+            "frm_payload": mac.get("frm_payload", ""),
+            "received_at": received_at,
+            "rx_metadata": rx,
+            "settings":    msg.get("settings"),
+        },
+    }
+    return ts, (dev_addr, fhdr.get("f_cnt", 0), msg.get("raw_payload")), body
+
+def load_uplinks(path: str) -> Iterator[Uplink]:
+    """Uplinks of one capture, oldest first, decoded as they are consumed.
+
+    Console exports are newest first and are read back to front; a file
+    whose first two uplinks are already oldest first (NDJSON from the live
+    event stream) is read front to back.
+    """
+    ups = (u for u in map(to_uplink, iter_entries(path)) if u is not None)
+    head = list(itertools.islice(ups, 2))
+    if len(head) == 2 and head[1][0] < head[0][0]:
+        ups.close()
+        yield from (u for u in map(to_uplink, iter_entries_reversed(path)) if u is not None)
+    else:
+        yield from head
+        yield from ups
+
+def merge_gateways(uplinks: Iterable[Uplink], window_s: float = DEDUP_WINDOW) -> Iterator[Uplink]:
+    """Fold copies of one uplink heard within `window_s` into one message."""
+    window = int(window_s * NS_PER_S)
+    pending: Dict[tuple, Uplink] = {}       # insertion order = time order
+    for up in uplinks:
+        while pending:
+            key, first = next(iter(pending.items()))
+            if up[0] - first[0] <= window:
+                break
+            del pending[key]
+            yield first
+        first = pending.get(up[1])
+        if first is None:
+            pending[up[1]] = up
+        else:
+            first[2]["uplink_message"]["rx_metadata"].extend(up[2]["uplink_message"]["rx_metadata"])
+    yield from pending.values()
+
+# ── replay ─────────────────────────────────────────────────────────────────────
+def replay(
+    uplinks: Iterable[Uplink],
+    analyzer: UplinkAnalyzer,
+    speed: float = 0.0,
+    alerts_out: Optional[IO[str]] = None,
+) -> Dict[str, Any]:
+    """
+    Feed `uplinks` to `analyzer` in order.  `speed=0` runs flat out,
+    otherwise the original spacing is kept, compressed `speed` times.
+    """
+    codes: Counter = Counter()
+    devices = set()
+    n = 0
+    first_ts = wall0 = None
+    t0 = time.perf_counter()
+
+    for ts, _, body in uplinks:
+        if speed > 0:
+            if first_ts is None:
+                first_ts, wall0 = ts, time.perf_counter()
+            delay = (ts - first_ts) / NS_PER_S / speed - (time.perf_counter() - wall0)
+            if delay > 0:
+                time.sleep(delay)
+
+        res = analyzer.analyze_uplink(body)
+        n += 1
+        devices.add(res["device_eui"])
+        if res["alert_codes"]:
+            for a in res["alert_codes"]:
+                codes[a["code"]] += 1
+            if alerts_out is not None:
+                alerts_out.write(json.dumps({
+                    "received_at": format_ns(ts),
+                    "dev_eui":     res["device_eui"],
+                    "fcnt":        res["fcnt"],
+                    "gateways":    len(body["uplink_message"]["rx_metadata"]),
+                    "alerts":      res["alert_codes"],
+                }) + "\n")
+
+    # close every open window so partial ones reach the stats files too
+    for dev_eui in devices:
+        analyzer.export_window_state(dev_eui, force=True)
+
+    elapsed = time.perf_counter() - t0
+    return {
+        "uplinks":   n,
+        "devices":   len(devices),
+        "elapsed_s": round(elapsed, 3),
+        "rate":      round(n / elapsed, 1) if elapsed else None,
+        "alerts":    dict(codes.most_common()),
+        "jamming":   analyzer.jamming_suspects(),
+    }
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("captures", nargs="+", help="TTN console JSON exports")
+    ap.add_argument("--speed", type=float, default=0.0,
+                    help="replay N× real time (default 0: as fast as possible)")
+    ap.add_argument("--alerts", default="-", help="NDJSON alert output, '-' = stdout, '' = none")
+    ap.add_argument("--stats-dir", default="replay_stats", help="window statistics output")
+    ap.add_argument("--export", choices=("csv", "parquet"), default="csv")
+    ap.add_argument("--dedup-window", type=float, default=DEDUP_WINDOW,
+                    help="s within which copies from several gateways are merged (0 = off)")
+    ap.add_argument("-v", "--verbose", action="store_true", help="log window summaries")
+    args = ap.parse_args()
+
+    logging.basicConfig(level=logging.INFO if args.verbose else logging.WARNING,
+                        format="%(asctime)s │ %(levelname)-8s │ %(name)s │ %(message)s")
+    log = logging.getLogger("replay")
+
+    # files are decoded as the merge reaches them, inside replay()'s timing
+    streams = [load_uplinks(p) for p in args.captures]
+    uplinks: Iterable[Uplink] = heapq.merge(*streams, key=lambda u: u[0])
+    if args.dedup_window > 0:
+        uplinks = merge_gateways(uplinks, args.dedup_window)
+
+    writer = open_window_writer(args.export, args.stats_dir, log)
+    gw_writer = open_gateway_writer(args.export, args.stats_dir, log)
+    analyzer = UplinkAnalyzer(log, writer=writer, gateway_writer=gw_writer, log_mode="window")
+    out = None if args.alerts == "" else sys.stdout if args.alerts == "-" else open(args.alerts, "w")
+    try:
+        summary = replay(uplinks, analyzer, args.speed, out)
+    finally:
+        analyzer.close()
+        if out not in (None, sys.stdout):
+            out.close()
+
+    print(json.dumps(summary, indent=2), file=sys.stderr)
+
+if __name__ == "__main__":
+    main()
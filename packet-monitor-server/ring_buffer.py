@@ -0,0 +1,120 @@
+"""
+RingBuffer: fixed-capacity numeric history with O(1) append.
+
+Samples live unboxed in an `array.array`, which grows lazily up to
+`capacity` (quiet devices never pay for the full window) and then wraps.
+Aggregates are order-independent, so they run straight over the storage;
+with NumPy installed that is a zero-copy `frombuffer` view.
+"""
+from array import array
+from typing import Iterator, List, Optional, Tuple
+
+try:                                    # optional: only used for fast stats
+    import numpy as np
+except ImportError:                     # pragma: no cover
+    np = None
+
+class RingBuffer:
+    __slots__ = ("_buf", "_cap", "_head")
+
+    def __init__(self, capacity: int, typecode: str = "d") -> None:
+        if capacity < 1:
+            raise ValueError("capacity must be >= 1")
+        self._buf  = array(typecode)
+        self._cap  = capacity
+        self._head = 0                  # index of the oldest sample once full
+
+    # ------------------------------------------------------------------ API
+    @property
+    def capacity(self) -> int:
+        return self._cap
+
+    @property
+    def full(self) -> bool:
+        return len(self._buf) == self._cap
+
+    def append(self, value: float) -> None:
+        buf = self._buf
+        if len(buf) < self._cap:
+            buf.append(value)
+        else:
+            buf[self._head] = value
+            self._head = (self._head + 1) % self._cap
+
+    def clear(self) -> None:
+        del self._buf[:]
+        self._head = 0
+
+    def last(self) -> Optional[float]:
+        if not self._buf:
+            return None
+        return self._buf[self._head - 1]
+
+    def tolist(self) -> List[float]:
+        """Samples oldest → newest."""
+        h = self._head
+        return self._buf[h:].tolist() + self._buf[:h].tolist()
+
+    # ....................................................... persistence
+    def to_record(self) -> Tuple[int, str, bytes, int]:
+        return self._cap, self._buf.typecode, self._buf.tobytes(), self._head
+
+    @classmethod
+    def from_record(cls, rec: Tuple[int, str, bytes, int]) -> "RingBuffer":
+        cap, typecode, raw, head = rec
+        rb = cls.__new__(cls)
+        rb._buf = array(typecode)
+        rb._buf.frombytes(raw)
+        rb._cap, rb._head = cap, head
+        return rb
+
+    # ............................................................ stats
+    # The NumPy view must not outlive the call: an array that is exporting
+    # its buffer cannot grow, so none of these hand the view back.
+    def mean(self) -> Optional[float]:
+        if not self._buf:
+            return None
+        if np is not None:
+            return float(self._view().mean())
+        return sum(self._buf) / len(self._buf)
+
+    def min(self) -> Optional[float]:
+        if not self._buf:
+            return None
+        return float(self._view().min()) if np is not None else min(self._buf)
+
+    def max(self) -> Optional[float]:
+        if not self._buf:
+            return None
+        return float(self._view().max()) if np is not None else max(self._buf)
+
+    def percentile(self, q: float) -> Optional[float]:
+        """q-th percentile (0–100), linear interpolation like numpy's default."""
+        if not self._buf:
+            return None
+        if np is not None:
+            return float(np.percentile(self._view(), q))
+        data = sorted(self._buf)
+        pos  = (len(data) - 1) * q / 100
+        lo   = int(pos)
+        hi   = min(lo + 1, len(data) - 1)
+        return data[lo] + (data[hi] - data[lo]) * (pos - lo)
+
+    # ---------------------------------------------------------------- dunder
+    def __len__(self) -> int:
+        return len(self._buf)
+
+    def __iter__(self) -> Iterator[float]:
+        return iter(self.tolist())
+
+    def __repr__(self) -> str:
+        return f"RingBuffer({self.tolist()!r}, capacity={self._cap})"
+
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, RingBuffer):
+            return NotImplemented
+        return self._cap == other._cap and self.tolist() == other.tolist()
+
+    # ---------------------------------------------------------------- helpers
+    def _view(self):
+        return np.frombuffer(self._buf, dtype=self._buf.typecode)
@@ -0,0 +1,181 @@
+"""
+ShardedAnalyzer: spread UplinkAnalyzer work over several processes.
+
+Every DevEUI is hashed to one shard process which owns the `DeviceState`
+for that device, so per-device checks see exactly the same sequence as in
+a single `UplinkAnalyzer`.  The front end talks to each shard over a
+`multiprocessing` pipe and exposes the same public API as the analyzer.
+"""
+import logging
+import multiprocessing as mp
+import os
+import threading
+import zlib
+from typing import Any, Dict, List, Optional, Tuple
+
+import log_setup
+from metrics import merge_snapshots
+from uplink_analyzer import UplinkAnalyzer
+
+class ShardError(RuntimeError):
+    """An analyzer call failed inside a shard process."""
+
+def _shard_main(conn, logger_name: str, log_level: int, log_format: Optional[str],
+                analyzer_kwargs: Dict[str, Any]) -> None:
+    """Shard process loop: receive `(method, args)`, reply `(ok, result)`."""
+    if log_format is not None and not logging.getLogger().handlers:
+        logging.basicConfig(level=log_level, format=log_format)
+
+    analyzer = UplinkAnalyzer(logging.getLogger(logger_name), **analyzer_kwargs)
+    while True:
+        try:
+            method, args = conn.recv()
+        except (EOFError, KeyboardInterrupt):
+            break
+        if method is None:
+            analyzer.close()
+            conn.send((True, None))
+            break
+        try:
+            conn.send((True, getattr(analyzer, method)(*args)))
+        except Exception as e:
+            conn.send((False, f"{type(e).__name__}: {e}"))
+    conn.close()
+    log_setup.stop()            # children skip atexit: drain queued records now
+
+class ShardedAnalyzer:
+    def __init__(self, logger: logging.Logger, shards: Optional[int] = None,
+                 log_format: Optional[str] = None, **analyzer_kwargs: Any) -> None:
+        self._log = logger.getChild("shards")
+        self.n_shards = max(1, shards or os.cpu_count() or 1)
+
+        # fork keeps the parent's logging setup and does not re-import the
+        # server module in the children; fall back to spawn where needed
+        methods = mp.get_all_start_methods()
+        ctx = mp.get_context("fork" if "fork" in methods else "spawn")
+
+        level = logging.getLogger().level
+        state_dir = analyzer_kwargs.pop("state_dir", None)
+        self._conns: List[Any] = []
+        self._procs: List[Any] = []
+        self._locks: List[threading.Lock] = []
+        for i in range(self.n_shards):
+            parent, child = ctx.Pipe()
+            kwargs = dict(analyzer_kwargs)
+            if state_dir is not None:
+                # one store per shard; the layout only fits the same shard count
+                kwargs["state_dir"] = os.path.join(state_dir, f"shard-{i}-of-{self.n_shards}")
+            p = ctx.Process(
+                target=_shard_main,
+                args=(child, logger.name, level, log_format, kwargs),
+                name=f"analyzer-shard-{i}",
+                daemon=True,
+            )
+            p.start()
+            child.close()
+            self._conns.append(parent)
+            self._procs.append(p)
+            self._locks.append(threading.Lock())
+
+        self._log.info("Started %d analyzer shards", self.n_shards)
+
+    # ------------------------------------------------------------------ API
+    def analyze_uplink(self, data: Dict[str, Any]) -> Dict[str, Any]:
+        return self._call(self._shard_of(data), "analyze_uplink", data)
+
+    def analyze_batch(self, messages: List[Any]) -> List[Dict[str, Any]]:
+        """Fan a batch out to all shards at once and stitch the results back."""
+        parts: Dict[int, Tuple[List[int], List[Any]]] = {}
+        for i, data in enumerate(messages):
+            idx, msgs = parts.setdefault(self._shard_of(data), ([], []))
+            idx.append(i)
+            msgs.append(data)
+
+        results: List[Optional[Dict[str, Any]]] = [None] * len(messages)
+        shards = sorted(parts)              # fixed lock order, no deadlocks
+        for s in shards:
+            self._locks[s].acquire()
+        try:
+            for s in shards:
+                self._conns[s].send(("analyze_batch", (parts[s][1],)))
+            # read every reply before raising so no pipe is left out of step
+            replies = {s: self._conns[s].recv() for s in shards}
+        finally:
+            for s in shards:
+                self._locks[s].release()
+
+        for s in shards:
+            ok, out = replies[s]
+            if not ok:
+                raise ShardError(f"shard {s}: {out}")
+            for i, res in zip(parts[s][0], out):
+                results[i] = res
+        return results  # type: ignore[return-value]
+
+    def export_window_state(self, dev_eui: str, force: bool = False) -> None:
+        self._call(self._shard_of_eui(dev_eui), "export_window_state", dev_eui, force)
+
+    def window_stats(self, dev_eui: str) -> Optional[Dict[str, Any]]:
+        return self._call(self._shard_of_eui(dev_eui), "window_stats", dev_eui)
+
+    def gateway_stats(self, dev_eui: str) -> Optional[List[Dict[str, Any]]]:
+        return self._call(self._shard_of_eui(dev_eui), "gateway_stats", dev_eui)
+
+    def jamming_state(self, dev_eui: str) -> Optional[Dict[str, Any]]:
+        return self._call(self._shard_of_eui(dev_eui), "jamming_state", dev_eui)
+
+    def jamming_suspects(self) -> Dict[str, str]:
+        suspects: Dict[str, str] = {}
+        for s in range(self.n_shards):
+            suspects.update(self._call(s, "jamming_suspects"))
+        return suspects
+
+    def device_count(self) -> int:
+        return sum(self._call(s, "device_count") for s in range(self.n_shards))
+
+    def eviction_stats(self) -> Dict[str, int]:
+        total: Dict[str, int] = {}
+        for s in range(self.n_shards):
+            for k, v in self._call(s, "eviction_stats").items():
+                total[k] = total.get(k, 0) + v
+        return total
+
+    def metrics_snapshot(self) -> Dict[str, Any]:
+        """Analyzer metrics of all shards, summed."""
+        return merge_snapshots(self._call(s, "metrics_snapshot") for s in range(self.n_shards))
+
+    def close(self, timeout: float = 5.0) -> None:
+        for s, conn in enumerate(self._conns):
+            with self._locks[s]:
+                try:
+                    conn.send((None, ()))
+                    conn.recv()
+                except (OSError, EOFError):
+                    pass
+                conn.close()
+        for p in self._procs:
+            p.join(timeout)
+            if p.is_alive():
+                p.terminate()
+        self._conns, self._procs = [], []
+        self._log.info("Analyzer shards stopped")
+
+    # ---------------------------------------------------------------- helpers
+    def _shard_of(self, data: Any) -> int:
+        # malformed bodies still get a shard; the analyzer reports them
+        dev_eui = "unknown"
+        ids = data.get("end_device_ids") if isinstance(data, dict) else None
+        if isinstance(ids, dict):
+            dev_eui = ids.get("dev_eui", "unknown")
+        return self._shard_of_eui(dev_eui)
+
+    def _shard_of_eui(self, dev_eui: Any) -> int:
+        return zlib.crc32(str(dev_eui).encode()) % self.n_shards
+
+    def _call(self, shard: int, method: str, *args: Any) -> Any:
+        with self._locks[shard]:
+            self._conns[shard].send((method, args))
+            ok, result = self._conns[shard].recv()
+        if not ok:
+            raise ShardError(f"shard {shard}: {result}")
+        return result
@@ -0,0 +1,111 @@
+"""
+StateStore: persist analyzer device state across restarts.
+
+Devices are stored as `DeviceState.to_record()` tuples.  Layout in
+`directory`:
+  devices.snapshot  – `(generation, {dev_eui: record})`, written by
+                      `compact()` and swapped in atomically
+  devices.<gen>.log – append-only frames of devices changed since the
+                      snapshot of that generation
+
+Each log frame is one pickle of `(changed_records, removed_dev_euis)`.
+`load()` reads the snapshot and replays its generation's log on top; a
+frame cut short by a crash is ignored, so at most the last interval of
+changes is lost.  A log left behind by a crash during compaction belongs
+to an older generation and is never replayed over the newer snapshot.
+"""
+import glob
+import logging
+import os
+import pickle
+from typing import Dict, Iterable, Tuple
+
+Record = Tuple  # DeviceState.to_record()
+
+class StateStore:
+    SNAPSHOT_FILE = "devices.snapshot"
+    COMPACT_AFTER = 200_000     # logged device records before compacting
+
+    def __init__(self, directory: str, logger: logging.Logger,
+                 compact_after: int = COMPACT_AFTER, fsync: bool = False) -> None:
+        self.directory     = directory
+        self._log          = logger.getChild("store")
+        self.compact_after = compact_after
+        self.fsync         = fsync
+        self.log_records   = 0
+        self.generation    = 0
+
+        os.makedirs(directory, exist_ok=True)
+        self._snapshot_path = os.path.join(directory, self.SNAPSHOT_FILE)
+
+    @property
+    def _log_path(self) -> str:
+        return os.path.join(self.directory, f"devices.{self.generation}.log")
+
+    # ------------------------------------------------------------------ API
+    def load(self) -> Dict[str, Record]:
+        devices: Dict[str, Record] = {}
+        if os.path.exists(self._snapshot_path):
+            with open(self._snapshot_path, "rb") as fp:
+                self.generation, devices = pickle.load(fp)
+
+        frames = 0
+        if os.path.exists(self._log_path):
+            with open(self._log_path, "r+b") as fp:
+                while True:
+                    good = fp.tell()
+                    try:
+                        changed, removed = pickle.load(fp)
+                    except EOFError:
+                        if fp.tell() != good:   # partial frame at the very end
+                            fp.truncate(good)
+                        break
+                    except (pickle.UnpicklingError, ValueError, TypeError, AttributeError):
+                        # cut off the torn frame so new frames stay readable
+                        self._log.warning("Dropping truncated frame at end of %s", self._log_path)
+                        fp.truncate(good)
+                        break
+                    for rec in changed:
+                        devices[rec[0]] = rec
+                    for dev_eui in removed:
+                        devices.pop(dev_eui, None)
+                    self.log_records += len(changed) + len(removed)
+                    frames += 1
+
+        self._log.info("Loaded %d devices (%d log frames) from %s",
+                       len(devices), frames, self.directory)
+        return devices
+
+    def append(self, changed: Iterable[Record], removed: Iterable[str] = ()) -> None:
+        frame: Tuple[list, list] = (list(changed), list(removed))
+        if not frame[0] and not frame[1]:
+            return
+        data = pickle.dumps(frame, protocol=pickle.HIGHEST_PROTOCOL)
+        with open(self._log_path, "ab") as fp:
+            fp.write(data)
+            if self.fsync:
+                fp.flush()
+                os.fsync(fp.fileno())
+        self.log_records += len(frame[0]) + len(frame[1])
+
+    @property
+    def needs_compaction(self) -> bool:
+        return self.log_records >= self.compact_after
+
+    def compact(self, devices: Dict[str, Record]) -> None:
+        """Write a full snapshot and start a fresh log."""
+        generation = self.generation + 1
+        tmp = self._snapshot_path + ".tmp"
+        with open(tmp, "wb") as fp:
+            pickle.dump((generation, devices), fp, protocol=pickle.HIGHEST_PROTOCOL)
+            fp.flush()
+            os.fsync(fp.fileno())
+        os.replace(tmp, self._snapshot_path)
+
+        # the snapshot now covers every older log
+        self.generation  = generation
+        self.log_records = 0
+        for path in glob.glob(os.path.join(self.directory, "devices.*.log")):
+            if path != self._log_path:
+                os.remove(path)
+        self._log.info("Compacted state: %d devices", len(devices))
@@ -0,0 +1,104 @@
+"""
+Fast parsing of TTN `received_at` timestamps into integer nanoseconds.
+
+TTN stamps uplinks as RFC 3339 UTC with nanoseconds,
+`2025-01-01T12:34:56.123456789Z`.  `parse_ns` turns that into an `int`
+of nanoseconds since the Unix epoch without building a `datetime`:
+everything up to the minute is looked up in a small cache (uplinks arrive
+in time order, so nearly every call hits), leaving two `int()` calls for
+seconds and fraction.  Anything else `datetime.fromisoformat` understands
+goes through a slower fallback.  `format_ns` is the reverse, producing the
+same text as `datetime.isoformat()` did; `ns_datetime` gives a `datetime`.
+"""
+import re
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Optional
+
+NS_PER_S = 1_000_000_000
+_NS_PER_MIN = 60 * NS_PER_S
+_EPOCH  = datetime(1970, 1, 1, tzinfo=timezone.utc)
+_US     = timedelta(microseconds=1)
+_PREFIX = re.compile(r"(\d{4})-(\d\d)-(\d\d)[T ](\d\d):(\d\d)", re.ASCII)
+
+CACHE_SIZE = 4096               # minute prefixes kept before the caches reset
+_minutes: Dict[str, int] = {}   # "YYYY-MM-DDTHH:MM" → ns
+_labels:  Dict[int, str] = {}   # minute number → "YYYY-MM-DDTHH:MM"
+
+def parse_ns(raw: str) -> int:
+    """RFC 3339 timestamp → ns since the epoch; naive times count as UTC.
+
+    Raises ValueError (or TypeError) for anything that is not a timestamp.
+    """
+    base = _minutes.get(raw[:16])
+    # exactly TTN's shape, "….SSfffffffffZ": no length or padding maths
+    if base is not None and len(raw) == 30 and raw[29] == "Z" and raw[16] == ":" and raw[19] == ".":
+        sec, frac = raw[17:19], raw[20:29]
+        if sec.isdigit() and frac.isdigit() and sec < "60":
+            return base + int(sec) * NS_PER_S + int(frac)
+
+    if base is None:
+        base = _minute_ns(raw[:16])
+    if base is not None and raw[16:17] == ":" and raw[-1:] == "Z":
+        sec = raw[17:19]
+        if len(raw) == 20:
+            frac = ""
+        elif raw[19] == "." and len(raw) > 21:
+            frac = raw[20:-1]
+        else:
+            return _parse_slow(raw)
+        if (sec + frac).isdigit() and int(sec) < 60:
+            ns = base + int(sec) * NS_PER_S
+            if frac:
+                ns += int(frac[:9]) * 10 ** (9 - min(len(frac), 9))
+            return ns
+    return _parse_slow(raw)
+
+def format_ns(ns: int) -> str:
+    """ns since the epoch → `datetime.isoformat()` text (µs, `+00:00`)."""
+    minute, rem = divmod(ns, _NS_PER_MIN)
+    label = _labels.get(minute)
+    if label is None:
+        label = (_EPOCH + timedelta(minutes=minute)).strftime("%Y-%m-%dT%H:%M")
+        if len(_labels) >= CACHE_SIZE:
+            _labels.clear()
+        _labels[minute] = label
+    sec, sub = divmod(rem, NS_PER_S)
+    us = sub // 1000
+    if us:
+        return f"{label}:{sec:02d}.{us:06d}+00:00"
+    return f"{label}:{sec:02d}+00:00"
+
+def ns_datetime(ns: int) -> datetime:
+    """ns since the epoch → aware UTC `datetime` (µs precision)."""
+    return _EPOCH + timedelta(microseconds=ns // 1000)
+
+def datetime_ns(dt: datetime) -> int:
+    """`datetime` (naive = UTC) → ns since the epoch."""
+    if dt.tzinfo is None:
+        dt = dt.replace(tzinfo=timezone.utc)
+    return (dt - _EPOCH) // _US * 1000
+
+# ---------------------------------------------------------------- helpers
+def _minute_ns(prefix: str) -> Optional[int]:
+    m = _PREFIX.fullmatch(prefix)
+    if m is None:
+        return None
+    try:
+        dt = datetime(*map(int, m.groups()), tzinfo=timezone.utc)
+    except ValueError:
+        return None
+    ns = (dt - _EPOCH) // _US * 1000
+    if len(_minutes) >= CACHE_SIZE:
+        _minutes.clear()
+    _minutes[prefix] = ns
+    return ns
+
+def _parse_slow(raw: str) -> int:
+    """Whatever `datetime.fromisoformat` accepts (fraction cut to µs)."""
+    if raw.endswith("Z"):
+        raw = raw[:-1]
+    if "." in raw:
+        head, frac = raw.split(".", 1)
+        digits = len(frac) - len(frac.lstrip("0123456789"))
+        raw = f"{head}.{(frac[:digits] + '000000')[:6]}{frac[digits:]}"
+    return datetime_ns(datetime.fromisoformat(raw))
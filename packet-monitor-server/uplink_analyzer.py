@@ -1,21 +1,48 @@
 """
 UplinkAnalyzer: A simple LoRaWAN uplink sanity checker.
 """
-import logging, base64, csv, os
+import logging, base64, os, threading
+from collections import OrderedDict
+from functools import wraps
+from time import monotonic, perf_counter_ns, time_ns
+from dataclasses import asdict
 from datetime import datetime, timezone
 from typing import Any, Dict, List, Tuple, Optional
+import metrics
+from alerts import Alert, AlertCode, POOR_RF, alert_mask, render_all
 from device_state import DeviceState, WindowStats
+from gateway_state import GatewayTracker
+from jamming_detector import JammingDetector
+from state_store import StateStore
+from window_writer import BufferedWindowWriter, open_gateway_writer, open_window_writer
+from ttn_time import NS_PER_S, format_ns, ns_datetime, parse_ns
+
+def _locked(method):
+    """Run an analyzer method under the instance lock.
+
+    Flask request threads (stats, /jamming, /metrics gauges) read the same
+    device table that uplink handlers and the ingest loop insert into,
+    reorder and evict from; even lookups may thaw a cold device.
+    """
+    @wraps(method)
+    def wrapper(self, *args, **kwargs):
+        with self._lock:
+            return method(self, *args, **kwargs)
+    return wrapper
 
 class UplinkAnalyzer:
     # ── statistics ─────────────────────────────────────────────────────────
     WINDOW = 50
     CSV_DIR = "stats"
+    PARQUET_DIR = os.path.join(CSV_DIR, "windows")
+    SNAPSHOT_INTERVAL = 30          # s between incremental state snapshots
+    EVICT_SWEEP_INTERVAL = 10       # s between idle-device sweeps
+    LOG_MODES = ("message", "window")
 
     # ── tune these to taste ────────────────────────────────────────────────
     EXPECTED_INTERVAL = 10          # s, what “normal” looks like
     MAX_TIME_GAP      = 20          # s, beyond this = “long delay”
     MAX_FCNT_GAP      = 10
-    FCNT_HISTORY_SIZE = 10
 
     RSSI_THRESHOLD = -115
     RSSI_BAD       = -120
@@ -25,36 +52,388 @@ class UplinkAnalyzer:
     SNR_GOOD       = -5
     # ───────────────────────────────────────────────────────────────────────
 
-    def __init__(self, logger: logging.Logger) -> None:
+    def __init__(
+        self,
+        logger: logging.Logger,
+        writer: Optional[BufferedWindowWriter] = None,
+        export: str = "csv",
+        state_dir: Optional[str] = None,
+        snapshot_interval: float = SNAPSHOT_INTERVAL,
+        max_devices: Optional[int] = None,
+        idle_ttl: Optional[float] = None,
+        log_mode: str = "message",
+        window_max_pending: Optional[int] = None,
+        window_flush_interval: Optional[float] = None,
+        gateway_writer: Optional[BufferedWindowWriter] = None,
+    ) -> None:
+        """
+        `export` picks the window backend ("csv" or "parquet") unless a
+        ready-made `writer` is passed in; `window_max_pending` rows or
+        `window_flush_interval` seconds bound what it buffers (and so what
+        a crash can lose), backend defaults when None.  Each window also
+        writes one row per gateway to `gateway_writer`, by default a
+        `gateways/` directory below the built-in writer's (a ready-made
+        `writer` without a `gateway_writer` exports no gateway rows).
+
+        With `state_dir` set, device state (including open windows) is
+        snapshotted there every `snapshot_interval` seconds and restored
+        on start-up.
+
+        `max_devices` caps tracked devices (least recently heard go first)
+        and `idle_ttl` drops devices silent for that many seconds; an
+        evicted device's partial window is exported before it is dropped.
+
+        `log_mode="window"` replaces the per-uplink log lines with one
+        summary line per exported window.
+        """
+        if log_mode not in self.LOG_MODES:
+            raise ValueError(f"log_mode must be one of {self.LOG_MODES}, not {log_mode!r}")
         self._log      = logger.getChild("analyzer")
-        self._devices: Dict[str, DeviceState] = {}
-        os.makedirs(self.CSV_DIR, exist_ok=True)
+        self.log_mode  = log_mode
+        # re-entrant: uplink processing calls export / snapshot / evict_idle
+        self._lock     = threading.RLock()
+        # ordered least → most recently heard, so eviction pops from the front
+        self._devices: "OrderedDict[str, DeviceState]" = OrderedDict()
+        if writer is None:
+            directory = self.PARQUET_DIR if export == "parquet" else self.CSV_DIR
+            knobs = {"max_pending": window_max_pending, "flush_interval": window_flush_interval}
+            writer = open_window_writer(export, directory, self._log, **knobs)
+            if gateway_writer is None:
+                gateway_writer = open_gateway_writer(export, directory, self._log, **knobs)
+        self._writer   = writer
+        self._gw_writer = gateway_writer
+        self._gateways = GatewayTracker()
+        self._jamming  = JammingDetector()
+        # stage timer, None when metrics are switched off (no clock reads then)
+        self._timer    = metrics.STAGE_SECONDS if metrics.ENABLED else None
+
+        self.max_devices = None if max_devices is None else max(1, max_devices)
+        self.idle_ttl    = idle_ttl
+        self.evictions   = {"idle": 0, "capacity": 0}
+        self._last_sweep = monotonic()
+
+        # restored devices stay as compact records until their next uplink
+        self._cold: Dict[str, tuple] = {}
+        self._cold_since = monotonic()
+        self._store: Optional[StateStore] = None
+        self._dirty: set = set()
+        self._removed: set = set()
+        self.snapshot_interval = snapshot_interval
+        self._last_snapshot    = monotonic()
+        if state_dir is not None:
+            self._store = StateStore(state_dir, self._log)
+            self._cold  = self._store.load()
 
     # ------------------------------------------------------------------ API
+    @_locked
     def analyze_uplink(self, data: Dict[str, Any]) -> Dict[str, Any]:
-        dev_eui = data.get("end_device_ids", {}).get("dev_eui", "unknown")
-        fcnt    = data.get("uplink_message", {}).get("f_cnt")
-        payload = data.get("uplink_message", {}).get("frm_payload", "")
-        ttn_ts  = data.get("uplink_message", {}).get("received_at")
+        dev_eui, fcnt, payload, ttn_ts, rssi, snr, rx = self._extract(data)
+        timer = self._timer
+        if timer:
+            t = perf_counter_ns()
+        ts, alerts = self._parse_timestamp(ttn_ts)
+        if timer:
+            timer.observe_ns(t, "parse_timestamp")
+            metrics.UPLINKS.inc(1, "single")
+
+        state = self._state(dev_eui)
+        return self._process(state, fcnt, payload, ts, alerts, rssi, snr, rx,
+                             verbose=self.log_mode == "message")
+
+    @_locked
+    def analyze_batch(self, messages: List[Any]) -> List[Dict[str, Any]]:
+        """
+        Analyse a burst of uplinks (e.g. a gateway flushing its queue after
+        an outage).  Messages are grouped per DevEUI and replayed in
+        `received_at` order so FCnt/timing checks see the real sequence;
+        results come back in the order the messages were submitted.
+
+        A message that cannot be analysed gets `{"status": "error"}` in its
+        slot instead of failing the whole batch, so a client never has to
+        resend uplinks that were already applied.
+        """
+        results: List[Optional[Dict[str, Any]]] = [None] * len(messages)
+        groups: Dict[str, List[Tuple[int, int, tuple, List[Alert]]]] = {}
+        timer = self._timer
+
+        for i, data in enumerate(messages):
+            if not isinstance(data, dict):
+                results[i] = {"status": "error", "error": "Uplink is not a JSON object"}
+                continue
+            try:
+                fields = self._extract(data)
+            except Exception as e:
+                results[i] = self._batch_error(i, e)
+                continue
+            if timer:
+                t = perf_counter_ns()
+            ts, time_alert = self._parse_timestamp(fields[3])
+            if timer:
+                timer.observe_ns(t, "parse_timestamp")
+            groups.setdefault(fields[0], []).append((ts, i, fields, time_alert))
+        if timer:
+            metrics.UPLINKS.inc(sum(map(len, groups.values())), "batch")
+
+        for dev_eui, items in groups.items():
+            items.sort(key=lambda it: (it[0], it[1]))     # stable for equal ts
+            state = self._state(dev_eui)
+
+            n_alerts = 0
+            for ts, i, (_, fcnt, payload, _, rssi, snr, rx), alerts in items:
+                try:
+                    res = self._process(state, fcnt, payload, ts, alerts, rssi, snr, rx, verbose=False)
+                except Exception as e:
+                    results[i] = self._batch_error(i, e)
+                    continue
+                n_alerts += len(res["alerts"])
+                results[i] = res
+
+            # one summary line per device instead of 2+ lines per message
+            if self.log_mode == "message":
+                self._log.info(
+                    "DevEUI=%s │ batch of %d uplinks │ last FCnt=%s │ %d alerts",
+                    dev_eui, len(items), state.last_fcnt, n_alerts,
+                    extra={"dev_eui": dev_eui},
+                )
+
+        return results  # type: ignore[return-value]
+
+    @_locked
+    def export_window_state(self, dev_eui: str, force: bool = False) -> None:
+        state = self._known_state(dev_eui)
+        if state is None:
+            self._log.warning(f"No state found for {dev_eui}")
+            return  # or raise an exception
+        
+        if state.window.msgs and (force or state.window.msgs >= self.WINDOW):
+            self._export_window(dev_eui, state)
+            state.window = WindowStats()
+            for link in state.gateways.values():
+                link.reset_window()
+        if force:
+            self._writer.flush()
+            if self._gw_writer is not None:
+                self._gw_writer.flush()
+
+    @_locked
+    def snapshot(self) -> None:
+        """Persist devices changed since the last snapshot (no-op without a store)."""
+        self._last_snapshot = monotonic()
+        if self._store is None:
+            return
+        if self._store.needs_compaction:
+            records = dict(self._cold)
+            records.update((d, s.to_record()) for d, s in list(self._devices.items()))
+            self._store.compact(records)
+        else:
+            self._store.append((self._devices[d].to_record() for d in self._dirty
+                                if d in self._devices), self._removed)
+        self._dirty.clear()
+        self._removed.clear()
+
+    @_locked
+    def close(self) -> None:
+        """Write out buffered window rows and device state; call on shutdown."""
+        self.snapshot()
+        self._writer.close()
+        if self._gw_writer is not None:
+            self._gw_writer.close()
+
+    @_locked
+    def window_stats(self, dev_eui: str) -> Optional[Dict[str, Any]]:
+        """Counters of the currently open window for one device."""
+        state = self._known_state(dev_eui)
+        if state is None:
+            return None
+        return asdict(state.window)
 
-        # primary gateway’s RF
-        meta        = (data.get("uplink_message", {})
-                           .get("rx_metadata", [{}]))[0]
-        rssi, snr   = meta.get("rssi", -999), meta.get("snr", -999)
+    @_locked
+    def gateway_stats(self, dev_eui: str) -> Optional[List[Dict[str, Any]]]:
+        """Per-gateway reception in the currently open window for one device."""
+        state = self._known_state(dev_eui)
+        if state is None:
+            return None
+        return [link.window_stats() for link in state.gateways.values()]
 
-        ts, time_alert = self._parse_timestamp(ttn_ts)
-        alerts: List[str] = time_alert
+    @_locked
+    def jamming_state(self, dev_eui: str) -> Optional[Dict[str, Any]]:
+        """Streaming detector statistics and jamming episode of one device."""
+        state = self._known_state(dev_eui)
+        if state is None:
+            return None
+        return JammingDetector.summary(state.jam)
+
+    @_locked
+    def jamming_suspects(self) -> Dict[str, str]:
+        """DevEUI → onset for every device currently suspected of being jammed.
+
+        Only devices heard since start-up are scanned; restored ones that
+        stayed silent cannot have changed state.
+        """
+        return {d: JammingDetector.summary(s.jam)["onset"]
+                for d, s in list(self._devices.items()) if s.jam.suspected}
+
+    @_locked
+    def device_count(self) -> int:
+        return len(self._devices) + len(self._cold)
+
+    @_locked
+    def eviction_stats(self) -> Dict[str, int]:
+        return {"devices": self.device_count(), **self.evictions}
+
+    def metrics_snapshot(self) -> Dict[str, Any]:
+        """This process's metric series (shards ship these to the front end)."""
+        return metrics.REGISTRY.snapshot()
+
+    @_locked
+    def evict_idle(self) -> int:
+        """Drop devices not heard from for `idle_ttl` seconds."""
+        now = self._last_sweep = monotonic()
+        if self.idle_ttl is None:
+            return 0
+        cutoff, n = now - self.idle_ttl, 0
+
+        # restored devices never heard since start-up count from then on
+        if self._cold and self._cold_since < cutoff:
+            for dev_eui in list(self._cold):
+                self._evict(dev_eui, "idle")
+                n += 1
+        while self._devices:
+            dev_eui, state = next(iter(self._devices.items()))
+            if state.last_seen >= cutoff:
+                break
+            self._evict(dev_eui, "idle")
+            n += 1
+        if n:
+            self._log.info("Evicted %d idle devices", n)
+        return n
 
-        state = self._devices.setdefault(dev_eui, DeviceState(dev_eui))
+    # ---------------------------------------------------------------- helpers
+    def _state(self, dev_eui: str) -> DeviceState:
+        # not setdefault(): that would build a throw-away state per uplink
+        state = self._known_state(dev_eui)
+        if state is None:
+            state = self._devices[dev_eui] = DeviceState(dev_eui)
+            if self.max_devices is not None:
+                while self.device_count() > self.max_devices:
+                    # restored-but-silent devices go before live ones
+                    victim = next(iter(self._cold)) if self._cold else next(iter(self._devices))
+                    self._evict(victim, "capacity")
+        else:
+            self._devices.move_to_end(dev_eui)
+        state.last_seen = monotonic()
+        return state
+
+    def _evict(self, dev_eui: str, reason: str) -> None:
+        state = self._known_state(dev_eui)
+        if state is None:
+            return
+        if state.window.msgs:
+            self._export_window(dev_eui, state)
+        del self._devices[dev_eui]
+        self.evictions[reason] += 1
+        if self._store is not None:
+            self._dirty.discard(dev_eui)
+            self._removed.add(dev_eui)
+
+    def _known_state(self, dev_eui: str) -> Optional[DeviceState]:
+        """State of a device we have seen, thawing it from the store if needed."""
+        state = self._devices.get(dev_eui)
+        if state is None and self._cold:
+            rec = self._cold.pop(dev_eui, None)
+            if rec is not None:
+                state = self._devices[dev_eui] = DeviceState.from_record(rec)
+                state.last_seen = monotonic()
+        return state
+
+    def _batch_error(self, i: int, exc: Exception) -> Dict[str, Any]:
+        self._log.exception("Uplink %d of batch failed", i)
+        return {"status": "error", "error": f"{type(exc).__name__}: {exc}"}
+
+    @staticmethod
+    def _extract(data: Dict[str, Any]) -> Tuple[str, Any, str, Optional[str], float, float, list]:
+        """Pull the fields we care about out of a TTN web-hook body."""
+        dev_eui = data.get("end_device_ids", {}).get("dev_eui", "unknown")
+        up      = data.get("uplink_message", {})
+        fcnt    = up.get("f_cnt")
+        payload = up.get("frm_payload", "")
+        ttn_ts  = up.get("received_at")
+
+        # primary gateway’s RF; every gateway's goes to the gateway tracker
+        rx          = up.get("rx_metadata") or [{}]
+        rssi, snr   = rx[0].get("rssi", -999), rx[0].get("snr", -999)
+        return dev_eui, fcnt, payload, ttn_ts, rssi, snr, rx
+
+    def _process(
+        self,
+        state: DeviceState,
+        fcnt: Any,
+        payload: str,
+        ts: int,
+        alerts: List[Alert],
+        rssi: float,
+        snr: float,
+        rx_metadata: List[Dict[str, Any]],
+        verbose: bool = True,
+    ) -> Dict[str, Any]:
+        """Run every check for one uplink and fold it into the device state."""
+        dev_eui = state.dev_eui
+        # a repeated FCnt is not charged as a miss to gateways that skip it
+        fresh   = isinstance(fcnt, int) and fcnt != state.last_fcnt
 
         delta_seconds = None
-        if state.last_time:
-            delta_seconds = round((ts - state.last_time).total_seconds(), 1)
+        if state.last_time is not None:
+            delta_seconds = round((ts - state.last_time) / NS_PER_S, 1)
 
+        timer = self._timer
+        if timer:
+            t = perf_counter_ns()
         alerts += self._analyze_fcnt(state, fcnt)
+        if timer:
+            t = timer.observe_ns(t, "analyze_fcnt")
         alerts += self._analyze_timing(state, ts)
+        if timer:
+            t = timer.observe_ns(t, "analyze_timing")
         alerts += self._analyze_rf_quality(state, rssi, snr)
+        if timer:
+            t = timer.observe_ns(t, "analyze_rf_quality")
+        alerts += self._gateways.observe(state, rx_metadata, fresh)
+        if timer:
+            t = timer.observe_ns(t, "analyze_gateways")
+        alerts += self._jamming.observe(state, fcnt, ts, rssi, snr)
+        if timer:
+            t = timer.observe_ns(t, "detect_jamming")
         alerts += self._analyze_payload(state, payload, fcnt)
+        if timer:
+            timer.observe_ns(t, "analyze_payload")
+            for a in alerts:
+                metrics.ALERTS.inc(1, a.code.name)
+
+        # ----- logging -----------------------------------------------------
+        if verbose:
+            self._log.info(
+                "DevEUI=%s │ FCnt=%s │ Δt=%s s │ RSSI=%s dBm │ SNR=%s dB",
+                dev_eui,
+                fcnt,
+                delta_seconds if delta_seconds is not None else "0",
+                rssi,
+                snr,
+                extra={"dev_eui": dev_eui},
+            )
+
+            self._log.info(
+                "  Payload='%s' │ Counter=%s",
+                state.last_string,
+                state.last_count,
+                extra={"dev_eui": dev_eui},
+            )
+
+            for a in alerts:
+                self._log.warning("  %s", a.render(),
+                                  extra={"dev_eui": dev_eui, "alert": a.code.name})
+
+        # ----- save statistics ----------------------------------------------
+        self._update_window(state, alert_mask(alerts), ts)
 
         # ----- state mutate & history -------------------------------------
         state.last_fcnt = fcnt if isinstance(fcnt, int) else state.last_fcnt
@@ -62,144 +441,113 @@ class UplinkAnalyzer:
         state.last_rssi = rssi
         state.last_snr  = snr
 
-        # ----- logging -----------------------------------------------------
-        self._log.info(
-            "DevEUI=%s │ FCnt=%s │ Δt=%s s │ RSSI=%s dBm │ SNR=%s dB",
-            dev_eui,
-            fcnt,
-            delta_seconds if delta_seconds is not None else "0",
-            rssi,
-            snr,
-        )
-
-        self._log.info(
-            "  Payload='%s' │ Counter=%s",
-            state.last_string,
-            state.last_count,
-        )
-
-        for a in alerts:
-            self._log.warning("  %s", a)
+        self.export_window_state(dev_eui, force=False)
 
-        # ----- save statistics ----------------------------------------------
-        self._update_window(state, alerts, rssi, snr, ts)   
-        self.export_window_state(dev_eui, force=False)                 
+        if self._store is not None:
+            self._dirty.add(dev_eui)
+            if monotonic() - self._last_snapshot >= self.snapshot_interval:
+                self.snapshot()
+        if self.idle_ttl is not None and monotonic() - self._last_sweep >= self.EVICT_SWEEP_INTERVAL:
+            self.evict_idle()
 
         return {
             "status":      "ok",
             "device_eui":  dev_eui,
             "fcnt":        fcnt,
-            "alerts":      alerts,
-            "received_at": ts.isoformat(),
+            "alerts":      render_all(alerts),
+            "alert_codes": [a.to_dict() for a in alerts],
+            "received_at": format_ns(ts),
             "rssi":        rssi,
             "snr":         snr,
         }
 
-    def export_window_state(self, dev_eui: str, force: bool = False) -> None:
-        state = self._devices.get(dev_eui)
-        if state is None:
-            self._log.warning(f"No state found for {dev_eui}")
-            return  # or raise an exception
-        
-        if force or state.window.msgs >= self.WINDOW:
-            self._export_window_csv(dev_eui, state)
-            state.window = WindowStats()    
-
-    # ---------------------------------------------------------------- helpers
-    def _parse_timestamp(self, raw: str) -> Tuple[datetime, List[str]]:
+    def _parse_timestamp(self, raw: str) -> Tuple[int, List[Alert]]:
+        """`received_at` → ns since the epoch (now, plus an alert, if unusable)."""
         if not raw:
-            return datetime.now(timezone.utc), ["⚠️ Missing timestamp"]
+            return time_ns(), [Alert(AlertCode.MISSING_TIMESTAMP)]
         try:
-            # Strip trailing 'Z'
-            if raw.endswith("Z"):
-                raw = raw[:-1]
-
-            # Split date/time and fractional seconds if present
-            if '.' in raw:
-                date_part, frac = raw.split('.', 1)
-                # Truncate fractional part to max 6 digits (microseconds)
-                # Pad with zeros if less than 6 digits
-                frac = (frac + "000000")[:6]
-                raw_fixed = f"{date_part}.{frac}"
-                ts = datetime.fromisoformat(raw_fixed).replace(tzinfo=timezone.utc)
-            else:
-                ts = datetime.fromisoformat(raw).replace(tzinfo=timezone.utc)
-
-            return ts, []
-
+            return parse_ns(raw), []
         except Exception:
-            return datetime.now(timezone.utc), [f"⚠️ Bad timestamp: {raw!r}"]
+            return time_ns(), [Alert(AlertCode.BAD_TIMESTAMP, {"raw": raw})]
 
     # .......................................... FCnt
-    def _analyze_fcnt(self, s: DeviceState, fcnt: Any) -> List[str]:
-        a: List[str] = []
+    def _analyze_fcnt(self, s: DeviceState, fcnt: Any) -> List[Alert]:
+        a: List[Alert] = []
         if not isinstance(fcnt, int):
-            a.append("⚠️ Invalid or missing FCnt")
+            a.append(Alert(AlertCode.INVALID_FCNT))
             return a
 
         if fcnt > 65535:
-            a.append("⚠️ FCnt > 16-bit limit")
+            a.append(Alert(AlertCode.FCNT_OVERFLOW))
 
         if s.last_fcnt is None:
             return a
 
         if fcnt < s.last_fcnt <= 65535 and s.last_fcnt > 60000:
-            a.append("ℹ️ FCnt rollover detected")
+            a.append(Alert(AlertCode.FCNT_ROLLOVER))
         elif fcnt == s.last_fcnt:
-            a.append(f"⚠️ Duplicate FCnt {fcnt}")
+            a.append(Alert(AlertCode.DUPLICATE_FCNT, {"fcnt": fcnt}))
         elif fcnt < s.last_fcnt:
-            a.append(f"⚠️ FCnt went backwards ({s.last_fcnt}→{fcnt})")
+            a.append(Alert(AlertCode.FCNT_BACKWARDS, {"last": s.last_fcnt, "fcnt": fcnt}))
         else:
             gap = fcnt - s.last_fcnt
             if gap > 1:
-                a.append(f"⚠️ FCnt gap of {gap}")
+                a.append(Alert(AlertCode.FCNT_GAP, {"gap": gap}))
                 if gap > self.MAX_FCNT_GAP:
-                    a.append("⚠️ Large FCnt gap – potential loss")
+                    a.append(Alert(AlertCode.LARGE_FCNT_GAP, {"gap": gap}))
 
         # short history for quick inspection
         s.fcnt_sequence.append(fcnt)
-        if len(s.fcnt_sequence) > self.FCNT_HISTORY_SIZE:
-            s.fcnt_sequence.pop(0)
 
         return a
 
-    def _update_window(self, s, alerts, rssi, snr, ts):
+    def _update_window(self, s: DeviceState, mask: int, ts: int) -> None:
         """Increment counters used for the 50-message roll-up."""
         w = s.window
         w.msgs += 1
 
-        if any("Duplicate FCnt" in al for al in alerts):
+        if mask & AlertCode.DUPLICATE_FCNT:
             w.dup_fcnt += 1
-        if any("FCnt gap" in al for al in alerts):
+        if mask & AlertCode.FCNT_GAP:
             w.fcnt_gap += 1
-        if any("Long delay" in al for al in alerts):
+        if mask & AlertCode.LONG_DELAY:
             w.long_delay += 1
 
-        # delay stats
-        if s.last_time:
-            w.total_delay += (ts - s.last_time).total_seconds()
+        # delay stats (called before last_time is moved on to `ts`)
+        if s.last_time is not None:
+            w.total_delay += (ts - s.last_time) / NS_PER_S
 
         # RF quality
-        if rssi < self.RSSI_THRESHOLD or snr < self.SNR_THRESHOLD:
+        if mask & POOR_RF:
             w.poor_rf += 1
-        elif rssi > self.RSSI_GOOD and snr > self.SNR_GOOD:
+        elif mask & AlertCode.GOOD_RF:
             w.good_rf += 1
 
         # payload quirks
-        if any("Payload+count repeated" in al for al in alerts):
+        if mask & AlertCode.PAYLOAD_REPEATED:
             w.same_payload += 1
-        if any("counter decreased" in al for al in alerts):
+        if mask & AlertCode.COUNTER_DECREASED:
             w.counter_decrease += 1
 
-    # ......................................... CSV serializer
-    def _export_window_csv(self, dev_eui: str, s: DeviceState):
-        os.makedirs(self.CSV_DIR, exist_ok=True)
-
+    # ......................................... window serializer
+    def _export_window(self, dev_eui: str, s: DeviceState):
+        if self._timer:
+            t = perf_counter_ns()
         w = s.window
         avg_delay = (w.total_delay / w.msgs) if w.msgs else 0
         row = {
             "dev_eui"        : dev_eui,
             "window_size"    : w.msgs,
+            # raw counters (the CSV backend only keeps the percentages)
+            "dup_fcnt"       : w.dup_fcnt,
+            "fcnt_gap"       : w.fcnt_gap,
+            "long_delay"     : w.long_delay,
+            "total_delay_s"  : w.total_delay,
+            "poor_rf"        : w.poor_rf,
+            "good_rf"        : w.good_rf,
+            "same_payload"   : w.same_payload,
+            "counter_decrease": w.counter_decrease,
+            # derived
             "dup_fcnt_pct"   : round(100 * w.dup_fcnt / w.msgs, 2),
             "fcnt_gap_pct"   : round(100 * w.fcnt_gap / w.msgs, 2),
             "long_delay_pct" : round(100 * w.long_delay / w.msgs, 2),
@@ -208,70 +556,77 @@ class UplinkAnalyzer:
             "good_rf_pct"    : round(100 * w.good_rf / w.msgs, 2),
             "same_payload_pct": round(100 * w.same_payload / w.msgs, 2),
             "counter_dec_pct": round(100 * w.counter_decrease / w.msgs, 2),
-            "timestamp"      : datetime.utcnow().isoformat(),
+            # the window's last uplink, not the wall clock: replays of old
+            # captures must land on the capture's dates
+            "timestamp"      : (ns_datetime(s.last_time) if s.last_time is not None
+                                else datetime.now(timezone.utc)),
         }
 
-        file = os.path.join(self.CSV_DIR, f"{dev_eui}.csv")
-        write_header = not os.path.exists(file)
-        with open(file, "a", newline="") as fp:
-            wcsv = csv.DictWriter(fp, fieldnames=row.keys())
-            if write_header:
-                wcsv.writeheader()
-            wcsv.writerow(row)
-
-        self._log.info("📄 50-msg stats appended to %s", file)
+        self._writer.write(dev_eui, row)
+        if self._gw_writer is not None:
+            for link in s.gateways.values():
+                self._gw_writer.write(dev_eui, {"dev_eui": dev_eui, "timestamp": row["timestamp"],
+                                                **link.window_stats()})
+        if self.log_mode == "window":
+            self._log.info(
+                "DevEUI=%s │ window of %d │ dup FCnt %d │ FCnt gaps %d │ long delays %d │ "
+                "poor RF %d │ repeated payload %d │ avg Δt %.1f s",
+                dev_eui, w.msgs, w.dup_fcnt, w.fcnt_gap, w.long_delay,
+                w.poor_rf, w.same_payload, avg_delay,
+            )
+        else:
+            self._log.info("📄 %d-msg stats queued for %s", w.msgs, self._writer.path_for(dev_eui))
+        if self._timer:
+            self._timer.observe_ns(t, "export")
+            metrics.WINDOWS.inc()
 
     # .......................................... Timing
-    def _analyze_timing(self, s: DeviceState, ts: datetime) -> List[str]:
+    def _analyze_timing(self, s: DeviceState, ts: int) -> List[Alert]:
         if s.last_time is None:
             return []
 
-        dt = (ts - s.last_time).total_seconds()
+        dt = (ts - s.last_time) / NS_PER_S
         if dt < 1:
-            return [f"⚠️ Too fast ({dt:.2f}s) – duplicates?"]
+            return [Alert(AlertCode.TOO_FAST, {"dt": dt})]
         if dt > self.MAX_TIME_GAP:
-            return [f"⚠️ Long delay ({dt:.1f}s) – expected {self.EXPECTED_INTERVAL}s"]
+            return [Alert(AlertCode.LONG_DELAY, {"dt": dt, "expected": self.EXPECTED_INTERVAL})]
 
         # a mild nudge if just slightly off
         if abs(dt - self.EXPECTED_INTERVAL) > 2:
-            return [f"ℹ️ Interval {dt:.1f}s (nominal {self.EXPECTED_INTERVAL}s)"]
+            return [Alert(AlertCode.OFF_INTERVAL, {"dt": dt, "expected": self.EXPECTED_INTERVAL})]
         return []
 
     # .......................................... RF
-    def _analyze_rf_quality(self, s: DeviceState, rssi: float, snr: float) -> List[str]:
-        a: List[str] = []
-        # keep last 100 samples for crude averages
+    def _analyze_rf_quality(self, s: DeviceState, rssi: float, snr: float) -> List[Alert]:
+        a: List[Alert] = []
+        # ring buffers keep the last RF_HISTORY_SIZE samples for averages
         if rssi != -999:
             s.rssi_history.append(rssi)
-            if len(s.rssi_history) > 100:
-                s.rssi_history.pop(0)
         if snr != -999:
             s.snr_history.append(snr)
-            if len(s.snr_history) > 100:
-                s.snr_history.pop(0)
 
         if rssi < self.RSSI_BAD or snr < self.SNR_BAD:
-            a.append(f"⚠️ Very poor RF (RSSI {rssi} / SNR {snr})")
+            a.append(Alert(AlertCode.VERY_POOR_RF, {"rssi": rssi, "snr": snr}))
         elif rssi < self.RSSI_THRESHOLD or snr < self.SNR_THRESHOLD:
-            a.append(f"⚠️ Low RF (RSSI {rssi} / SNR {snr})")
+            a.append(Alert(AlertCode.LOW_RF, {"rssi": rssi, "snr": snr}))
         elif rssi > self.RSSI_GOOD and snr > self.SNR_GOOD:
-            a.append(f"ℹ️ Good RF (RSSI {rssi} / SNR {snr})")
+            a.append(Alert(AlertCode.GOOD_RF, {"rssi": rssi, "snr": snr}))
         return a
 
     # .......................................... Payload
     def _decode_payload(
         self, b64: str
-    ) -> Tuple[str, Optional[int], List[str]]:
+    ) -> Tuple[str, Optional[int], List[Alert]]:
         if not b64:
-            return "", None, ["⚠️ Empty payload"]
+            return "", None, [Alert(AlertCode.EMPTY_PAYLOAD)]
 
         try:
             raw = base64.b64decode(b64, validate=True)
         except Exception:
-            return "<base64-err>", None, ["⚠️ Bad base64"]
+            return "<base64-err>", None, [Alert(AlertCode.BAD_BASE64)]
 
         if len(raw) == 0:
-            return "", None, ["⚠️ Zero-length payload"]
+            return "", None, [Alert(AlertCode.ZERO_LENGTH_PAYLOAD)]
 
         if len(raw) > 1:
             text = raw[:-1].decode("utf-8", errors="replace").strip()
@@ -282,29 +637,29 @@ class UplinkAnalyzer:
 
         return text, cnt, []
 
-    def _analyze_payload(self, s: DeviceState, b64: str, fcnt: Any) -> List[str]:
+    def _analyze_payload(self, s: DeviceState, b64: str, fcnt: Any) -> List[Alert]:
         text, cnt, errs = self._decode_payload(b64)
-        a: List[str] = errs
+        a: List[Alert] = errs
 
         # equality checks
         if text == s.last_string and cnt == s.last_count:
             if fcnt == s.last_fcnt:
-                a.append("⚠️ Exact duplicate payload & FCnt")
+                a.append(Alert(AlertCode.EXACT_DUPLICATE))
             else:
-                a.append("⚠️ Payload+count repeated with new FCnt")
+                a.append(Alert(AlertCode.PAYLOAD_REPEATED))
 
         # counter progression
         if cnt is not None and s.last_count is not None:
             if cnt == s.last_count:
-                a.append("⚠️ Payload counter unchanged")
+                a.append(Alert(AlertCode.COUNTER_UNCHANGED))
             elif cnt < s.last_count:
-                a.append("⚠️ Payload counter decreased")
+                a.append(Alert(AlertCode.COUNTER_DECREASED))
 
         # minimal content
         if not text:
-            a.append("⚠️ Empty decoded string")
+            a.append(Alert(AlertCode.EMPTY_STRING))
         elif len(text) < 3:
-            a.append("⚠️ Very short payload")
+            a.append(Alert(AlertCode.SHORT_PAYLOAD))
 
         # store
         s.last_string, s.last_count = text, cnt
@@ -0,0 +1,303 @@
+"""
+Window-statistics writers.
+
+`BufferedWindowWriter` keeps finished window rows in memory and hands them
+to a backend in bulk.  Buffered rows are flushed when
+  • `max_pending` rows are waiting (this also caps what a crash can lose),
+  • `flush_interval` seconds have passed since the last flush, or
+  • `flush()` / `close()` is called (e.g. on /save or at shutdown).
+If the backend fails, rows it did not write are kept and retried on the
+timer; past `MAX_BACKLOG` × `max_pending` rows new ones are dropped (and
+logged) until it recovers, so a broken disk cannot take the analyzer down.
+
+Backends:
+  • WindowCsvWriter      – per-device `stats/<dev_eui>.csv` text rows
+  • ParquetWindowWriter  – typed, partitioned files (see columnar_export.py)
+
+Every device window also yields one row per gateway that heard the device
+(`open_gateway_writer`); those go to a `gateways/` directory below the
+device windows, in the same backend.
+"""
+import abc
+import atexit
+import csv
+import logging
+import os
+import threading
+from collections import OrderedDict
+from datetime import datetime
+from time import monotonic
+from typing import Any, Dict, List, Optional, Sequence, Set, TextIO, Tuple
+
+# columns of the legacy per-device CSV, in file order
+CSV_FIELDS = (
+    "dev_eui", "window_size", "dup_fcnt_pct", "fcnt_gap_pct", "long_delay_pct",
+    "avg_delay_s", "poor_rf_pct", "good_rf_pct", "same_payload_pct",
+    "counter_dec_pct", "timestamp",
+)
+
+# columns of the per-(device, gateway) window CSV
+GATEWAY_CSV_FIELDS = (
+    "dev_eui", "gateway_id", "heard", "missed", "avg_rssi", "avg_snr",
+    "lost", "degraded", "timestamp",
+)
+GATEWAY_SUBDIR = "gateways"
+
+class BufferedWindowWriter(abc.ABC):
+    # ── defaults ───────────────────────────────────────────────────────────
+    MAX_PENDING    = 200        # rows held in memory before a forced flush
+    FLUSH_INTERVAL = 5.0        # s
+    MAX_BACKLOG    = 10         # × max_pending rows kept while the backend fails
+    # ───────────────────────────────────────────────────────────────────────
+
+    def __init__(
+        self,
+        directory: str,
+        logger: logging.Logger,
+        max_pending: Optional[int] = None,
+        flush_interval: Optional[float] = None,
+    ) -> None:
+        self.directory      = directory
+        self._log           = logger
+        self.max_pending    = max(1, max_pending or self.MAX_PENDING)
+        self.flush_interval = self.FLUSH_INTERVAL if flush_interval is None else flush_interval
+
+        self._pending: Dict[str, List[Dict[str, Any]]] = {}
+        self._n_pending  = 0
+        self._last_flush = monotonic()
+        self._lock       = threading.RLock()
+        self._closed     = False
+        self._failing    = False    # last flush raised: retry on the timer only
+        self._dropped    = 0        # rows refused while the backlog was full
+
+        os.makedirs(directory, exist_ok=True)
+        _register(self)
+
+    # ------------------------------------------------------------------ API
+    @abc.abstractmethod
+    def path_for(self, dev_eui: str) -> str:
+        """Where rows of `dev_eui` end up (for log messages)."""
+
+    def write(self, dev_eui: str, row: Dict[str, Any]) -> None:
+        """Queue one row; backend errors are logged here, never raised."""
+        with self._lock:
+            if self._failing and self._n_pending >= self.max_pending * self.MAX_BACKLOG:
+                if not self._dropped:
+                    self._log.warning("%d window rows for %s are waiting on a failing backend; "
+                                      "dropping new rows until it recovers",
+                                      self._n_pending, self.directory)
+                self._dropped += 1
+                return
+            self._pending.setdefault(dev_eui, []).append(row)
+            self._n_pending += 1
+            if ((self._n_pending >= self.max_pending and not self._failing)
+                    or monotonic() - self._last_flush >= self.flush_interval):
+                self._flush_locked(raise_errors=False)
+
+    def flush(self) -> None:
+        with self._lock:
+            self._flush_locked()
+
+    def close(self) -> None:
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+            _unregister(self)
+            try:
+                self._flush_locked()
+            finally:
+                self._close_backend()
+
+    @property
+    def pending(self) -> int:
+        return self._n_pending
+
+    # ------------------------------------------------------------- backend
+    @abc.abstractmethod
+    def _write_rows(self, rows_by_device: Dict[str, List[Dict[str, Any]]]) -> None:
+        """
+        Persist one flush worth of rows, grouped by device.  Rows are removed
+        from `rows_by_device` as soon as they are written, so after an error
+        only the rows still in it are retried.
+        """
+
+    def _close_backend(self) -> None:
+        pass
+
+    # ---------------------------------------------------------------- helpers
+    def _flush_locked(self, raise_errors: bool = True) -> None:
+        self._last_flush = monotonic()
+        if not self._n_pending:
+            return
+        try:
+            self._write_rows(self._pending)
+        except Exception:
+            self._n_pending = sum(map(len, self._pending.values()))
+            if not self._failing:
+                self._log.exception("Writing window rows to %s failed; keeping %d rows "
+                                    "and retrying every %gs", self.directory,
+                                    self._n_pending, self.flush_interval)
+            self._failing = True
+            if raise_errors:
+                raise
+            return
+        self._pending = {}
+        self._n_pending = 0
+        if self._failing:
+            self._log.warning("Writing window rows to %s works again (%d rows dropped meanwhile)",
+                              self.directory, self._dropped)
+            self._failing = False
+            self._dropped = 0
+
+    def _flush_if_due(self) -> None:
+        with self._lock:
+            if not self._closed and monotonic() - self._last_flush >= self.flush_interval:
+                self._flush_locked(raise_errors=False)
+
+# ── shared flush timer ───────────────────────────────────────────────────────
+# Idle devices must not sit on rows forever, so writers are also flushed on
+# a timer.  One thread serves every writer of the process (an analyzer opens
+# two, each shard two more) and one atexit hook closes them.
+_writers: Set[BufferedWindowWriter] = set()
+_writers_lock = threading.Lock()
+_wake = threading.Event()
+_flusher: Optional[threading.Thread] = None
+
+def _register(writer: BufferedWindowWriter) -> None:
+    global _flusher
+    with _writers_lock:
+        _writers.add(writer)
+        if _flusher is None:
+            _flusher = threading.Thread(target=_flush_loop, name="window-flush", daemon=True)
+            _flusher.start()
+    _wake.set()                             # recompute the next deadline
+
+def _unregister(writer: BufferedWindowWriter) -> None:
+    with _writers_lock:
+        _writers.discard(writer)
+
+def _flush_loop() -> None:
+    while True:
+        with _writers_lock:
+            timed = [w for w in _writers if w.flush_interval > 0]
+        # sleep until the next writer is due (or a new one registers)
+        due = min((w._last_flush + w.flush_interval for w in timed), default=None)
+        _wake.wait(None if due is None else max(0.0, due - monotonic()))
+        _wake.clear()
+        for w in timed:
+            try:
+                w._flush_if_due()
+            except Exception:
+                w._log.exception("Periodic window flush failed")
+
+def _close_all() -> None:
+    with _writers_lock:
+        writers = list(_writers)
+    for w in writers:
+        try:
+            w.close()
+        except Exception:
+            w._log.exception("Closing window writer for %s failed", w.directory)
+
+def _after_fork_in_child() -> None:
+    # the flush thread did not survive fork(), and the parent's writers and
+    # their buffered rows are the parent's to write
+    global _flusher, _writers_lock
+    _writers.clear()
+    _writers_lock = threading.Lock()
+    _wake.clear()
+    _flusher = None
+
+atexit.register(_close_all)
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_after_fork_in_child)
+
+class WindowCsvWriter(BufferedWindowWriter):
+    """
+    Appends to `stats/<dev_eui>.csv`.  Open files are pooled in an LRU so a
+    busy device does not pay for open/stat/close on every window, while the
+    number of descriptors stays bounded with many devices.
+    """
+    MAX_OPEN_FILES = 128
+
+    def __init__(
+        self,
+        directory: str,
+        logger: logging.Logger,
+        max_open: int = MAX_OPEN_FILES,
+        max_pending: Optional[int] = None,
+        flush_interval: Optional[float] = None,
+        fsync: bool = False,
+        fields: Sequence[str] = CSV_FIELDS,
+    ) -> None:
+        self.max_open = max(1, max_open)
+        self.fsync    = fsync
+        self.fields   = list(fields)
+        self._handles: "OrderedDict[str, Tuple[TextIO, csv.DictWriter]]" = OrderedDict()
+        super().__init__(directory, logger.getChild("csv"), max_pending, flush_interval)
+
+    def path_for(self, dev_eui: str) -> str:
+        return os.path.join(self.directory, f"{dev_eui}.csv")
+
+    def _write_rows(self, rows_by_device: Dict[str, List[Dict[str, Any]]]) -> None:
+        for dev_eui in list(rows_by_device):
+            fp, wcsv = self._handle(dev_eui)
+            wcsv.writerows(self._format(r) for r in rows_by_device[dev_eui])
+            fp.flush()
+            if self.fsync:
+                os.fsync(fp.fileno())
+            del rows_by_device[dev_eui]
+
+    def _close_backend(self) -> None:
+        for fp, _ in self._handles.values():
+            fp.close()
+        self._handles.clear()
+
+    @staticmethod
+    def _format(row: Dict[str, Any]) -> Dict[str, Any]:
+        ts = row.get("timestamp")
+        if isinstance(ts, datetime):
+            # the CSV has always carried naive UTC ISO strings
+            row = dict(row, timestamp=ts.replace(tzinfo=None).isoformat())
+        return row
+
+    def _handle(self, dev_eui: str) -> Tuple[TextIO, csv.DictWriter]:
+        entry = self._handles.get(dev_eui)
+        if entry is not None:
+            self._handles.move_to_end(dev_eui)
+            return entry
+
+        while len(self._handles) >= self.max_open:
+            _, (old_fp, _) = self._handles.popitem(last=False)
+            old_fp.close()
+
+        fp   = open(self.path_for(dev_eui), "a", newline="")
+        wcsv = csv.DictWriter(fp, fieldnames=self.fields, extrasaction="ignore")
+        if fp.tell() == 0:                  # new (or empty) file
+            wcsv.writeheader()
+        entry = self._handles[dev_eui] = (fp, wcsv)
+        return entry
+
+def open_window_writer(backend: str, directory: str, logger: logging.Logger,
+                       **kwargs: Any) -> BufferedWindowWriter:
+    """Build the writer named by `backend` ("csv" or "parquet")."""
+    backend = backend.lower()
+    if backend == "csv":
+        return WindowCsvWriter(directory, logger, **kwargs)
+    if backend == "parquet":
+        from columnar_export import ParquetWindowWriter     # needs pyarrow
+        return ParquetWindowWriter(directory, logger, **kwargs)
+    raise ValueError(f"Unknown window export backend: {backend!r}")
+
+def open_gateway_writer(backend: str, directory: str, logger: logging.Logger,
+                        **kwargs: Any) -> BufferedWindowWriter:
+    """Writer for the per-gateway rows of windows written to `directory`."""
+    backend = backend.lower()
+    directory = os.path.join(directory, GATEWAY_SUBDIR)
+    if backend == "csv":
+        return WindowCsvWriter(directory, logger, fields=GATEWAY_CSV_FIELDS, **kwargs)
+    if backend == "parquet":
+        from columnar_export import GATEWAY_FILE_SCHEMA, ParquetWindowWriter
+        return ParquetWindowWriter(directory, logger, schema=GATEWAY_FILE_SCHEMA, **kwargs)
+    raise ValueError(f"Unknown window export backend: {backend!r}")
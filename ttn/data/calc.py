@@ -3,46 +3,96 @@
 # E = V * I * T
 # V is in Voltage (can be seen in radio datasheets, SX1276 and SX1262 are 3.3V)
 # I is in Amperes (can be seen in radio datasheets, Heltec and SODAQ are 45mA and 40mA respectively)
-# T is in seconds (calculated from airtime, can be seen in the airtime calculator)
+# T is in seconds (Semtech time-on-air model below, same numbers as the airtime calculator)
 # E is in Joules (calculated from the formula above)
+import re
+
+import numpy as np
+
+LORAWAN_OVERHEAD = 13  # PHY payload bytes around the application payload: MHDR 1 + FHDR 7 + FPort 1 + MIC 4
+
+def coding_rate(value) -> int:
+    """"4/5" … "4/8" (as in `settings.data_rate.lora.coding_rate`) or 1 … 4 → CR 1 … 4."""
+    if isinstance(value, str):
+        return int(value.split("/")[1]) - 4
+    return int(value)
+
+def time_on_air(sf, payload_bytes, bandwidth=125_000, cr=1, preamble=8,
+                explicit_header=True, crc=True, ldro=None, lorawan=True):
+    """
+    LoRa time on air in seconds (Semtech SX127x datasheet / AN1200.13).
+
+    Every argument broadcasts, so whole arrays of transmissions are evaluated
+    in one call.  `payload_bytes` is the application payload; with
+    `lorawan` the 13 bytes of LoRaWAN framing are added to get the PHY
+    payload.  `ldro` (low data rate optimisation) defaults to on when a
+    symbol lasts 16 ms or more, i.e. SF11 and SF12 at 125 kHz.
+    """
+    sf = np.asarray(sf, dtype=float)
+    bandwidth = np.asarray(bandwidth, dtype=float)
+    pl = np.asarray(payload_bytes, dtype=float) + (LORAWAN_OVERHEAD if lorawan else 0)
+    t_sym = 2 ** sf / bandwidth
+    de = (t_sym >= 0.016) if ldro is None else np.asarray(ldro, dtype=bool)
+    ih = 0 if explicit_header else 1
+
+    n_payload = 8 + np.maximum(
+        np.ceil((8 * pl - 4 * sf + 28 + 16 * crc - 20 * ih) / (4 * (sf - 2 * de))) * (np.asarray(cr) + 4),
+        0)
+    return (np.asarray(preamble) + 4.25 + n_payload) * t_sym
+
+_KEY = re.compile(r"SF(\d+)_(\d+)B")
+
+def parse_key(key: str):
+    """"SF9_5B" → (9, 5)."""
+    m = _KEY.fullmatch(key)
+    if m is None:
+        raise ValueError(f"Expected a key like 'SF9_5B', got {key!r}")
+    return int(m.group(1)), int(m.group(2))
 
 class EnergyCalculator:
-    def __init__(self, voltage: float, current: float, airtimes: dict):
+    def __init__(self, voltage: float, current: float, bandwidth: int = 125_000, cr: int = 1):
         """
         :param voltage: Voltage in volts
         :param current: Current in amperes
-        :param airtimes: Dictionary with spreading factors (e.g., "SF9_4B") as keys and airtime in seconds as values
+        :param bandwidth: Channel bandwidth in Hz (EU868 uplinks use 125 kHz)
+        :param cr: Coding rate, 1 for 4/5 (TTN's default) … 4 for 4/8
         """
         self.voltage = voltage
         self.current = current
-        self.airtimes = airtimes  # e.g., {"SF9_4B": 0.1649, "SF9_5B": 0.1853, ...}
+        self.bandwidth = bandwidth
+        self.cr = cr
+
+    def airtime(self, sf, payload_bytes, bandwidth=None, cr=None):
+        bandwidth = self.bandwidth if bandwidth is None else bandwidth
+        cr = self.cr if cr is None else cr
+        return time_on_air(sf, payload_bytes, bandwidth, cr)
 
-    def energy(self, sf: str) -> float:
-        return self.voltage * self.current * self.airtimes[sf]
+    def energy(self, sf, payload_bytes=None, bandwidth=None, cr=None):
+        """Joules per transmission; `sf` may also be a key like "SF9_5B".  Broadcasts."""
+        if isinstance(sf, str):
+            sf, payload_bytes = parse_key(sf)
+        return self.voltage * self.current * self.airtime(sf, payload_bytes, bandwidth, cr)
 
     def total_energy(self, strategy: dict) -> float:
-        return sum(self.energy(sf) * count for sf, count in strategy.items())
-
-# Airtime values for SODAQ and HELTEC
-sodaq_airtimes = {
-    "SF9_4B": 0.1649,
-    "SF10_4B": 0.3297,
-    "SF11_4B": 0.6595,
-    "SF12_4B": 1.3189,
-    "SF9_5B": 0.1853,
-    "SF10_5B": 0.3297,
-    "SF11_5B": 0.6595,
-    "SF12_5B": 1.3189,
-}
+        """Joules for one strategy, {"SF9_5B": count, ...}."""
+        return float(self.total_energies([strategy])[0])
 
-heltec_airtimes = {
-    "SF9_4B": 0.1649,
-    "SF9_5B": 0.1853,
-}
+    def total_energies(self, strategies) -> np.ndarray:
+        """Joules for many strategies at once: every transmission type in one vectorized call."""
+        owner, sf, size, count = [], [], [], []
+        for i, strategy in enumerate(strategies):
+            for key, n in strategy.items():
+                s, b = parse_key(key)
+                owner.append(i)
+                sf.append(s)
+                size.append(b)
+                count.append(n)
+        joules = self.energy(np.array(sf), np.array(size)) * np.array(count)
+        return np.bincount(np.array(owner, dtype=int), weights=joules, minlength=len(strategies))
 
 # Instantiate calculators
-sodaq_calc = EnergyCalculator(voltage=3.3, current=0.04, airtimes=sodaq_airtimes)
-heltec_calc = EnergyCalculator(voltage=3.3, current=0.045, airtimes=heltec_airtimes)
+sodaq_calc = EnergyCalculator(voltage=3.3, current=0.04)
+heltec_calc = EnergyCalculator(voltage=3.3, current=0.045)
 
 # Define strategies
 # strategies = {
@@ -68,17 +118,16 @@ strategies = {
     "e_dynamic_dj_gateway": {"SF9_5B": 45, "SF10_5B": 5},
 }
 
-# Print results
-print("=== SODAQ ===")
-for name, strat in strategies.items():
-    if "palbt" in name or "lbt" in name:
-        continue  # skip HELTEC-specific strategies
-    energy = sodaq_calc.total_energy(strat)
-    print(f"{name}: {energy:.2f} J")
-
-print("\n=== HELTEC ===")
-for name, strat in strategies.items():
-    if not ("palbt" in name or "lbt" in name):
-        continue
-    energy = heltec_calc.total_energy(strat)
-    print(f"{name}: {energy:.2f} J")
+if __name__ == "__main__":
+    # Print results
+    print("=== SODAQ ===")
+    sodaq = {name: strat for name, strat in strategies.items()
+             if not ("palbt" in name or "lbt" in name)}  # skip HELTEC-specific strategies
+    for name, energy in zip(sodaq, sodaq_calc.total_energies(sodaq.values())):
+        print(f"{name}: {energy:.2f} J")
+
+    print("\n=== HELTEC ===")
+    heltec = {name: strat for name, strat in strategies.items()
+              if "palbt" in name or "lbt" in name}
+    for name, energy in zip(heltec, heltec_calc.total_energies(heltec.values())):
+        print(f"{name}: {energy:.2f} J")
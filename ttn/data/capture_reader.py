@@ -0,0 +1,220 @@
+"""
+Streaming reader for TTN console captures (`logs/*/*.json`).
+
+A capture is one JSON array of events.  `iter_entries` decodes it one
+element at a time from fixed-size chunks (`iter_entries_reversed` last
+element first, since console exports are newest first), so only the
+current chunk and element are ever held as Python objects, and
+`read_capture` keeps just the fields the statistics need, as compact
+typed columns:
+
+    time      array('q'), received_at in ns since the epoch, 0 if unknown
+    dev_addr  list of (interned) str, None if the header has none
+    f_cnt     array('l'), -1 where the header has no f_cnt
+    sf        array('b'), spreading factor, 0 if unknown
+    frequency array('q'), Hz, 0 if unknown
+    bandwidth array('l'), Hz, 0 if unknown
+    coding_rate array('b'), CR 1 … 4 for 4/5 … 4/8, 0 if unknown
+    phy_size  array('h'), PHY payload bytes (from raw_payload), -1 if unknown
+    rssi/snr  array('d'), best gateway, NaN if none reported
+    gateway   list of (interned) str, id of that gateway or None
+
+One row per entry that carries a LoRaWAN MAC payload, in file order.
+"""
+import io
+import json
+import math
+import os
+import sys
+from array import array
+from datetime import datetime, timezone
+
+CHUNK_SIZE = 1 << 20  # characters read at a time
+
+_SEPARATORS = " \t\r\n,[]"
+_EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+
+def time_ns(text):
+    """RFC 3339 UTC timestamp with up to ns precision → ns since the epoch."""
+    head, _, frac = text.rstrip("Z").partition(".")
+    seconds = datetime.fromisoformat(head).replace(tzinfo=timezone.utc) - _EPOCH
+    ns = (seconds.days * 86400 + seconds.seconds) * 1_000_000_000
+    if frac:
+        ns += int(frac[:9].ljust(9, "0"))
+    return ns
+
+def _b64_size(text):
+    # decoded length without decoding
+    return len(text) * 3 // 4 - text[-2:].count("=")
+
+def iter_entries(path, chunk_size=CHUNK_SIZE):
+    """Yield the dict entries of a JSON array file (a lone object is one entry).
+
+    NDJSON works too.  An element cut off by the chunk edge is completed
+    from the next chunk; any other syntax error is raised at once,
+    positioned in the file.
+    """
+    with open(path, "r", encoding="utf-8", newline="") as f:
+        for _, value in _scan(f, chunk_size, path):
+            if isinstance(value, dict):
+                yield value
+
+def iter_entries_reversed(path, chunk_size=CHUNK_SIZE):
+    """`iter_entries` from the last entry to the first.
+
+    A first pass notes the byte offset of an entry about every `chunk_size`
+    bytes; the file is then decoded again one such segment at a time, last
+    segment first, so only one segment's entries are held at once.
+    """
+    marks = []
+    with open(path, "r", encoding="utf-8", newline="") as f:
+        for start, _ in _scan(f, chunk_size, path):
+            if not marks or start - marks[-1] >= chunk_size:
+                marks.append(start)
+    with open(path, "rb") as f:
+        end = f.seek(0, os.SEEK_END)
+        for start in reversed(marks):
+            f.seek(start)
+            text = f.read(end - start).decode("utf-8")
+            segment = [value for _, value in _scan(io.StringIO(text), len(text), path)
+                       if isinstance(value, dict)]
+            yield from reversed(segment)
+            end = start
+
+def _scan(f, chunk_size, path):
+    """Yield (byte offset, value) of every top-level JSON value in text file `f`."""
+    decoder = json.JSONDecoder()
+    buf, pos, eof = "", 0, False
+    at = (0, 1, 0, 0)  # (offset, line, column, byte offset) of buf[0] in the file
+    narrow = True      # buf is ASCII: character and byte offsets agree
+    while True:
+        while pos < len(buf) and buf[pos] in _SEPARATORS:
+            pos += 1
+        if pos == len(buf):
+            if eof:
+                return
+            at = _advance(at, buf, pos, narrow)
+            buf, pos = f.read(chunk_size), 0
+            eof, narrow = not buf, buf.isascii()
+            continue
+        try:
+            value, end = decoder.raw_decode(buf, pos)
+        except json.JSONDecodeError as e:
+            if eof or not _truncated(e, len(buf)):
+                raise _in_file(e, path, at) from None
+            end = None
+        if end is None or end == len(buf) and not eof:
+            # element cut off at the chunk edge, or a number running into it
+            # ("2.5" of "2.5e10" decodes on its own): read on and retry
+            more = f.read(chunk_size)
+            at = _advance(at, buf, pos, narrow)
+            buf, pos = buf[pos:] + more, 0
+            eof, narrow = not more, buf.isascii()
+            continue
+        yield at[3] + (pos if narrow else len(buf[:pos].encode("utf-8"))), value
+        pos = end
+
+# longest token that can be cut at the chunk edge and fail inside itself
+# rather than at the end (a surrogate pair escape, "Infinity", …)
+_EDGE = 16
+
+def _truncated(e, size):
+    """Did decoding fail only because the buffer ended mid-element?"""
+    # an unterminated string always runs into the end of the buffer
+    return e.pos >= size - _EDGE or e.msg.startswith("Unterminated string")
+
+def _advance(at, buf, pos, narrow):
+    """File position of buf[pos], given that of buf[0]."""
+    offset, line, col, byte = at
+    newlines = buf.count("\n", 0, pos)
+    if newlines:
+        col = pos - buf.rfind("\n", 0, pos) - 1
+    else:
+        col += pos
+    byte += pos if narrow else len(buf[:pos].encode("utf-8"))
+    return offset + pos, line + newlines, col, byte
+
+def _in_file(e, path, at):
+    """Re-position a decode error from the buffer into the file."""
+    offset, line, col, _ = at
+    err = json.JSONDecodeError(e.msg, e.doc, e.pos)
+    err.pos = offset + e.pos
+    err.lineno = line + e.lineno - 1
+    err.colno = e.colno + col if e.lineno == 1 else e.colno
+    err.args = (f"{e.msg} in {path}: line {err.lineno} column {err.colno} (char {err.pos})",)
+    return err
+
+class Capture:
+    """Compact per-uplink columns of one capture file."""
+
+    __slots__ = ("filename", "time", "dev_addr", "f_cnt", "sf", "frequency",
+                 "bandwidth", "coding_rate", "phy_size", "rssi", "snr", "gateway")
+
+    def __init__(self, filename):
+        self.filename = filename
+        self.time = array("q")
+        self.dev_addr = []
+        self.f_cnt = array("l")
+        self.sf = array("b")
+        self.frequency = array("q")
+        self.bandwidth = array("l")
+        self.coding_rate = array("b")
+        self.phy_size = array("h")
+        self.rssi = array("d")
+        self.snr = array("d")
+        self.gateway = []
+
+    def __len__(self):
+        return len(self.f_cnt)
+
+    def append(self, entry):
+        """Add one console event; ignored unless it carries a MAC payload."""
+        try:
+            message = entry["data"]["message"]
+            f_hdr = message["payload"]["mac_payload"]["f_hdr"]
+        except (KeyError, TypeError):
+            return
+        dev_addr = f_hdr.get("dev_addr")
+        self.dev_addr.append(sys.intern(dev_addr) if dev_addr is not None else None)
+        f_cnt = f_hdr.get("f_cnt")
+        self.f_cnt.append(f_cnt if f_cnt is not None else -1)
+
+        received_at = message.get("received_at") or entry.get("time")
+        try:
+            self.time.append(time_ns(received_at) if received_at else 0)
+        except ValueError:
+            self.time.append(0)
+
+        settings = message.get("settings") or {}
+        lora = (settings.get("data_rate") or {}).get("lora") or {}
+        self.sf.append(lora.get("spreading_factor", 0))
+        self.frequency.append(int(settings.get("frequency", 0)))
+        self.bandwidth.append(lora.get("bandwidth", 0))
+        cr = lora.get("coding_rate", "")
+        self.coding_rate.append(int(cr[2:]) - 4 if cr[:2] == "4/" else 0)
+        self.phy_size.append(_b64_size(message["raw_payload"]) if "raw_payload" in message else -1)
+
+        rssi = snr = math.nan
+        gateway = None
+        for rx in message.get("rx_metadata") or ():
+            r = rx.get("rssi", rx.get("channel_rssi"))
+            if r is not None and not r <= rssi:  # NaN compares False
+                rssi, snr = r, rx.get("snr", math.nan)
+                gateway = (rx.get("gateway_ids") or {}).get("gateway_id")
+        self.rssi.append(rssi)
+        self.snr.append(snr)
+        self.gateway.append(sys.intern(gateway) if gateway is not None else None)
+
+    def codes(self):
+        """Dictionary-encoded dev_addr: (distinct addresses, per-row index, -1 for None)."""
+        index = {}
+        codes = array("l", [index.setdefault(addr, len(index)) if addr is not None else -1
+                            for addr in self.dev_addr])
+        return list(index), codes
+
+def read_capture(path, filename=None, chunk_size=CHUNK_SIZE):
+    """Stream one capture file into a `Capture`."""
+    capture = Capture(filename or path)
+    for entry in iter_entries(path, chunk_size):
+        capture.append(entry)
+    return capture
@@ -0,0 +1,215 @@
+"""
+Columnar, memory-mappable store of TTN console captures.
+
+`CaptureStore.sync` converts each capture once into a directory of `.npy`
+columns, with rows sorted by time:
+
+    time       int64    received_at, ns since the epoch
+    dev_addr   int32    index into dev_addrs.npy, -1 if none
+    f_cnt      int64    -1 where the header has no f_cnt
+    sf         int8     spreading factor, 0 if unknown
+    frequency  int64    Hz
+    bandwidth  int32    Hz
+    coding_rate int8    CR 1 … 4 (4/5 … 4/8)
+    phy_size   int16    PHY payload bytes, -1 if unknown
+    rssi, snr  float32  best gateway
+    gateway    int32    index into gateways.npy, -1 if none
+
+plus two indexes: `dev_order.npy` / `dev_offsets.npy` (the rows of device
+k are `dev_order[dev_offsets[k]:dev_offsets[k + 1]]`), and the sorted time
+column itself for time ranges.  `manifest.json` records each source's size
+and mtime; a capture is re-ingested only when those change.  `load` maps
+the columns with `mmap_mode="r"`, so a repeat analysis reads only the
+pages it touches.
+"""
+import json
+import os
+import shutil
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from capture_reader import read_capture
+
+STORE_DIR = ".capture_store"
+VERSION = 2  # bump when the column layout changes: every capture is re-ingested
+
+COLUMNS = {
+    "time": np.int64,
+    "dev_addr": np.int32,
+    "f_cnt": np.int64,
+    "sf": np.int8,
+    "frequency": np.int64,
+    "bandwidth": np.int32,
+    "coding_rate": np.int8,
+    "phy_size": np.int16,
+    "rssi": np.float32,
+    "snr": np.float32,
+    "gateway": np.int32,
+}
+
+class StoredCapture:
+    """One ingested capture: memory-mapped columns plus its indexes, mapped on first use."""
+
+    def __init__(self, filename, directory):
+        self.filename = filename
+        self.directory = directory
+
+    def __getattr__(self, name):
+        # only called for attributes not set yet, i.e. columns not mapped yet
+        if name not in COLUMNS and name not in ("dev_addrs", "gateways", "dev_order", "dev_offsets"):
+            raise AttributeError(name)
+        values = np.load(os.path.join(self.directory, name + ".npy"), mmap_mode="r")
+        if name in ("dev_addrs", "gateways"):
+            values = values.tolist()
+        setattr(self, name, values)
+        return values
+
+    def __len__(self):
+        return len(self.time)
+
+    def codes(self):
+        """Dictionary-encoded dev_addr, as `Capture.codes` returns it."""
+        return self.dev_addrs, self.dev_addr
+
+    def rows_for(self, dev_addr):
+        """Row numbers of one device, in time order."""
+        try:
+            k = self.dev_addrs.index(dev_addr)
+        except ValueError:
+            return np.zeros(0, dtype=np.int64)
+        return self.dev_order[self.dev_offsets[k]:self.dev_offsets[k + 1]]
+
+    def between(self, start_ns, end_ns):
+        """Row slice with start_ns <= time < end_ns."""
+        lo, hi = np.searchsorted(self.time, [start_ns, end_ns])
+        return slice(int(lo), int(hi))
+
+class CaptureStore:
+    def __init__(self, root):
+        self.root = root
+        self.manifest_path = os.path.join(root, "manifest.json")
+        self.manifest = self._read_manifest()
+
+    def _read_manifest(self):
+        try:
+            with open(self.manifest_path, "r") as f:
+                manifest = json.load(f)
+        except (OSError, json.JSONDecodeError):
+            return {}
+        if manifest.get("version") != VERSION:
+            return {}
+        return manifest.get("captures", {})
+
+    def _write_manifest(self):
+        os.makedirs(self.root, exist_ok=True)
+        tmp = self.manifest_path + ".tmp"
+        with open(tmp, "w") as f:
+            json.dump({"version": VERSION, "captures": self.manifest}, f, indent=1, sort_keys=True)
+        os.replace(tmp, self.manifest_path)
+
+    @staticmethod
+    def _key(path):
+        return os.path.basename(path)
+
+    def _directory(self, path):
+        return os.path.join(self.root, self._key(path))
+
+    def is_current(self, path):
+        entry = self.manifest.get(self._key(path))
+        if entry is None or not os.path.isdir(self._directory(path)):
+            return False
+        st = os.stat(path)
+        return entry["size"] == st.st_size and entry["mtime_ns"] == st.st_mtime_ns
+
+    def sync(self, paths, workers=None):
+        """
+        Ingest every capture in `paths` that is new or changed since its last
+        ingest (in `workers` processes when there are several), and forget
+        captures that are no longer listed.  Returns {filename: error} for
+        captures that could not be read.
+        """
+        stale = [path for path in paths if not self.is_current(path)]
+        keys = {self._key(path) for path in paths}
+        removed = [key for key in self.manifest if key not in keys]
+        if not stale and not removed:
+            return {}
+
+        for key in removed:
+            shutil.rmtree(os.path.join(self.root, key), ignore_errors=True)
+            del self.manifest[key]
+
+        jobs = [(path, self._directory(path)) for path in stale]
+        workers = min(workers or os.cpu_count() or 1, len(jobs)) or 1
+        if workers > 1:
+            with ProcessPoolExecutor(workers) as pool:
+                results = list(pool.map(_ingest_job, jobs))
+        else:
+            results = [_ingest_job(job) for job in jobs]
+
+        errors = {}
+        for path, (entry, error) in zip(stale, results):
+            if error:
+                errors[self._key(path)] = error
+                self.manifest.pop(self._key(path), None)
+            else:
+                self.manifest[self._key(path)] = entry
+        self._write_manifest()
+        return errors
+
+    def load(self, path):
+        """Memory-mapped columns of an ingested capture."""
+        return StoredCapture(self._key(path), self._directory(path))
+
+def _ingest_job(job):
+    path, directory = job
+    st = os.stat(path)
+    try:
+        capture = read_capture(path, os.path.basename(path))
+    except (json.JSONDecodeError, OSError) as e:
+        return None, str(e)
+    rows = write_capture(capture, directory)
+    return {"size": st.st_size, "mtime_ns": st.st_mtime_ns, "rows": rows}, None
+
+def _encode(values):
+    index = {}
+    codes = np.array([index.setdefault(v, len(index)) if v is not None else -1 for v in values],
+                     dtype=np.int32)
+    return np.array(list(index), dtype=str), codes
+
+def write_capture(capture, directory):
+    """Write one `Capture` as sorted, indexed `.npy` columns; returns the row count."""
+    dev_addrs, dev_codes = _encode(capture.dev_addr)
+    gateways, gateway_codes = _encode(capture.gateway)
+    columns = {
+        "time": np.asarray(capture.time),
+        "dev_addr": dev_codes,
+        "f_cnt": np.asarray(capture.f_cnt),
+        "sf": np.asarray(capture.sf),
+        "frequency": np.asarray(capture.frequency),
+        "bandwidth": np.asarray(capture.bandwidth),
+        "coding_rate": np.asarray(capture.coding_rate),
+        "phy_size": np.asarray(capture.phy_size),
+        "rssi": np.asarray(capture.rssi),
+        "snr": np.asarray(capture.snr),
+        "gateway": gateway_codes,
+    }
+    order = np.argsort(columns["time"], kind="stable")
+    columns = {name: values[order].astype(COLUMNS[name], copy=False)
+               for name, values in columns.items()}
+
+    # rows grouped by device (time order within each); None sorts first, as -1
+    dev_order = np.argsort(columns["dev_addr"], kind="stable")
+    counts = np.bincount(columns["dev_addr"] + 1, minlength=len(dev_addrs) + 1)[1:]
+    dev_offsets = np.concatenate(([0], np.cumsum(counts))) + np.count_nonzero(columns["dev_addr"] < 0)
+
+    tmp = directory + ".tmp"
+    shutil.rmtree(tmp, ignore_errors=True)
+    os.makedirs(tmp)
+    arrays = dict(columns, dev_addrs=dev_addrs, gateways=gateways,
+                  dev_order=dev_order, dev_offsets=dev_offsets)
+    for name, values in arrays.items():
+        np.save(os.path.join(tmp, name + ".npy"), values)
+    shutil.rmtree(directory, ignore_errors=True)
+    os.replace(tmp, directory)
+    return len(order)
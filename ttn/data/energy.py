@@ -0,0 +1,224 @@
+"""
+Energy per transmission, device and run, straight from the TTN captures.
+
+Every uplink's airtime comes from its own spreading factor, bandwidth,
+coding rate and PHY payload size (`calc.time_on_air`), and its energy from
+the device's `EnergyCalculator` (picked by file-name prefix).  Frames that
+never arrived were still transmitted, so a run is charged for every FCnt
+from 0 to `expected - 1`, like the hand-counted `EC` column of
+`device-ttn-combined/*.csv`.  `--expected` gives the uplinks each run sent
+(as for stats.py); frames with a higher FCnt are not charged.  Without it
+the run is taken to end at the highest FCnt heard.
+
+The settings of a lost frame are not in the capture, so its energy is an
+estimate, reported on its own in `EC Lost (est.)`.  The rule follows the
+SF-adaptive firmware (`DynamicSF`): every message starts at the lowest SF
+and each unacknowledged frame is re-sent one SF higher.  So the frames lost
+just before a frame heard at SF s are charged at s-1, s-2, … counting
+back, wrapping round within the SFs heard from that device.  Payload
+size, bandwidth and coding rate come from that next frame heard.  Frames
+lost after the last frame heard are charged at the device's lowest SF.  A
+device heard on a single SF is charged at that SF throughout.
+
+    python energy.py logs/report --expected 50       # EC per run
+    python energy.py logs/article --all-devices --out ec.csv
+"""
+import argparse
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from calc import heltec_calc, sodaq_calc, time_on_air
+from capture_reader import read_capture
+from capture_store import STORE_DIR, CaptureStore
+
+CALCULATORS = {"heltec": heltec_calc, "sodaq": sodaq_calc}
+DEFAULT_BANDWIDTH = 125_000
+DEFAULT_CR = 1  # 4/5
+
+COLUMNS = ["File", "Dev Addr", "Uplinks", "Transmissions", "Airtime (s)", "EC", "EC Lost (est.)"]
+MAX_SF_STEPS = 6  # SF7 … SF12: most SFs a device can cycle through
+
+def calculator_for(filename):
+    """The `EnergyCalculator` of the device a capture was recorded with."""
+    for prefix, calc in CALCULATORS.items():
+        if filename.lower().startswith(prefix):
+            return calc
+    raise ValueError(f"No energy calculator for {filename!r} (expected one of {sorted(CALCULATORS)})")
+
+def radio_settings(capture):
+    """(sf, PHY size, bandwidth, CR) of every row; NaN SF / size where unknown."""
+    size = np.asarray(capture.phy_size).astype(float)
+    size[size < 0] = np.nan
+    bandwidth = np.asarray(capture.bandwidth).astype(float)
+    bandwidth[bandwidth <= 0] = DEFAULT_BANDWIDTH
+    cr = np.asarray(capture.coding_rate).astype(int)
+    cr[cr <= 0] = DEFAULT_CR
+    sf = np.asarray(capture.sf).astype(float)
+    sf[sf <= 0] = np.nan
+    return sf, size, bandwidth, cr
+
+def airtimes(capture):
+    """Seconds on air of every row; NaN where the payload size is unknown."""
+    sf, size, bandwidth, cr = radio_settings(capture)
+    return time_on_air(sf, size, bandwidth, cr, lorawan=False)
+
+def device_energy(capture, calc, expected_count=None):
+    """
+    Transmissions, airtime and energy of every device in `capture`, in one
+    vectorized pass; ordered like `stats.aggregate_devices` (most uplinks first).
+
+    `expected_count` is the number of uplinks the main device (most uplinks)
+    sent; every other device, and the main one by default, is taken to have
+    sent FCnt 0 up to the highest FCnt heard.  Lost frames are estimated as
+    described at the top of this module.
+    """
+    dev_addrs, codes = capture.codes()
+    codes = np.asarray(codes).astype(np.int_)
+    keep = codes >= 0
+    code = codes[keep]
+    f_cnt = np.maximum(np.asarray(capture.f_cnt)[keep], 0).astype(np.int_)
+    sf, size, bandwidth, cr = (a[keep] for a in radio_settings(capture))
+    n = len(dev_addrs)
+    uplinks = np.bincount(code, minlength=n)
+
+    main = None
+    if expected_count is not None and n:
+        # the main device's run ends at `expected_count`: later FCnts are not charged
+        main = np.argmax(uplinks)
+        in_run = (code != main) | (f_cnt < expected_count)
+        code, f_cnt, sf, size, bandwidth, cr = (
+            a[in_run] for a in (code, f_cnt, sf, size, bandwidth, cr))
+
+    # first copy of each (device, FCnt), in FCnt order per device
+    order = np.lexsort((f_cnt, code))
+    c_sorted, f_sorted = code[order], f_cnt[order]
+    first = np.ones(len(order), dtype=bool)
+    first[1:] = (c_sorted[1:] != c_sorted[:-1]) | (f_sorted[1:] != f_sorted[:-1])
+    pick = order[first]
+    c_u, f_u = code[pick], f_cnt[pick]
+    sf_u, size_u, bw_u, cr_u = sf[pick], size[pick], bandwidth[pick], cr[pick]
+    heard_s = np.nan_to_num(time_on_air(sf_u, size_u, bw_u, cr_u, lorawan=False))
+
+    # frames lost before each frame heard (from FCnt 0 for a device's first) …
+    same_device = c_u[1:] == c_u[:-1]
+    gap = f_u.copy()
+    gap[1:][same_device] = (f_u[1:] - f_u[:-1] - 1)[same_device]
+    # … and after its last one, up to the end of the run
+    last = np.ones(len(c_u), dtype=bool)
+    last[:-1] = ~same_device
+    run_length = np.zeros(n, dtype=np.int_)
+    run_length[c_u[last]] = f_u[last] + 1
+    if main is not None:
+        run_length[main] = expected_count
+    tail = np.zeros(len(c_u), dtype=np.int_)
+    tail[last] = run_length[c_u[last]] - f_u[last] - 1
+
+    # SFs heard per device: a lost frame's SF cycles within [lo, hi]
+    lo = np.full(n, np.nan)
+    hi = np.full(n, np.nan)
+    np.fmin.at(lo, c_u, sf_u)
+    np.fmax.at(hi, c_u, sf_u)
+    lo_u = np.nan_to_num(lo[c_u]).astype(np.int_)
+    steps = np.clip(np.nan_to_num(hi[c_u] - lo[c_u]).astype(np.int_) + 1, 1, MAX_SF_STEPS)
+    pos = np.nan_to_num(sf_u - lo_u).astype(np.int_)  # the frame's place in that cycle
+
+    # airtime of each frame's payload at every SF of its device's cycle
+    cycle = np.arange(MAX_SF_STEPS)
+    table = np.nan_to_num(time_on_air(lo_u[:, None] + cycle, size_u[:, None], bw_u[:, None],
+                                      cr_u[:, None], lorawan=False))
+    table[cycle >= steps[:, None]] = 0
+    # whole cycles, then the partial one counting back from the frame's SF
+    lost_s = gap // steps * table.sum(axis=1)
+    rows = np.arange(len(c_u))
+    for back in range(1, MAX_SF_STEPS):
+        part = back <= gap % steps
+        lost_s[part] += table[rows[part], (pos[part] - back) % steps[part]]
+    lost_s += tail * table[:, 0]
+
+    lost_seconds = np.bincount(c_u, weights=lost_s, minlength=n)
+    seconds = np.bincount(c_u, weights=heard_s, minlength=n) + lost_seconds
+    watts = calc.voltage * calc.current
+    df = pd.DataFrame({
+        "Dev Addr": dev_addrs,
+        "Uplinks": uplinks,
+        "Transmissions": np.bincount(c_u, weights=1 + gap + tail, minlength=n).astype(np.int_),
+        "Airtime (s)": seconds.round(4),
+        "EC": (watts * seconds).round(2),
+        "EC Lost (est.)": (watts * lost_seconds).round(2),
+    })
+    return df.sort_values("Uplinks", ascending=False, kind="stable").reset_index(drop=True)
+
+def _rows(capture, all_devices, expected_count=None):
+    devices = device_energy(capture, calculator_for(capture.filename), expected_count)
+    if not all_devices:
+        devices = devices.head(1)  # the device under test
+    devices.insert(0, "File", capture.filename)
+    return devices.to_dict("records")
+
+def _energy_job(job):
+    # runs in a worker process: only the result rows travel back
+    path, filename, all_devices, expected_count = job
+    try:
+        return _rows(read_capture(path, filename), all_devices, expected_count), None
+    except (json.JSONDecodeError, OSError, ValueError) as e:
+        return [], f"Skipping {filename}: {e}"
+
+def energy_table(folder_path, all_devices=False, workers=None, use_store=True,
+                 expected_count=None):
+    """
+    EC per run (or per device) for every capture in `folder_path`, in
+    file-name order; `expected_count` as for `device_energy`.
+    """
+    filenames = sorted(f for f in os.listdir(folder_path) if f.lower().endswith(".json"))
+    paths = [os.path.join(folder_path, filename) for filename in filenames]
+    if use_store:
+        store = CaptureStore(os.path.join(folder_path, STORE_DIR))
+        errors = store.sync(paths, workers)  # parses new or changed captures in parallel
+        results = []
+        for filename, path in zip(filenames, paths):
+            if filename in errors:
+                results.append(([], f"Skipping {filename}: {errors[filename]}"))
+                continue
+            try:
+                results.append((_rows(store.load(path), all_devices, expected_count), None))
+            except ValueError as e:
+                results.append(([], f"Skipping {filename}: {e}"))
+    else:
+        jobs = [(path, filename, all_devices, expected_count)
+                for filename, path in zip(filenames, paths)]
+        workers = min(workers or os.cpu_count() or 1, len(jobs)) or 1
+        if workers > 1:
+            with ProcessPoolExecutor(workers) as pool:
+                results = list(pool.map(_energy_job, jobs))  # map keeps job order
+        else:
+            results = [_energy_job(job) for job in jobs]
+
+    rows = []
+    for file_rows, error in results:
+        if error:
+            print(error)
+        rows.extend(file_rows)
+    return pd.DataFrame(rows, columns=COLUMNS)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Transmission energy (EC) per TTN capture")
+    parser.add_argument("folder", nargs="?", default="logs/report/")
+    parser.add_argument("--expected", type=int, default=None,
+                        help="uplinks sent per run (default: up to the highest FCnt heard)")
+    parser.add_argument("--all-devices", action="store_true", help="one row per DevAddr heard")
+    parser.add_argument("--workers", type=int, default=None,
+                        help="processes to parse files in (default: one per core, 1 = serial)")
+    parser.add_argument("--no-store", action="store_true",
+                        help=f"parse every capture afresh instead of using {STORE_DIR}/")
+    parser.add_argument("--out", help="also write the table as CSV")
+    args = parser.parse_args()
+
+    table = energy_table(args.folder, args.all_devices, args.workers, not args.no_store,
+                         args.expected)
+    print(table.to_string(index=False))
+    if args.out:
+        table.to_csv(args.out, index=False)
@@ -1,10 +1,18 @@
 import pandas as pd
+import matplotlib
+matplotlib.use('Agg')  # headless: figures are only ever saved to files
 import matplotlib.pyplot as plt
 import seaborn as sns
 import numpy as np
+import functools
+import hashlib
+import inspect
+import json
 import os
-from typing import List, Dict, Tuple, Optional
-from dataclasses import dataclass
+import pickle
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, List, Dict, Tuple, Optional
+from dataclasses import asdict, dataclass, field
 
 @dataclass
 class PlotConfig:
@@ -40,6 +48,82 @@ class PlotConfig:
             }
 
 
+class PlotCache:
+    """
+    Content-addressed cache of derived data and rendered figures.
+    
+    Entries are keyed on the SHA-256 of the input CSV plus whatever else they
+    depend on (plot kind and columns, `PlotConfig`, the source of the class
+    that computes or draws them), so an edited CSV, config or drawing method
+    simply misses.  Frames and pivots are pickled under `data/`; `figures.json`
+    records the key each output file was rendered from, so a figure is only
+    re-rendered when its key changed or the file is gone.
+    """
+    VERSION = 1  # bump to recompute everything (e.g. a helper outside the hashed classes changed)
+    
+    def __init__(self, root: str = '.plot_cache'):
+        self.root = root
+        self.manifest_path = os.path.join(root, 'figures.json')
+        try:
+            with open(self.manifest_path, 'r') as f:
+                self.figures: Dict[str, str] = json.load(f)
+        except (OSError, json.JSONDecodeError):
+            self.figures = {}
+    
+    @staticmethod
+    def file_digest(path: str) -> str:
+        h = hashlib.sha256()
+        with open(path, 'rb') as f:
+            for chunk in iter(lambda: f.read(1 << 20), b''):
+                h.update(chunk)
+        return h.hexdigest()
+    
+    @classmethod
+    def key(cls, *parts) -> str:
+        """Stable hash of JSON-serialisable parts"""
+        text = json.dumps([cls.VERSION, matplotlib.__version__, *parts], sort_keys=True, default=str)
+        return hashlib.sha256(text.encode()).hexdigest()
+    
+    @staticmethod
+    @functools.lru_cache(maxsize=None)
+    def code_digest(obj) -> str:
+        """SHA-256 of the source of `obj`, so editing it invalidates its entries"""
+        return hashlib.sha256(inspect.getsource(obj).encode()).hexdigest()
+    
+    def _data_path(self, key: str) -> str:
+        return os.path.join(self.root, 'data', key + '.pkl')
+    
+    def get(self, key: str) -> Any:
+        """Cached value, or None on a miss"""
+        try:
+            with open(self._data_path(key), 'rb') as f:
+                return pickle.load(f)
+        except (OSError, pickle.UnpicklingError, EOFError):
+            return None
+    
+    def put(self, key: str, value: Any):
+        path = self._data_path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp = path + '.tmp'
+        with open(tmp, 'wb') as f:
+            pickle.dump(value, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp, path)
+    
+    def is_current(self, filename: str, key: str) -> bool:
+        """Whether `filename` exists and was rendered from `key`"""
+        return self.figures.get(filename) == key and os.path.exists(filename)
+    
+    def mark_rendered(self, filename: str, key: str):
+        self.figures[filename] = key
+    
+    def save(self):
+        os.makedirs(self.root, exist_ok=True)
+        tmp = self.manifest_path + '.tmp'
+        with open(tmp, 'w') as f:
+            json.dump(self.figures, f, indent=1, sort_keys=True)
+        os.replace(tmp, self.manifest_path)
+
+
 class LoRaWANAnalyzer:
     """Main analyzer class for LoRaWAN performance data"""
     
@@ -50,9 +134,18 @@ class LoRaWANAnalyzer:
         self.strategies: Optional[np.ndarray] = None
         self.jamming_conditions: Optional[List[str]] = None
         self.x_positions: Optional[np.ndarray] = None
+        self.digest: Optional[str] = None  # SHA-256 of the CSV, set by load_and_preprocess_data
+        
+    def load_and_preprocess_data(self, cache: Optional[PlotCache] = None) -> pd.DataFrame:
+        """Load CSV data and perform preprocessing (or take the result from `cache`)"""
+        self.digest = PlotCache.file_digest(self.csv_path)
+        if cache is not None:
+            key = PlotCache.key('frame', self.digest, PlotCache.code_digest(LoRaWANAnalyzer))
+            cached = cache.get(key)
+            if cached is not None:
+                self.df, self.strategies, self.jamming_conditions, self.x_positions = cached
+                return self.df
         
-    def load_and_preprocess_data(self) -> pd.DataFrame:
-        """Load CSV data and perform preprocessing"""
         self.df = pd.read_csv(self.csv_path)
         
         # Clean and parse the data
@@ -87,6 +180,8 @@ class LoRaWANAnalyzer:
         
         self.x_positions = np.arange(len(self.strategies)) * 1.5
         
+        if cache is not None:
+            cache.put(key, (self.df, self.strategies, self.jamming_conditions, self.x_positions))
         return self.df
     
     def setup_plot_style(self):
@@ -95,20 +190,121 @@ class LoRaWANAnalyzer:
         sns.set_palette("husl")
 
 
+@dataclass
+class PlotSpec:
+    """One figure: what to draw and the precomputed data it needs (picklable)"""
+    kind: str
+    filename: str
+    title: str
+    data: Any
+    options: Dict[str, Any] = field(default_factory=dict)
+    alpha: float = 0.3
+    key: str = ''  # content hash of everything the figure depends on
+
+
 class PlotGenerator:
-    """Handles plot generation and saving"""
+    """Turns the analyzer's data into plot specs: every pivot is computed once, here"""
     
-    def __init__(self, analyzer: LoRaWANAnalyzer):
+    def __init__(self, analyzer: LoRaWANAnalyzer, cache: Optional[PlotCache] = None):
         self.analyzer = analyzer
         self.config = analyzer.config
+        self.cache = cache
+    
+    def layout(self) -> Dict[str, Any]:
+        """Axis layout shared by all figures"""
+        return {
+            'strategies': self.analyzer.strategies,
+            'jamming_conditions': self.analyzer.jamming_conditions,
+            'x_positions': self.analyzer.x_positions,
+        }
+    
+    def spec(self, kind: str, filename: str, title: str, alpha: Optional[float] = None, **options) -> PlotSpec:
+        """Build the spec for one figure, computing the data its plot kind needs"""
+        prepare = {
+            'pivot_bar': self.pivot,
+            'heatmap': self.pivot,
+            'grouped_bar': self.grouped_values,
+            'scatter': self.scatter_points,
+            'robustness': self.robustness_drops,
+        }[kind]
+        data_keys = {'data_column', 'x_column', 'y_column'}
+        data_options = {k: v for k, v in options.items() if k in data_keys}
+        options = {k: v for k, v in options.items() if k not in data_keys}
+        alpha = self.config.alpha if alpha is None else alpha
+        
+        # the data depends only on the CSV and what is plotted; the figure also on how
+        data_key = PlotCache.key('data', self.analyzer.digest, kind, data_options,
+                                 PlotCache.code_digest(PlotGenerator))
+        data = self.cache.get(data_key) if self.cache is not None else None
+        if data is None:
+            data = prepare(**data_options)
+            if self.cache is not None:
+                self.cache.put(data_key, data)
+        style = {k: v for k, v in asdict(self.config).items() if k != 'alpha'}
+        key = PlotCache.key('figure', data_key, filename, title, options, alpha, style,
+                            PlotCache.code_digest(FigureRenderer))
+        return PlotSpec(kind, filename, title, data, options, alpha, key)
+    
+    def pivot(self, data_column: str) -> pd.DataFrame:
+        """Strategy x jamming condition table, columns in legend order"""
+        assert self.analyzer.df is not None, "LoRaWANAnalyzer.df must not be None"
+        
+        pivot_data = self.analyzer.df.pivot(index='Strategy', columns='Jamming_Condition', values=data_column)
+        return pivot_data.reindex(columns=self.analyzer.jamming_conditions)
+    
+    def grouped_values(self, data_column: str) -> Dict[str, np.ndarray]:
+        """Per jamming condition, one value per strategy (in strategy order)"""
+        assert self.analyzer.df is not None, "LoRaWANAnalyzer.df must not be None"
+        assert self.analyzer.jamming_conditions is not None, "LoRaWANAnalyzer.jamming_conditions must not be None"
+        
+        pivot_data = self.analyzer.df.pivot_table(index='Strategy', columns='Jamming_Condition', values=data_column)
+        return {condition: pivot_data[condition].reindex(self.analyzer.strategies).values
+                for condition in self.analyzer.jamming_conditions}
+    
+    def scatter_points(self, x_column: str, y_column: str) -> List[Tuple[str, np.ndarray, np.ndarray, List[str]]]:
+        """Per jamming condition: x values, y values and annotation labels"""
+        assert self.config.condition_abbreviations is not None, "PlotConfig.condition_abbreviations must not be None"
+        assert self.analyzer.df is not None, "LoRaWANAnalyzer.df must not be None"
+        assert self.analyzer.jamming_conditions is not None, "LoRaWANAnalyzer.jamming_conditions must not be None"
+        
+        points = []
+        for condition in self.analyzer.jamming_conditions:
+            condition_data = self.analyzer.df[self.analyzer.df['Jamming_Condition'] == condition]
+            abbrev = self.config.condition_abbreviations[condition]
+            labels = [f"{strategy.replace('Sodaq', '')} ({abbrev})" for strategy in condition_data['Strategy']]
+            points.append((condition, condition_data[x_column].values, condition_data[y_column].values, labels))
+        return points
+    
+    def robustness_drops(self) -> Dict[str, np.ndarray]:
+        """MDR drop per strategy under each jamming condition"""
+        assert self.analyzer.df is not None, "LoRaWANAnalyzer.df must not be None"
+        assert self.analyzer.jamming_conditions is not None, "LoRaWANAnalyzer.jamming_conditions must not be None"
+        
+        df = self.analyzer.df
+        no_jamming_mdr = np.asarray(df[df['Jamming_Condition'] == 'No Jamming']['MDR_numeric'].values)
         
+        # Use only jamming conditions (exclude 'No Jamming')
+        return {condition: no_jamming_mdr - np.asarray(df[df['Jamming_Condition'] == condition]['MDR_numeric'].values)
+                for condition in self.analyzer.jamming_conditions if condition != 'No Jamming'}
+
+
+class FigureRenderer:
+    """Draws plot specs; needs only the config and layout, so it runs in worker processes"""
+    
+    def __init__(self, config: PlotConfig, layout: Dict[str, Any]):
+        self.config = config
+        self.strategies = layout['strategies']
+        self.jamming_conditions = layout['jamming_conditions']
+        self.x_positions = layout['x_positions']
+        self.alpha = config.alpha
+    
     def _get_filename_with_extension(self, base_filename: str) -> str:
         """Convert base filename to include proper extension"""
         # Remove existing extension if present
         base_name = os.path.splitext(base_filename)[0]
         return f"{base_name}.{self.config.output_format}"
     
-    def _save_figure(self, fig, filename: str):
+    def _save_figure(self, fig, filename: str) -> str:
         """Save figure with appropriate format and settings"""
         actual_filename = self._get_filename_with_extension(filename)
         
@@ -119,20 +315,39 @@ class PlotGenerator:
         else:
             raise ValueError(f"Unsupported output format: {self.config.output_format}")
         
-        print(f"Saved plot: {actual_filename}")
-        
-    def create_and_save_plot(self, plot_func, filename: str, title: str, **kwargs):
-        """Generic method to create, display, and save plots"""
-        # Create individual plot
+        return actual_filename
+    
+    def render(self, spec: PlotSpec) -> str:
+        """Draw one spec into its own figure and save it"""
+        self.alpha = spec.alpha
         fig, ax = plt.subplots(figsize=self.config.figsize)
-        plot_func(ax, title, **kwargs)
-        self._finalize_plot(ax, title)
+        self.draw(ax, spec)
+        self._finalize_plot(ax, spec.title)
         plt.tight_layout()
-        self._save_figure(fig, filename)
+        saved = self._save_figure(fig, spec.filename)
         plt.close(fig)
-        
-        # Return axis for subplot usage
-        return lambda ax_sub: plot_func(ax_sub, title, **kwargs)
+        return saved
+    
+    def render_combined(self, specs: List[PlotSpec], filename: str, alpha: float) -> str:
+        """Draw all specs into one 3x3 figure and save it"""
+        self.alpha = alpha
+        fig = plt.figure(figsize=(20, 16))
+        for i, spec in enumerate(specs, 1):
+            self.draw(plt.subplot(3, 3, i), spec)
+        plt.tight_layout()
+        saved = self._save_figure(fig, filename)
+        plt.close(fig)
+        return saved
+    
+    def draw(self, ax, spec: PlotSpec):
+        draw = {
+            'pivot_bar': self.plot_pivot_bar,
+            'grouped_bar': self.plot_grouped_bar,
+            'scatter': self.plot_scatter,
+            'heatmap': self.plot_heatmap,
+            'robustness': self.plot_robustness_analysis,
+        }[spec.kind]
+        draw(ax, spec.title, spec.data, **spec.options)
     
     def _finalize_plot(self, ax, title: str):
         """Apply common plot finalization"""
@@ -141,7 +356,7 @@ class PlotGenerator:
         handles, _ = ax.get_legend_handles_labels()
         if handles:
             ax.legend(bbox_to_anchor=(1.05, 1), loc='upper left')
-        ax.grid(True, alpha=self.config.alpha)
+        ax.grid(True, alpha=self.alpha)
         
     def _setup_bar_plot(self, ax, title: str, xlabel: str, ylabel: str, rotation: bool = True):
         """Common setup for bar plots"""
@@ -149,20 +364,14 @@ class PlotGenerator:
                     fontweight=self.config.title_fontweight)
         ax.set_xlabel(xlabel)
         ax.set_ylabel(ylabel)
-        ax.grid(True, alpha=self.config.alpha)
+        ax.grid(True, alpha=self.alpha)
         if rotation:
             plt.setp(ax.get_xticklabels(), rotation=self.config.rotation, ha=self.config.ha)
     
-    def plot_pivot_bar(self, ax, title: str, data_column: str, xlabel: str, ylabel: str):
+    def plot_pivot_bar(self, ax, title: str, pivot_data: pd.DataFrame, xlabel: str, ylabel: str):
         """Create pivot bar plot"""
         # Assertions
         assert self.config.colors is not None, "PlotConfig.colors must not be None"
-        assert self.analyzer.df is not None, "LoRaWANAnalyzer.df must not be None"
-
-        pivot_data = self.analyzer.df.pivot(index='Strategy', columns='Jamming_Condition', values=data_column)
-        
-        # Reorder columns to match desired legend order
-        pivot_data = pivot_data.reindex(columns=self.analyzer.jamming_conditions)
         
         # Create bars with consistent colors
         colors = [self.config.colors[col] for col in pivot_data.columns]
@@ -171,38 +380,32 @@ class PlotGenerator:
         self._setup_bar_plot(ax, title, xlabel, ylabel)
         ax.legend(title='Jamming Condition', bbox_to_anchor=(1.05, 1), loc='upper left')
     
-    def plot_grouped_bar(self, ax, title: str, data_column: str, xlabel: str, ylabel: str, label_suffix: str = ''):
+    def plot_grouped_bar(self, ax, title: str, values: Dict[str, np.ndarray], xlabel: str, ylabel: str,
+                         label_suffix: str = ''):
         """Create grouped bar plot"""
         # Assertions
         assert self.config.colors is not None, "PlotConfig.colors must not be None"
-        assert self.analyzer.df is not None, "LoRaWANAnalyzer.df must not be None"
-        assert self.analyzer.x_positions is not None, "LoRaWANAnalyzer.x_positions must not be None"
-        assert self.analyzer.jamming_conditions is not None, "LoRaWANAnalyzer.jamming_conditions must not be None"
+        assert self.x_positions is not None, "LoRaWANAnalyzer.x_positions must not be None"
         
-        pivot_data = self.analyzer.df.pivot_table(index='Strategy', columns='Jamming_Condition', values=data_column)
         width = 0.25
-        total_width = width * len(self.analyzer.jamming_conditions)
+        total_width = width * len(self.jamming_conditions)
         
         # Use the ordered jamming conditions
-        for i, condition in enumerate(self.analyzer.jamming_conditions):
-            positions = self.analyzer.x_positions - total_width / 2 + i * width
-            values = pivot_data[condition].reindex(self.analyzer.strategies).values
+        for i, (condition, condition_values) in enumerate(values.items()):
+            positions = self.x_positions - total_width / 2 + i * width
             color = self.config.colors[condition]
-            ax.bar(positions, values, width, label=f'{condition}{label_suffix}', 
+            ax.bar(positions, condition_values, width, label=f'{condition}{label_suffix}', 
                   alpha=0.8, color=color)
         
         self._setup_bar_plot(ax, title, xlabel, ylabel)
-        ax.set_xticks(self.analyzer.x_positions)
-        ax.set_xticklabels(self.analyzer.strategies, rotation=self.config.rotation, ha=self.config.ha)
+        ax.set_xticks(self.x_positions)
+        ax.set_xticklabels(self.strategies, rotation=self.config.rotation, ha=self.config.ha)
         ax.legend(bbox_to_anchor=(1.05, 1), loc='upper left')
     
-    def plot_scatter(self, ax, title: str, x_column: str, y_column: str, xlabel: str, ylabel: str):
+    def plot_scatter(self, ax, title: str, points, xlabel: str, ylabel: str):
         """Create scatter plot"""
         # Assertions
         assert self.config.colors is not None, "PlotConfig.colors must not be None"
-        assert self.config.condition_abbreviations is not None, "PlotConfig.condition_abbreviations must not be None"
-        assert self.analyzer.df is not None, "LoRaWANAnalyzer.df must not be None"
-        assert self.analyzer.jamming_conditions is not None, "LoRaWANAnalyzer.jamming_conditions must not be None"
 
         offsets = [
             (10, 0), (15, 5), (15, -5), (20, 0),
@@ -213,21 +416,16 @@ class PlotGenerator:
         offset_index = 0
         
         # Use the ordered jamming conditions
-        for condition in self.analyzer.jamming_conditions:
-            condition_data = self.analyzer.df[self.analyzer.df['Jamming_Condition'] == condition]
+        for condition, xs, ys, labels in points:
             color = self.config.colors[condition]
-            ax.scatter(condition_data[x_column], condition_data[y_column],
-                    label=condition, s=100, alpha=0.7, color=color)
+            ax.scatter(xs, ys, label=condition, s=100, alpha=0.7, color=color)
             
             # Add annotations with cycling offsets and styling
-            for _, row in condition_data.iterrows():
-                abbrev = self.config.condition_abbreviations[row['Jamming_Condition']]
-                scatter_title = f"{row['Strategy'].replace('Sodaq', '')} ({abbrev})"
-                
+            for x, y, scatter_title in zip(xs, ys, labels):
                 # Use cycling offsets to reduce overlaps
                 current_offset = offsets[offset_index % len(offsets)]
                 
-                ax.annotate(scatter_title, (row[x_column], row[y_column]),
+                ax.annotate(scatter_title, (x, y),
                         xytext=current_offset, textcoords='offset points', 
                         fontsize=8, alpha=0.8,
                         bbox=dict(boxstyle="round,pad=0.3", facecolor='white', 
@@ -239,16 +437,8 @@ class PlotGenerator:
         self._setup_bar_plot(ax, title, xlabel, ylabel, rotation=False)
         ax.legend(bbox_to_anchor=(1.05, 1), loc='upper left')
     
-    def plot_heatmap(self, ax, title: str, data_column: str, xlabel: str, ylabel: str, cbar_label: str):
+    def plot_heatmap(self, ax, title: str, pivot_data: pd.DataFrame, xlabel: str, ylabel: str, cbar_label: str):
         """Create heatmap"""
-        # Assertions
-        assert self.analyzer.df is not None, "LoRaWANAnalyzer.df must not be None"
-
-        pivot_data = self.analyzer.df.pivot(index='Strategy', columns='Jamming_Condition', values=data_column)
-        
-        # Reorder columns to match desired legend order
-        pivot_data = pivot_data.reindex(columns=self.analyzer.jamming_conditions)
-        
         heatmap_data = pivot_data.T
         sns.heatmap(heatmap_data, annot=True, fmt='.0f', cmap='RdYlGn', ax=ax, 
                    cbar_kws={'label': cbar_label})
@@ -256,30 +446,16 @@ class PlotGenerator:
         ax.set_xlabel(xlabel)
         ax.set_ylabel(ylabel)
     
-    def plot_robustness_analysis(self, ax, title: str):
+    def plot_robustness_analysis(self, ax, title: str, drops: Dict[str, np.ndarray]):
         """Create robustness analysis plot"""
         # Assertions
         assert self.config.colors is not None, "PlotConfig.colors must not be None"
-        assert self.analyzer.df is not None, "LoRaWANAnalyzer.df must not be None"
-        assert self.analyzer.x_positions is not None, "LoRaWANAnalyzer.x_positions must not be None"
-        assert self.analyzer.jamming_conditions is not None, "LoRaWANAnalyzer.jamming_conditions must not be None"
-
-        # Calculate performance drops
-        no_jamming_mdr = np.asarray(self.analyzer.df[self.analyzer.df['Jamming_Condition'] == 'No Jamming']['MDR_numeric'].values)
-        
-        drops = {}
-        # Use only jamming conditions (exclude 'No Jamming')
-        jamming_conditions = [cond for cond in self.analyzer.jamming_conditions if cond != 'No Jamming']
-        
-        for condition in jamming_conditions:
-            condition_mdr = np.asarray(self.analyzer.df[self.analyzer.df['Jamming_Condition'] == condition]['MDR_numeric'].values)
-            drops[condition] = no_jamming_mdr - condition_mdr
+        assert self.x_positions is not None, "LoRaWANAnalyzer.x_positions must not be None"
         
         # Plot bars in the consistent order
-        x = self.analyzer.x_positions
+        x = self.x_positions
         width = 0.2
-        for i, condition in enumerate(jamming_conditions):
-            drop_values = drops[condition]
+        for i, (condition, drop_values) in enumerate(drops.items()):
             positions = x + (i - 1.5) * width
             color = self.config.colors[condition]
             ax.bar(positions, drop_values, width, label=f'{condition} Impact', 
@@ -287,10 +463,82 @@ class PlotGenerator:
         
         self._setup_bar_plot(ax, title, 'Strategy', 'MDR Drop (%)')
         ax.set_xticks(x)
-        ax.set_xticklabels(self.analyzer.strategies, rotation=self.config.rotation, ha=self.config.ha)
+        ax.set_xticklabels(self.strategies, rotation=self.config.rotation, ha=self.config.ha)
         ax.legend(bbox_to_anchor=(1.05, 1), loc='upper left')
 
 
+def _init_worker():
+    """Headless backend and the shared style in every render process"""
+    matplotlib.use('Agg')
+    plt.style.use('default')
+    sns.set_palette("husl")
+
+
+def _render_job(job) -> str:
+    config, layout, spec = job
+    return FigureRenderer(config, layout).render(spec)
+
+
+def _render_combined_job(job) -> str:
+    config, layout, specs, filename, alpha = job
+    return FigureRenderer(config, layout).render_combined(specs, filename, alpha)
+
+
+def render_all(specs: List[PlotSpec], config: PlotConfig, layout: Dict[str, Any],
+               combined_filename: Optional[str] = None, combined_alpha: Optional[float] = None,
+               workers: Optional[int] = None, cache: Optional[PlotCache] = None) -> List[str]:
+    """
+    Render every spec (and the combined figure) in a process pool.
+    Returns the saved file names in spec order, combined figure last.
+    
+    With a `cache`, figures whose files were already rendered from the same
+    inputs and config are skipped (and left out of the result).
+    """
+    def stale(spec: PlotSpec) -> bool:
+        return cache is None or not cache.is_current(renderer._get_filename_with_extension(spec.filename), spec.key)
+    
+    renderer = FigureRenderer(config, layout)
+    todo = [spec for spec in specs if stale(spec)]
+    jobs = [(config, layout, spec) for spec in todo]
+    combined = None
+    if combined_filename is not None:
+        alpha = config.alpha if combined_alpha is None else combined_alpha
+        combined_spec = PlotSpec('combined', combined_filename, '', None, alpha=alpha,
+                                 key=PlotCache.key('combined', [spec.key for spec in specs], alpha))
+        if stale(combined_spec):
+            combined = (config, layout, specs, combined_filename, alpha)
+    if not jobs and combined is None:
+        return []
+    workers = workers or os.cpu_count() or 1
+    saved = _render(jobs, combined, workers)
+    
+    if cache is not None:
+        for spec in todo:
+            cache.mark_rendered(renderer._get_filename_with_extension(spec.filename), spec.key)
+        if combined is not None:
+            cache.mark_rendered(renderer._get_filename_with_extension(combined_filename), combined_spec.key)
+        cache.save()
+    return saved
+
+
+def _render(jobs, combined, workers: int) -> List[str]:
+    workers = min(workers, len(jobs) + (combined is not None))
+    if workers <= 1:
+        _init_worker()
+        saved = [_render_job(job) for job in jobs]
+        if combined is not None:
+            saved.append(_render_combined_job(combined))
+        return saved
+    
+    with ProcessPoolExecutor(workers, initializer=_init_worker) as pool:
+        # the combined figure is the slowest: start it first
+        combined_future = pool.submit(_render_combined_job, combined) if combined is not None else None
+        saved = list(pool.map(_render_job, jobs))
+        if combined_future is not None:
+            saved.append(combined_future.result())
+    return saved
+
+
 class ReportGenerator:
     """Generates summary statistics and reports"""
     
@@ -368,8 +616,11 @@ class ReportGenerator:
         return sorted(efficiency_data, key=lambda x: x[1], reverse=True)
 
 
-def main():
-    """Main execution function"""
+def main(workers: Optional[int] = None, use_cache: bool = True):
+    """
+    Main execution function; figures render in `workers` processes (default: one per core).
+    With `use_cache`, parsed data and unchanged figures are reused from .plot_cache/.
+    """
     # Configuration
     output_format = 'eps'  # Change to 'png' or 'eps'
     output_dir = 'plots/'
@@ -386,16 +637,17 @@ def main():
     
     # Initialize analyzer
     analyzer = LoRaWANAnalyzer(csv_data, config)
-    analyzer.load_and_preprocess_data()
+    cache = PlotCache() if use_cache else None
+    analyzer.load_and_preprocess_data(cache)
     analyzer.setup_plot_style()
     
     # Initialize plot generator
-    plot_gen = PlotGenerator(analyzer)
+    plot_gen = PlotGenerator(analyzer, cache)
     
-    # Define plots configuration (note: extensions will be automatically handled)
+    # Define plots (note: extensions will be automatically handled)
     plots_config = [
         {
-            'func': plot_gen.plot_pivot_bar,
+            'kind': 'pivot_bar',
             'filename': output_dir + 'mdr-pivot-bar',
             'title': 'Message Delivery by Strategy Under Jamming',
             'data_column': 'MDR_numeric',
@@ -403,7 +655,7 @@ def main():
             'ylabel': 'Message Delivery Rate (%)'
         },
         {
-            'func': plot_gen.plot_pivot_bar,
+            'kind': 'pivot_bar',
             'filename': output_dir + 'ec-pivot-bar',
             'title': 'Energy Use by Strategy Under Jamming',
             'data_column': 'EC',
@@ -411,7 +663,7 @@ def main():
             'ylabel': 'Energy Consumption'
         },
         {
-            'func': plot_gen.plot_grouped_bar,
+            'kind': 'grouped_bar',
             'filename': output_dir + 'tp-grouped-bar',
             'title': 'True Positives by Strategy & Jamming',
             'data_column': 'TP',
@@ -420,7 +672,7 @@ def main():
             'label_suffix': ' - TP'
         },
         {
-            'func': plot_gen.plot_grouped_bar,
+            'kind': 'grouped_bar',
             'filename': output_dir + 'fp-grouped-bar',
             'title': 'False Positives by Strategy & Jamming',
             'data_column': 'FP',
@@ -429,7 +681,7 @@ def main():
             'label_suffix': ' - FP'
         },
         {
-            'func': plot_gen.plot_scatter,
+            'kind': 'scatter',
             'filename': output_dir + 'ec-scatter',
             'title': 'Energy Consumption vs Message Delivery Rate',
             'x_column': 'EC',
@@ -438,7 +690,7 @@ def main():
             'ylabel': 'Message Delivery Rate (%)'
         },
         {
-            'func': plot_gen.plot_heatmap,
+            'kind': 'heatmap',
             'filename': output_dir + 'mdr-heatmap',
             'title': 'Message Delivery Rate Heatmap',
             'data_column': 'MDR_numeric',
@@ -448,7 +700,7 @@ def main():
             'alpha': 0
         },
         {
-            'func': plot_gen.plot_pivot_bar,
+            'kind': 'pivot_bar',
             'filename': output_dir + 'precision-pivot-bar',
             'title': 'Precision by Strategy Under Jamming',
             'data_column': 'Precision',
@@ -456,12 +708,12 @@ def main():
             'ylabel': 'Precision'
         },
         {
-            'func': plot_gen.plot_robustness_analysis,
+            'kind': 'robustness',
             'filename': output_dir + 'robustness-pivot-bar',
             'title': 'Robustness: Performance Drop Under Jamming',
         },
         {
-            'func': plot_gen.plot_pivot_bar,
+            'kind': 'pivot_bar',
             'filename': output_dir + 'overall-performance-pivot-bar',
             'title': 'Overall Performance (60% MDR, 40% EC)',
             'data_column': 'Performance_Score',
@@ -470,30 +722,21 @@ def main():
         }
     ]
     
-    # Create comprehensive figure - collect subplot functions
-    subplot_funcs = []
-    
-    # Generate individual plots and collect subplot functions
-    for i, plot_config in enumerate(plots_config, 1):
-        func = plot_config.pop('func')
-        filename = plot_config.pop('filename')
-        title = plot_config.pop('title')
+    # Compute every plot's data once; the combined figure reuses it
+    specs = []
+    for plot_config in plots_config:
+        # a grid alpha, once set, carries over to the plots after it
         config.alpha = plot_config.pop('alpha', config.alpha)
-        
-        subplot_func = plot_gen.create_and_save_plot(func, filename, title, **plot_config)
-        subplot_funcs.append(subplot_func)
-    
-    # Create combined subplot figure
-    combined_fig = plt.figure(figsize=(20, 16))
-    for i, subplot_func in enumerate(subplot_funcs, 1):
-        ax = plt.subplot(3, 3, i)
-        subplot_func(ax)
-    
-    plt.tight_layout()
+        specs.append(plot_gen.spec(**plot_config))
     
-    # Save the combined figure with the appropriate extension
-    combined_filename = output_dir + 'combined-plots'
-    plot_gen._save_figure(combined_fig, combined_filename)
+    # Render the individual figures and the combined 3x3 figure in parallel
+    saved = render_all(specs, config, plot_gen.layout(),
+                       combined_filename=output_dir + 'combined-plots', combined_alpha=config.alpha,
+                       workers=workers, cache=cache)
+    for filename in saved:
+        print(f"Saved plot: {filename}")
+    if cache is not None and len(saved) < len(specs) + 1:
+        print(f"{len(specs) + 1 - len(saved)} plots unchanged (cached in {cache.root}/)")
     #plt.show()
     
     # Generate report
@@ -501,4 +744,11 @@ def main():
     report_gen.print_summary_statistics()
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    import argparse
+    parser = argparse.ArgumentParser(description="LoRaWAN jamming strategy plots")
+    parser.add_argument("--workers", type=int, default=None,
+                        help="processes to render figures in (default: one per core, 1 = serial)")
+    parser.add_argument("--no-cache", action="store_true",
+                        help="recompute all data and re-render every figure, ignoring .plot_cache/")
+    args = parser.parse_args()
+    main(args.workers, use_cache=not args.no_cache)
\ No newline at end of file
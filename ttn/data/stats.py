@@ -1,86 +1,178 @@
+import argparse
 import os
 import json
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
 import pandas as pd
 
+from capture_reader import read_capture
+from capture_store import STORE_DIR, CaptureStore
+
 class LoRaWANAnalyzer:
-    def __init__(self, folder_path: str):
+    def __init__(self, folder_path: str, use_store=True):
         self.folder_path = folder_path
-        self.files_data = self._load_all_files()  # [(filename, [entries])]
-
-    def _load_all_files(self):
-        file_entries = []
-        for filename in sorted(os.listdir(self.folder_path)):
-            if filename.lower().endswith(".json"):
-                file_path = os.path.join(self.folder_path, filename)
-                try:
-                    with open(file_path, "r") as f:
-                        content = json.load(f)
-                        if isinstance(content, list):
-                            entries = [entry for entry in content if isinstance(entry, dict)]
-                        elif isinstance(content, dict):
-                            entries = [content]
-                        else:
-                            entries = []
-                        file_entries.append((filename, entries))
-                except (json.JSONDecodeError, OSError) as e:
-                    print(f"Skipping {filename} due to error: {e}")
-        return file_entries
-
-    def analyze_all(self, expected_count=50):
-        for filename, entries in self.files_data:
-            self._analyze_file(filename, entries, expected_count)
-
-    def _analyze_file(self, filename, data, expected_count):
-        dev_addr_counts = {}
-        for entry in data:
-            try:
-                dev_addr = entry["data"]["message"]["payload"]["mac_payload"]["f_hdr"]["dev_addr"]
-                dev_addr_counts[dev_addr] = dev_addr_counts.get(dev_addr, 0) + 1
-            except KeyError:
-                continue
-
-        if not dev_addr_counts:
-            print(f"\n{filename}: No dev_addr found.")
-            return
-
-        target_dev_addr = max(dev_addr_counts, key=dev_addr_counts.get)
-
-        f_cnt_values = []
-        missing_fcnt = []
-
-        for entry in data:
-            try:
-                mac_payload = entry["data"]["message"]["payload"]["mac_payload"]
-                dev_addr = mac_payload["f_hdr"].get("dev_addr")
-                if dev_addr == target_dev_addr:
-                    f_cnt = mac_payload["f_hdr"].get("f_cnt")
-                    if f_cnt is not None and f_cnt <= expected_count:
-                        f_cnt_values.append(f_cnt)
-                    else:
-                        missing_fcnt.append(entry)
-            except KeyError:
-                continue
-
-        received_count = len(set(f_cnt_values)) + 1
-        lost_count = expected_count - received_count
-        success_rate = received_count / expected_count * 100
-        loss_rate = lost_count / expected_count * 100
-
-        df = pd.DataFrame({
-            #"File": [filename],
-            "Target Dev Addr": [target_dev_addr],
-            "Total Sent": [expected_count],
-            "Received": [received_count],
-            "Lost": [lost_count],
-            "Success Rate (%)": [round(success_rate, 2)],
-            "Loss Rate (%)": [round(loss_rate, 2)]
-        })
-
-        print(f"Results for file: {filename}")
-        print(df.to_string(index=False))
-        print("\n")
-
-# Example usage
+        self.filenames = self._list_files()
+        # captures are ingested once into <folder>/.capture_store and read back memory-mapped
+        self.store = CaptureStore(os.path.join(folder_path, STORE_DIR)) if use_store else None
+
+    def _list_files(self):
+        return [filename for filename in sorted(os.listdir(self.folder_path))
+                if filename.lower().endswith(".json")]
+
+    def analyze_all(self, expected_count=None, workers=None, all_devices=False):
+        """
+        Analyze every capture and print one summary table, one row per file.
+
+        `expected_count` is the number of uplinks each run sent; by default
+        it is inferred per device as FCnt 0 up to the highest FCnt heard.  `all_devices`
+        lists every DevAddr heard instead of only each file's main device.
+        `workers` > 1 parses files in that many processes (default: one per
+        core); rows always come out in file-name order.  Returns the table.
+
+        With the store, only new or changed captures are parsed; the rest is
+        read back from memory-mapped columns.
+        """
+        paths = [os.path.join(self.folder_path, filename) for filename in self.filenames]
+        if self.store is not None:
+            errors = self.store.sync(paths, workers)
+            results = [([], f"Skipping {filename} due to error: {errors[filename]}")
+                       if filename in errors else
+                       _summarise(self.store.load(path), expected_count, all_devices)
+                       for filename, path in zip(self.filenames, paths)]
+        else:
+            jobs = [(path, filename, expected_count, all_devices)
+                    for filename, path in zip(self.filenames, paths)]
+            workers = min(workers or os.cpu_count() or 1, len(jobs)) or 1
+            if workers > 1:
+                with ProcessPoolExecutor(workers) as pool:
+                    results = list(pool.map(_analyze_job, jobs))  # map keeps job order
+            else:
+                results = [_analyze_job(job) for job in jobs]
+
+        rows = []
+        for file_rows, error in results:
+            if error:
+                print(error)
+            else:
+                rows.extend(file_rows)
+        columns = DEVICE_COLUMNS if all_devices else SUMMARY_COLUMNS
+        summary = pd.DataFrame(rows, columns=columns)
+        print(summary.to_string(index=False))
+        return summary
+
+SF_RANGE = range(7, 13)
+DEVICE_COLUMNS = ["File", "Dev Addr", "Uplinks", "Received", "Duplicates", "Lost",
+                  "FCnt Min", "FCnt Max", "Expected", "Loss Rate (%)"] + [f"SF{sf}" for sf in SF_RANGE]
+SUMMARY_COLUMNS = ["File", "Target Dev Addr", "Total Sent", "Received", "Lost",
+                   "Success Rate (%)", "Loss Rate (%)"]
+
+def aggregate_devices(capture):
+    """
+    Per-DevAddr statistics for every device in `capture`, in one pass.
+
+    Received counts distinct FCnts and Duplicates the remaining copies; an
+    uplink without `f_cnt` is FCnt 0 (the JSON leaves out zero values).
+    Expected is FCnt Max + 1, since every run starts at FCnt 0; frames lost
+    after the last one heard only show up with `--expected`.  Devices are
+    ordered by uplinks heard, most first (ties: first heard).
+    """
+    dev_addrs, codes = capture.codes()
+    codes = np.asarray(codes).astype(np.int_)
+    keep = codes >= 0
+    code = codes[keep]
+    f_cnt = np.maximum(np.asarray(capture.f_cnt)[keep], 0).astype(np.int_)
+    sf = np.asarray(capture.sf)[keep].astype(np.int_)
+    n = len(dev_addrs)
+
+    uplinks = np.bincount(code, minlength=n)
+    # distinct (device, FCnt) pairs: sort once, count first occurrences
+    order = np.lexsort((f_cnt, code))
+    c_sorted, f_sorted = code[order], f_cnt[order]
+    first = np.ones(len(order), dtype=bool)
+    first[1:] = (c_sorted[1:] != c_sorted[:-1]) | (f_sorted[1:] != f_sorted[:-1])
+    received = np.bincount(c_sorted[first], minlength=n)
+
+    f_min = np.full(n, np.iinfo(np.int_).max)
+    f_max = np.full(n, -1)
+    np.minimum.at(f_min, code, f_cnt)
+    np.maximum.at(f_max, code, f_cnt)
+    expected = f_max + 1
+
+    sf_counts = np.zeros((n, len(SF_RANGE)), dtype=np.int_)
+    known = (sf >= SF_RANGE.start) & (sf < SF_RANGE.stop)
+    np.add.at(sf_counts, (code[known], sf[known] - SF_RANGE.start), 1)
+
+    columns = {
+        "Dev Addr": dev_addrs,
+        "Uplinks": uplinks,
+        "Received": received,
+        "Duplicates": uplinks - received,
+        "Lost": expected - received,
+        "FCnt Min": f_min,
+        "FCnt Max": f_max,
+        "Expected": expected,
+        "Loss Rate (%)": np.round((expected - received) / expected * 100, 2),
+    }
+    for i, sf_value in enumerate(SF_RANGE):
+        columns[f"SF{sf_value}"] = sf_counts[:, i]
+    df = pd.DataFrame(columns)
+    return df.sort_values("Uplinks", ascending=False, kind="stable").reset_index(drop=True)
+
+def analyze_file(capture, expected_count=None):
+    """Summary row for one capture's main device, or None if it has no dev_addr at all."""
+    devices = aggregate_devices(capture)
+    if devices.empty:
+        return None
+
+    target = devices.iloc[0]
+    total_sent = expected_count if expected_count is not None else int(target["Expected"])
+    received_count = int(target["Received"])
+    lost_count = total_sent - received_count
+    success_rate = received_count / total_sent * 100
+    loss_rate = lost_count / total_sent * 100
+
+    return {
+        "File": capture.filename,
+        "Target Dev Addr": target["Dev Addr"],
+        "Total Sent": total_sent,
+        "Received": received_count,
+        "Lost": lost_count,
+        "Success Rate (%)": round(success_rate, 2),
+        "Loss Rate (%)": round(loss_rate, 2),
+    }
+
+def _summarise(capture, expected_count, all_devices):
+    if all_devices:
+        devices = aggregate_devices(capture)
+        devices.insert(0, "File", capture.filename)
+        return devices.to_dict("records"), None
+    row = analyze_file(capture, expected_count)
+    if row is None:
+        return [], f"{capture.filename}: No dev_addr found."
+    return [row], None
+
+def _analyze_job(job):
+    # runs in a worker process: only the small result rows travel back
+    path, filename, expected_count, all_devices = job
+    try:
+        capture = read_capture(path, filename)
+    except (json.JSONDecodeError, OSError) as e:
+        return [], f"Skipping {filename} due to error: {e}"
+    return _summarise(capture, expected_count, all_devices)
+
 if __name__ == "__main__":
-    analyzer = LoRaWANAnalyzer("logs/article/")
-    analyzer.analyze_all()
+    parser = argparse.ArgumentParser(description="Packet loss per TTN capture file")
+    parser.add_argument("folder", nargs="?", default="logs/article/")
+    parser.add_argument("--expected", type=int, default=None,
+                        help="uplinks sent per run (default: highest FCnt heard + 1)")
+    parser.add_argument("--all-devices", action="store_true",
+                        help="one row per DevAddr heard, with duplicates, FCnt range and SF counts")
+    parser.add_argument("--workers", type=int, default=None,
+                        help="processes to parse files in (default: one per core, 1 = serial)")
+    parser.add_argument("--no-store", action="store_true",
+                        help=f"parse every capture afresh instead of using {STORE_DIR}/")
+    args = parser.parse_args()
+
+    analyzer = LoRaWANAnalyzer(args.folder, use_store=not args.no_store)
+    analyzer.analyze_all(args.expected, args.workers, args.all_devices)